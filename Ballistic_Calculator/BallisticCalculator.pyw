@@ -1,23 +1,164 @@
+import os
 import sys
 import time
 import numpy as np
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QAbstractTableModel, QObject, QRunnable, QThreadPool, pyqtSignal
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton,
     QVBoxLayout, QHBoxLayout, QComboBox, QFormLayout,
-    QTableWidget, QTableWidgetItem, QTabWidget, QScrollArea,
+    QTableView, QTabWidget, QScrollArea,
     QHeaderView, QFileDialog, QAbstractItemView, QShortcut,
-    QAction
+    QAction, QProgressBar, QCheckBox
 )
 from PyQt5.QtGui import QFont, QIcon, QGuiApplication, QKeySequence
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.figure import Figure
 from matplotlib.patches import Circle
-from sympy import symbols, lambdify, sympify
 
-from Calculations.Atmosphere import Atmosphere
+from Calculations.Dispersion import dispersionAnalysis
+from Calculations.FiringTable import FiringTable
+from Calculations.Profiler import Profiler
+from Calculations.SolutionCache import SolutionCache
+from Calculations.TargetPath import TargetPath
+from Calculations.Trajectory import Trajectory
 from Calculations.TrajectoryCalculator import TrajectoryCalculator
 
+# Каталог приложения: кэши на диске хранятся рядом с ним, а не в текущем каталоге
+appDirectory = os.path.dirname(os.path.abspath(__file__))
+
+
+def decimationIndices(columns, maxPoints=4000):
+    """
+    Возвращает номера точек для отображения не более чем примерно maxPoints точек.
+    Точки делятся на корзины подряд идущих точек; в каждой корзине сохраняются первая
+    и последняя точки, а также минимум и максимум каждого столбца, поэтому вершина
+    траектории, точка падения и выбросы не теряются.
+    """
+    length = len(columns[0])
+    if length <= maxPoints:
+        return np.arange(length)
+
+    bucketCount = max(1, maxPoints // (2 + 2 * len(columns)))
+    size = -(-length // bucketCount)
+    starts = np.arange(0, length, size)
+    indices = [starts, np.minimum(starts + size, length) - 1]
+
+    full = length // size * size
+    offsets = np.arange(0, full, size)
+    for column in columns:
+        column = np.asarray(column)
+        blocks = column[:full].reshape(-1, size)
+        indices += [offsets + blocks.argmin(axis=1), offsets + blocks.argmax(axis=1)]
+        if full < length:
+            tail = column[full:]
+            indices.append([full + tail.argmin(), full + tail.argmax()])
+    return np.unique(np.concatenate(indices))
+
+
+class TrajectoryTableModel(QAbstractTableModel):
+    """Таблица значений траектории: ячейки форматируются по запросу прямо из столбцов траектории."""
+
+    headers = [
+        "X (м)", "Y (м)", "Z (м)", "t (с)", "Dist (м)", "V (м/с)",
+        "Mach", "Drop (м)", "Windage (м)", "Energy (Дж)"
+    ]
+
+    def __init__(self):
+        super().__init__()
+        self.columns = []
+        self.indices = np.zeros(0, dtype=int)
+
+    def columnCount(self, parent=None):
+        return len(self.headers)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole or not index.isValid():
+            return None
+        return self.text(index.row(), index.column())
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        return self.headers[section] if orientation == Qt.Horizontal else str(section + 1)
+
+    def rowCount(self, parent=None):
+        return self.indices.size
+
+    def setRows(self, trajectory, indices):
+        """Показывает точки траектории с номерами indices."""
+        self.beginResetModel()
+        self.columns = [trajectory.column(name) for name in Trajectory.pointFields]
+        self.indices = indices
+        self.endResetModel()
+
+    def text(self, row, column):
+        return f"{self.columns[column][self.indices[row]]:.2f}"
+
+
+class CalculationCancelled(Exception):
+    """Расчет отменен пользователем или вытеснен более новым запросом."""
+
+
+class WorkerSignals(QObject):
+    partial  = pyqtSignal(int, object)  # (поколение, новый участок траектории)
+    progress = pyqtSignal(int, str)     # (поколение, ход расчета)
+    finished = pyqtSignal(int, object)  # (поколение, результат)
+    failed   = pyqtSignal(int, str)     # (поколение, текст ошибки)
+
+
+class CalculationWorker(QRunnable):
+    """
+    Выполняет расчет job(worker) в пуле потоков. Все сигналы несут номер поколения запроса,
+    по которому окно отбрасывает ответы устаревших расчетов.
+    """
+
+    def __init__(self, generation, job, partialInterval=0.1):
+        """
+        :param generation: Номер поколения запроса
+        :param job: Функция расчета, получает сам worker для отчетов о ходе расчета
+        :param partialInterval: Минимальный интервал между передачами участков траектории (с)
+        """
+        super().__init__()
+        self.generation = generation
+        self.job = job
+        self.partialInterval = partialInterval
+        self.signals = WorkerSignals()
+        self.cancelled = False
+        self.sentPoints = 0
+        self.lastSent = 0.0
+
+    def cancel(self):
+        self.cancelled = True
+
+    def checkCancelled(self):
+        if self.cancelled:
+            raise CalculationCancelled()
+
+    def reportProgress(self, text):
+        self.checkCancelled()
+        self.signals.progress.emit(self.generation, text)
+
+    def reportTrajectory(self, trajectory):
+        """Передает окну точки траектории, рассчитанные после прошлой передачи."""
+        self.checkCancelled()
+        now = time.perf_counter()
+        if now - self.lastSent < self.partialInterval:
+            return
+        self.lastSent = now
+        self.signals.partial.emit(self.generation, trajectory[self.sentPoints:])
+        self.sentPoints = len(trajectory)
+        self.signals.progress.emit(self.generation, f"t = {trajectory.time[-1]:.2f} с, точек: {len(trajectory)}")
+
+    def run(self):
+        try:
+            result = self.job(self)
+        except CalculationCancelled:
+            return
+        except Exception as error:
+            self.signals.failed.emit(self.generation, str(error))
+            return
+        self.signals.finished.emit(self.generation, result)
+
 
 class BallisticCalculator(QWidget):
     def __init__(self):
@@ -27,9 +168,31 @@ class BallisticCalculator(QWidget):
         self.calculator = TrajectoryCalculator()
         self.params = None
         self.trajectory = None
+        self.trajectoryRaw = None
         self.targetTrajectory = None
         self.targetRadius = None
 
+        # Оси строятся один раз на тип графика и перерисовываются только при смене данных
+        self.axesCache = {}
+        self.drawnVersions = {}
+        self.dataVersion = 0
+        self.maxPlotPoints = 4000
+
+        # Расчеты выполняются по одному в фоновом потоке; generation - номер последнего запроса
+        self.threadPool = QThreadPool()
+        self.threadPool.setMaxThreadCount(1)
+        self.worker = None
+        self.generation = 0
+        self.onFinished = None
+        self.streamedTrajectory = None
+        self.streamLines = {}  # Тип графика -> (поколение, линия рассчитываемой траектории)
+        # Углы последнего подбора (кортеж): калькулятор каждого расчета получает их как
+        # прошлое решение AimSolver; расчеты идут по одному, замена кортежа атомарна
+        self.lastAimSolution = None
+
+        # Решения с теми же параметрами берутся из кэша, близкие - служат начальным приближением
+        self.solutionCache = SolutionCache(directory=os.path.join(appDirectory, "SolutionCache"))
+
         self.initUI()
         self.resize(900, 550)
 
@@ -63,7 +226,7 @@ class BallisticCalculator(QWidget):
         self.massInput = QLineEdit("0.01")
         self.areaInput = QLineEdit("0.00025")
         self.formFactorInput = QLineEdit("0.3")
-        self.modelSelect   = QComboBox(); self.modelSelect.addItems(["G1", "G7"])
+        self.modelSelect   = QComboBox(); self.modelSelect.addItems(self.calculator.dragTable.modelNames())
         bulletForm.addRow(QLabel("Параметры пули", font=boldFont))
         bulletForm.addRow("Масса (кг):", self.massInput)
         bulletForm.addRow("Площадь сечения (м²):", self.areaInput)
@@ -96,7 +259,9 @@ class BallisticCalculator(QWidget):
         self.maxDistanceInput  = QLineEdit("5000")
         self.integrationStep   = QLineEdit("0.1")
         self.displayStep       = QLineEdit("20")
-        self.methodSelect  = QComboBox(); self.methodSelect.addItems(["Euler", "RK4"])
+        self.shotCountInput    = QLineEdit("1000")
+        self.profileCheck      = QCheckBox("Замеры по фазам расчета")
+        self.methodSelect  = QComboBox(); self.methodSelect.addItems(["Euler", "RK4", "RK45"])
         self.methodSelect.setCurrentIndex(1)
         self.graphSelect   = QComboBox(); self.graphSelect.addItems(["3D", "X-Y", "X-Z", "Y-Z", "Таблица значений"])
         self.graphSelect.currentTextChanged.connect(self.updateGraph)
@@ -107,7 +272,9 @@ class BallisticCalculator(QWidget):
         calculationForm.addRow("Шаг интегрирования (с):", self.integrationStep)
         calculationForm.addRow("Шаг отображения (с):", self.displayStep)
         calculationForm.addRow("Метод:", self.methodSelect)
+        calculationForm.addRow("Выстрелов (рассеивание):", self.shotCountInput)
         calculationForm.addRow("График:", self.graphSelect)
+        calculationForm.addRow(self.profileCheck)
         self.tabs.addTab(calculationTab, "Расчет")
 
         self.saveTableButton = QPushButton("Сохранить таблицу")
@@ -130,11 +297,25 @@ class BallisticCalculator(QWidget):
         self.plotButton = QPushButton("Построить")
         self.aimButton  = QPushButton("Найти угол выстрела")
         self.plotButton.clicked.connect(self.calculateTrajectory)
+        self.dispersionButton = QPushButton("Рассеивание")
         self.aimButton.clicked.connect(self.calculateAim)
+        self.dispersionButton.clicked.connect(self.calculateDispersion)
         buttonsLayout.addWidget(self.plotButton)
         buttonsLayout.addWidget(self.aimButton)
+        buttonsLayout.addWidget(self.dispersionButton)
         controlLayout.addLayout(buttonsLayout)
 
+        progressLayout = QHBoxLayout()
+        self.progressBar = QProgressBar()
+        self.progressBar.setRange(0, 0)
+        self.progressBar.hide()
+        self.cancelButton = QPushButton("Отмена")
+        self.cancelButton.setEnabled(False)
+        self.cancelButton.clicked.connect(self.cancelCalculation)
+        progressLayout.addWidget(self.progressBar)
+        progressLayout.addWidget(self.cancelButton)
+        controlLayout.addLayout(progressLayout)
+
         self.aimResultLabel = QLabel("")
         self.aimResultLabel.setTextInteractionFlags(
             Qt.TextSelectableByMouse | Qt.TextSelectableByKeyboard
@@ -152,7 +333,9 @@ class BallisticCalculator(QWidget):
         self.figure = Figure(figsize=(5, 4))
         self.canvas = FigureCanvas(self.figure)
         plotLayout.addWidget(self.canvas)
-        self.table = QTableWidget()
+        self.tableModel = TrajectoryTableModel()
+        self.table = QTableView()
+        self.table.setModel(self.tableModel)
         self.table.setSelectionMode(QAbstractItemView.ExtendedSelection)
         self.table.setSelectionBehavior(QAbstractItemView.SelectItems)
         copyShortcut = QShortcut(QKeySequence("Ctrl+C"), self.table)
@@ -161,11 +344,6 @@ class BallisticCalculator(QWidget):
         copyAction = QAction("Копировать", self.table)
         copyAction.triggered.connect(self.copyTableSelection)
         self.table.addAction(copyAction)
-        self.table.setColumnCount(10)
-        self.table.setHorizontalHeaderLabels([
-            "X (м)", "Y (м)", "Z (м)", "t (с)", "Dist (м)", "V (м/с)",
-            "Mach", "Drop (м)", "Windage (м)", "Energy (Дж)"
-        ])
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.hide()
         plotLayout.addWidget(self.table)
@@ -206,89 +384,262 @@ class BallisticCalculator(QWidget):
             'model': model, 'method': method
         }
     
-    def calculateTrajectory(self):
-        params = self.collectParameters()
-        self.params = params
-        self.calculator.M = params['mass']
-        self.calculator.A = params['area']
-        self.calculator.formFactor = params['formFactor']
-        self.calculator.atmosphere = Atmosphere(params['pressure'], params['temp'], params['humidity'])
-        self.calculator.latitude = params['lat']
-        self.calculator.elevation = params['elev']
-
-        startTime = time.perf_counter()
-
-        self.trajectoryRaw = self.calculator.ballisticTrajectory(
-            params['v0'], params['horizAngle'], params['vertAngle'],
-            params['windSpeed'], params['windAngle'],
-            minVelocity=params['minV'], minAltitude=params['minH'],
-            maxDistance=params['maxDist'], dt=params['dt'],
-            model=params['model'], method=params['method']
+    def createCalculator(self, params, profiler=None):
+        """Создает отдельный калькулятор для расчета в фоновом потоке (общий self.calculator не меняется)."""
+        calculator = TrajectoryCalculator(
+            formFactor=params['formFactor'], pressure=params['pressure'], temperature=params['temp'],
+            humidity=params['humidity'], latitude=params['lat'], elevation=params['elev']
         )
-        self.trajectory = self.extractXYZ(self.trajectoryRaw)
-
-        endTime = time.perf_counter()
-        computeDuration = endTime - startTime
+        calculator.M = params['mass']
+        calculator.A = params['area']
+        calculator.profiler = profiler
+        return calculator
 
+    def calculateTrajectory(self):
+        params = self.collectParameters()
+        profiler = Profiler() if self.profileCheck.isChecked() else None
         radius = float(self.targetRadiusInput.text())
-        def makeExpr(expr):
-            t = symbols('t')
-            return lambdify(t, sympify(expr), modules=['numpy'])
-        xFunc, yFunc, zFunc = map(makeExpr, [self.targetXExpr.text(), self.targetYExpr.text(), self.targetZExpr.text()])
-        def targetFunc(t):
-            return float(xFunc(t)), float(yFunc(t)), float(zFunc(t))
-
-        times = np.arange(0, self.trajectoryRaw[-1].time+params['dt'], params['dt'])
-        self.targetTrajectory = np.array([targetFunc(t) for t in times])
-        self.targetRadius = radius
-
-        horiz = params['horizAngle']
-        vert = params['vertAngle']
-        finalTime = self.trajectoryRaw[-1].time
-        self.aimResultLabel.setText(f"Гор. угол: {horiz:.2f}°  Вер. угол: {vert:.2f}°\n"
-                                    f"Время: {finalTime:.2f} с  |  Время расчета: {computeDuration:.2f} с")
-
-        self.updateGraph()
+        targetPath = self.targetPath()
+
+        def job(worker):
+            # С замерами по фазам расчет выполняется заново, иначе замерять нечего
+            cached = None if profiler is not None else self.solutionCache.get(SolutionCache.key('trajectory', params))
+            if cached is not None:
+                return cached[0], 0.0, True
+
+            calculator = self.createCalculator(params, profiler)
+            startTime = time.perf_counter()
+            trajectory = calculator.ballisticTrajectory(
+                params['v0'], params['horizAngle'], params['vertAngle'],
+                params['windSpeed'], params['windAngle'],
+                minVelocity=params['minV'], minAltitude=params['minH'],
+                maxDistance=params['maxDist'], dt=params['dt'],
+                model=params['model'], method=params['method'],
+                progressCallback=worker.reportTrajectory
+            )
+            computeDuration = time.perf_counter() - startTime
+            self.solutionCache.put('trajectory', params, trajectory)
+            return trajectory, computeDuration, False
+
+        def show(result):
+            trajectory, computeDuration, fromCache = result
+            times = np.arange(0, trajectory[-1].time+params['dt'], params['dt'])
+
+            horiz = params['horizAngle']
+            vert = params['vertAngle']
+            finalTime = trajectory[-1].time
+            self.aimResultLabel.setText(f"Гор. угол: {horiz:.2f}°  Вер. угол: {vert:.2f}°\n"
+                                        f"Время: {finalTime:.2f} с  |  Время расчета: {computeDuration:.2f} с"
+                                        + self.calculationNote(profiler, fromCache))
+
+            self.setTrajectory(trajectory, targetPath.evaluate(times).T, radius)
+
+        self.startCalculation(params, job, show)
 
     def calculateAim(self):
         params = self.collectParameters()
+        profiler = Profiler() if self.profileCheck.isChecked() else None
+        radius = float(self.targetRadiusInput.text())
+        targetPath = self.targetPath()
+
+        # Углы выстрела по параметрам стрельбы не влияют на подбор угла, а цель влияет
+        aimParams = {name: value for name, value in params.items() if name not in ('horizAngle', 'vertAngle')}
+        aimParams.update(zip(('targetX', 'targetY', 'targetZ'), targetPath.expressions), targetRadius=radius)
+
+        def job(worker):
+            cached = None if profiler is not None else self.solutionCache.get(SolutionCache.key('aim', aimParams))
+            if cached is not None:
+                trajectory, values = cached
+                return values['horizAngle'], values['vertAngle'], trajectory, values['impactTime'], 0.0, True
+
+            calculator = self.createCalculator(params)
+            startTime = time.perf_counter()
+
+            # Начальное приближение - решение для ближайших параметров по той же цели,
+            # а если его нет - таблица стрельбы (строится один раз на профиль)
+            nearest = self.solutionCache.nearest(
+                'aim', aimParams, exact=('targetX', 'targetY', 'targetZ', 'model', 'method')
+            )
+            if nearest is not None:
+                initialAngles = (nearest['horizAngle'], nearest['vertAngle'])
+            else:
+                worker.reportProgress("Таблица стрельбы...")
+                firingTable = FiringTable.buildOrLoad(
+                    calculator, params['v0'], directory=os.path.join(appDirectory, "FiringTables"),
+                    windSpeed=params['windSpeed'], windAngle=params['windAngle'],
+                    angleStep=0.5, dt=0.05, minVelocity=params['minV'], model=params['model']
+                )
+                x0, y0, z0 = targetPath(0)
+                initialAngles = firingTable.aimAngles(x0, z0, lateral=y0)
+
+            calculator.profiler = profiler
+            calculator.aimSolver.lastSolution = self.lastAimSolution
+
+            horiz, vert, trajectory, impactTime = calculator.findAimAngles(
+                params['v0'], params['windSpeed'], params['windAngle'],
+                targetPath, radius,
+                minVelocity=params['minV'], minAltitude=params['minH'],
+                maxDistance=params['maxDist'], dt=params['dt'],
+                model=params['model'], method=params['method'],
+                solver='secant', initialAngles=initialAngles,
+                progressCallback=lambda trial, angles: worker.reportProgress(
+                    f"Проба {trial}: гор. {angles[0]:.3f}°, вер. {angles[1]:.3f}°"
+                )
+            )
+            computeDuration = time.perf_counter() - startTime
+            self.lastAimSolution = calculator.aimSolver.lastSolution
+            trajectory = trajectory.upTo(impactTime)
+            self.solutionCache.put('aim', aimParams, trajectory,
+                                   {'horizAngle': horiz, 'vertAngle': vert, 'impactTime': impactTime})
+            return horiz, vert, trajectory, impactTime, computeDuration, False
+
+        def show(result):
+            horiz, vert, trajectory, impactTime, computeDuration, fromCache = result
+            times = np.arange(0, impactTime+params['dt'], params['dt'])
+            self.setTrajectory(trajectory, targetPath.evaluate(times).T, radius)
+            self.aimResultLabel.setText(f"Гор. угол: {horiz:.2f}°  Вер. угол: {vert:.2f}°\n"
+                                        f"Время: {impactTime:.2f} с  |  Время расчета: {computeDuration:.2f} с"
+                                        + self.calculationNote(profiler, fromCache))
+
+        self.startCalculation(params, job, show)
+
+    def calculateDispersion(self):
+        params = self.collectParameters()
+        radius = float(self.targetRadiusInput.text())
+        shotCount = int(self.shotCountInput.text())
+        targetX, targetY, targetZ = self.targetPath()(0)
+
+        def job(worker):
+            calculator = self.createCalculator(params)
+            startTime = time.perf_counter()
+            worker.reportProgress(f"Моделирование {shotCount} выстрелов...")
+            # Ход расчета и проверка отмены - после каждой пачки выстрелов
+            result = dispersionAnalysis(
+                calculator,
+                params['v0'], params['horizAngle'], params['vertAngle'],
+                params['windSpeed'], params['windAngle'],
+                targetDistance=np.hypot(targetX, targetY), targetY=targetY, targetZ=targetZ,
+                targetRadius=radius, shotCount=shotCount,
+                dt=params['dt'], minVelocity=params['minV'], minAltitude=params['minH'],
+                model=params['model'], method=params['method'] if params['method'] != 'RK45' else 'RK4',
+                progressCallback=lambda done, total: worker.reportProgress(
+                    f"Моделирование: {done} из {total} выстрелов"
+                )
+            )
+            return result, time.perf_counter() - startTime
+
+        self.startCalculation(params, job, lambda result: self.showDispersion(result[0], radius, result[1]))
+
+    def showDispersion(self, result, radius, computeDuration):
+        self.table.hide()
+        self.canvas.show()
+        ax = self.showAxes("Рассеивание")
+        ax.clear()
+        ax.scatter(result.impactY, result.impactZ, s=4, alpha=0.4, label="Точки попадания")
+        ax.add_patch(Circle((result.targetY, result.targetZ), radius, alpha=0.3, color='magenta', label="Цель"))
+        ax.scatter([result.meanY], [result.meanZ], color='red', marker='+', s=100, label="СТП")
+        ax.set_xlabel("Боковой снос (м)")
+        ax.set_ylabel("Высота (м)")
+        ax.set_title(f"Рассеивание на дальности {result.targetDistance:.0f} м")
+        ax.set_aspect('equal', adjustable='datalim')
+        ax.grid(True)
+        ax.legend()
+        self.canvas.draw_idle()
+
+        low, median, high = result.energyPercentiles
+        self.aimResultLabel.setText(f"CEP: {result.cep:.2f} м  |  Вероятность попадания: {result.hitProbability:.1%}\n"
+                                    f"Долетело: {result.reachedCount}/{result.shotCount}  |  СКО: {result.stdY:.2f} / {result.stdZ:.2f} м\n"
+                                    f"Энергия: {median:.0f} Дж (5%: {low:.0f}, 95%: {high:.0f})\n"
+                                    f"Время расчета: {computeDuration:.2f} с")
+
+    def calculationNote(self, profiler, fromCache):
+        """Дополнение к строке "Время расчета": источник решения и замеры по фазам."""
+        if fromCache:
+            return " (из кэша)"
+        return f"\n{profiler}" if profiler is not None else ""
+
+    def startCalculation(self, params, job, onFinished):
+        """
+        Запускает job(worker) в фоновом потоке, а onFinished(результат) - в потоке окна.
+        Текущий расчет отменяется, ожидающие в очереди удаляются, а их поздние ответы
+        отбрасываются по номеру поколения.
+        """
+        if self.worker is not None:
+            self.worker.cancel()
+        self.threadPool.clear()
+
+        self.generation += 1
         self.params = params
-        self.calculator.M = params['mass']
-        self.calculator.A = params['area']
-        self.calculator.formFactor = params['formFactor']
-        self.calculator.atmosphere = Atmosphere(params['pressure'], params['temp'], params['humidity'])
-        self.calculator.latitude = params['lat']
-        self.calculator.elevation = params['elev']
+        self.onFinished = onFinished
+        self.streamedTrajectory = None
+
+        self.worker = CalculationWorker(self.generation, job)
+        self.worker.signals.partial.connect(self.showPartialTrajectory)
+        self.worker.signals.progress.connect(self.showProgress)
+        self.worker.signals.finished.connect(self.finishCalculation)
+        self.worker.signals.failed.connect(self.failCalculation)
+        self.progressBar.show()
+        self.cancelButton.setEnabled(True)
+        self.threadPool.start(self.worker)
+
+    def cancelCalculation(self):
+        if self.worker is None:
+            return
+        self.worker.cancel()
+        self.threadPool.clear()
+        self.generation += 1
+        self.stopProgress()
+        self.aimResultLabel.setText("Расчет отменен")
+
+    def finishCalculation(self, generation, result):
+        if generation != self.generation:
+            return
+        self.stopProgress()
+        self.onFinished(result)
 
-        radius = float(self.targetRadiusInput.text())
-        def makeExpr(expr):
-            t = symbols('t')
-            return lambdify(t, sympify(expr), modules=['numpy'])
-        xFunc, yFunc, zFunc = map(makeExpr, [self.targetXExpr.text(), self.targetYExpr.text(), self.targetZExpr.text()])
-        def targetFunc(t):
-            return float(xFunc(t)), float(yFunc(t)), float(zFunc(t))
-        
-        startTime = time.perf_counter()
-
-        horiz, vert, trajectory, impactTime = self.calculator.findAimAngles(
-            params['v0'], params['windSpeed'], params['windAngle'],
-            targetFunc, radius,
-            minVelocity=params['minV'], minAltitude=params['minH'],
-            maxDistance=params['maxDist'], dt=params['dt'],
-            model=params['model'], method=params['method']
-        )
-        self.trajectoryRaw = [p for p in trajectory if p.time <= impactTime]
-        self.trajectory = self.extractXYZ(self.trajectoryRaw)
+    def failCalculation(self, generation, message):
+        if generation != self.generation:
+            return
+        self.stopProgress()
+        self.aimResultLabel.setText(f"Ошибка расчета: {message}")
 
-        endTime = time.perf_counter()
-        computeDuration = endTime - startTime
+    def stopProgress(self):
+        self.worker = None
+        self.progressBar.hide()
+        self.cancelButton.setEnabled(False)
 
-        times = np.arange(0, impactTime+params['dt'], params['dt'])
-        self.targetTrajectory = np.array([targetFunc(t) for t in times])
-        self.targetRadius = radius
+    def showPartialTrajectory(self, generation, chunk):
+        """Дорисовывает траекторию по мере расчета."""
+        if generation != self.generation:
+            return
+        if self.streamedTrajectory is None:
+            self.streamedTrajectory = Trajectory(len(chunk))
+        self.streamedTrajectory.extend(chunk)
+        self.setTrajectory(self.streamedTrajectory)
+
+    def setTrajectory(self, trajectory, targetTrajectory=None, targetRadius=None):
+        """Запоминает новую траекторию (и траекторию цели) и перерисовывает график."""
+        self.trajectoryRaw = trajectory
+        self.trajectory = self.extractXYZ(trajectory)
+        self.targetTrajectory = targetTrajectory
+        self.targetRadius = targetRadius
+        self.dataVersion += 1
         self.updateGraph()
-        self.aimResultLabel.setText(f"Гор. угол: {horiz:.2f}°  Вер. угол: {vert:.2f}°\n"
-                                    f"Время: {impactTime:.2f} с  |  Время расчета: {computeDuration:.2f} с")
+
+    def showProgress(self, generation, text):
+        if generation == self.generation:
+            self.aimResultLabel.setText(text)
+
+    def targetPath(self):
+        """Возвращает траекторию цели (TargetPath) по выражениям x(t), y(t), z(t)."""
+        return TargetPath(self.targetXExpr.text(), self.targetYExpr.text(), self.targetZExpr.text())
+
+    def closeEvent(self, event):
+        if self.worker is not None:
+            self.worker.cancel()
+        self.threadPool.clear()
+        self.threadPool.waitForDone()
+        super().closeEvent(event)
 
     def annotateEnd(self, ax, x, y, z=None, label='', color='black'):
         if z is None:
@@ -299,55 +650,51 @@ class BallisticCalculator(QWidget):
             ax.text(x[-1], y[-1], z[-1], f"{label}", color=color)
     
     def copyTableSelection(self):
-        ranges = self.table.selectedRanges()
-        if not ranges:
+        selected = self.table.selectionModel().selectedIndexes()
+        if not selected:
             return
-        r = ranges[0]
+        selectedRows = [index.row() for index in selected]
+        selectedCols = [index.column() for index in selected]
 
         visibleCols = [
-            j for j in range(r.leftColumn(), r.rightColumn()+1)
+            j for j in range(min(selectedCols), max(selectedCols)+1)
             if not self.table.isColumnHidden(j)
         ]
 
         rows = []
-        for i in range(r.topRow(), r.bottomRow()+1):
-            cols = []
-            for j in visibleCols:
-                item = self.table.item(i, j)
-                cols.append(item.text() if item else "")
-            rows.append("\t".join(cols))
+        for i in range(min(selectedRows), max(selectedRows)+1):
+            rows.append("\t".join(self.tableModel.text(i, j) for j in visibleCols))
 
         text = "\n".join(rows)
         QGuiApplication.clipboard().setText(text)
 
     def extractXYZ(self, trajectory):
-        x = np.array([p.x for p in trajectory])
-        y = np.array([p.y for p in trajectory])
-        z = np.array([p.z for p in trajectory])
-        return x, y, z
+        return trajectory.x, trajectory.y, trajectory.z
 
     def getStyle(self):
         key = f"{self.modelSelect.currentText()}_{self.methodSelect.currentText()}"
-        colors = {"G1_Euler": 'b', "G7_Euler": 'r', "G1_RK4": 'cyan', "G7_RK4": 'orange'}
+        colors = {"G1_Euler": 'b', "G7_Euler": 'r', "G1_RK4": 'cyan', "G7_RK4": 'orange', "G1_RK45": 'green', "G7_RK45": 'purple'}
         style = '--' if 'Euler' in key else '-'
         return colors.get(key, 'black'), style
 
+    def showAxes(self, key, projection=None):
+        """Показывает оси графика key (создаются один раз), остальные оси скрываются."""
+        ax = self.axesCache.get(key)
+        if ax is None:
+            ax = self.figure.add_subplot(111, projection=projection, label=key)
+            self.axesCache[key] = ax
+        for other in self.axesCache.values():
+            other.set_visible(other is ax)
+        return ax
+
     def updateGraph(self):
         if not self.trajectory:
             return
-        
-        self.figure.clf()
-        self.canvas.hide() 
-        self.table.hide()
 
         graphType = self.graphSelect.currentText()
-        x, y, z = self.trajectory
-        targetTrajectory = self.targetTrajectory
-        targetRadius = self.targetRadius
-
-        color, style = self.getStyle()
 
         if graphType == "Таблица значений":
+            self.canvas.hide()
             self.table.show()
 
             self.table.setColumnHidden(4, True)
@@ -360,61 +707,87 @@ class BallisticCalculator(QWidget):
                 displayDt = self.params['dt']
 
             step = max(1, int(round(displayDt / self.params['dt'])))
-            sliced = list(self.trajectoryRaw[::step])
-            
-            lastPoint = self.trajectoryRaw[-1]
-            if sliced[-1].time != lastPoint.time:
-                sliced.append(lastPoint)
-
-            maxIndex = max(range(len(self.trajectoryRaw)), key=lambda i: self.trajectoryRaw[i].z)
-            maxPoint = self.trajectoryRaw[maxIndex]
-
-            if all(abs(p.time - maxPoint.time) > 1e-6 for p in sliced):
-                insertPos = next(i for i,p in enumerate(sliced) if p.time > maxPoint.time)
-                sliced.insert(insertPos, maxPoint)
-
-            self.table.setRowCount(len(sliced))
-            for i, p in enumerate(sliced):
-                for j, val in enumerate((p.x, p.y, p.z, p.time, p.distance, p.velocity, p.mach, p.drop, p.windage, p.energy)):
-                    self.table.setItem(i, j, QTableWidgetItem(f"{val:.2f}"))
+            indices = np.arange(0, len(self.trajectoryRaw), step)
+
+            lastIndex = len(self.trajectoryRaw) - 1
+            if indices[-1] != lastIndex:
+                indices = np.append(indices, lastIndex)
+
+            times = self.trajectoryRaw.time
+            maxIndex = int(np.argmax(self.trajectoryRaw.z))
+
+            if np.all(np.abs(times[indices] - times[maxIndex]) > 1e-6):
+                indices = np.sort(np.append(indices, maxIndex))
+
+            self.tableModel.setRows(self.trajectoryRaw, indices)
             return
-        
+
+        self.table.hide()
         self.canvas.show()
-        ax = (self.figure.add_subplot(111,projection='3d') if graphType=="3D" else self.figure.add_subplot(111))
+        ax = self.showAxes(graphType, projection='3d' if graphType == "3D" else None)
+
+        color, style = self.getStyle()
+        if self.streamedTrajectory is not None and self.trajectoryRaw is self.streamedTrajectory:
+            self.updateStreamedGraph(ax, graphType, color, style)
+            self.canvas.draw_idle()
+            return
+
+        # Оси перерисовываются, только если изменились данные или стиль линии
+        version = (self.dataVersion, color, style)
+        if self.drawnVersions.get(graphType) != version:
+            ax.clear()
+            self.drawGraph(ax, graphType, color, style)
+            self.drawnVersions[graphType] = version
+        self.canvas.draw_idle()
+
+    def drawGraph(self, ax, graphType, color, style, annotate=True):
+        """
+        Строит график траектории и цели; длинные линии прореживаются с сохранением экстремумов.
+        Возвращает линию траектории.
+        """
+        indices = decimationIndices(self.trajectory, self.maxPlotPoints)
+        x, y, z = (column[indices] for column in self.trajectory)
+        targetRadius = self.targetRadius
+        label = f"{self.modelSelect.currentText()} {self.methodSelect.currentText()}"
 
         if graphType == "3D":
-            ax.plot(x, y, z, label=f"{self.modelSelect.currentText()} {self.methodSelect.currentText()}", linestyle=style, color=color)
-            self.annotateEnd(ax, x, y, z, label="", color=color)
+            line, = ax.plot(x, y, z, label=label, linestyle=style, color=color)
+            if annotate:
+                self.annotateEnd(ax, x, y, z, label="", color=color)
             ax.set_xlabel("Дальность (м)")
             ax.set_ylabel("Боковой снос (м)")
             ax.set_zlabel("Высота (м)")
             ax.set_title("3D траектория")
 
         elif graphType == "X-Y":
-            ax.plot(x, y, label=f"{self.modelSelect.currentText()} {self.methodSelect.currentText()}", linestyle=style, color=color)
-            self.annotateEnd(ax, x, y, label="", color=color)
+            line, = ax.plot(x, y, label=label, linestyle=style, color=color)
+            if annotate:
+                self.annotateEnd(ax, x, y, label="", color=color)
             ax.set_xlabel("Дальность (м)")
             ax.set_ylabel("Боковой снос (м)")
             ax.set_title("X-Y: Дальность vs Боковой снос")
 
         elif graphType == "X-Z":
-            ax.plot(x, z, label=f"{self.modelSelect.currentText()} {self.methodSelect.currentText()}", linestyle=style, color=color)
-            self.annotateEnd(ax, x, z, label="", color=color)
+            line, = ax.plot(x, z, label=label, linestyle=style, color=color)
+            if annotate:
+                self.annotateEnd(ax, x, z, label="", color=color)
             ax.set_xlabel("Дальность (м)")
             ax.set_ylabel("Высота (м)")
             ax.set_title("X-Z: Дальность vs Высота")
 
         elif graphType == "Y-Z":
-            ax.plot(y, z, label=f"{self.modelSelect.currentText()} {self.methodSelect.currentText()}", linestyle=style, color=color)
-            self.annotateEnd(ax, y, z, label="", color=color)
+            line, = ax.plot(y, z, label=label, linestyle=style, color=color)
+            if annotate:
+                self.annotateEnd(ax, y, z, label="", color=color)
             ax.set_xlabel("Боковой снос (м)")
             ax.set_ylabel("Высота (м)")
             ax.set_title("Y-Z: Боковой снос vs Высота")
 
         ax.grid(True) if graphType!="3D" else None
 
-        if targetTrajectory is not None:
-            xt, yt, zt = self.targetTrajectory.T
+        if self.targetTrajectory is not None:
+            targetColumns = self.targetTrajectory.T
+            xt, yt, zt = targetColumns[:, decimationIndices(targetColumns, self.maxPlotPoints)]
 
             if graphType == "3D":
                 ax.plot(xt, yt, zt, 'm--', label="Цель")
@@ -440,17 +813,39 @@ class BallisticCalculator(QWidget):
                 ax.add_patch(circle)
   
         ax.legend()
-        self.canvas.draw()
+        return line
+
+    def updateStreamedGraph(self, ax, graphType, color, style):
+        """
+        Дорисовывает рассчитываемую траекторию: оси строятся на первом участке,
+        дальше у линии траектории заменяются только данные.
+        """
+        stream = self.streamLines.get(graphType)
+        if stream is None or stream[0] != self.generation:
+            ax.clear()
+            self.streamLines[graphType] = (self.generation, self.drawGraph(ax, graphType, color, style, annotate=False))
+        else:
+            line = stream[1]
+            indices = decimationIndices(self.trajectory, self.maxPlotPoints)
+            x, y, z = (column[indices] for column in self.trajectory)
+            if graphType == "3D":
+                line.set_data_3d(x, y, z)
+                ax.auto_scale_xyz(x, y, z, had_data=False)
+            else:
+                line.set_data(*{"X-Y": (x, y), "X-Z": (x, z), "Y-Z": (y, z)}[graphType])
+                ax.relim()
+                ax.autoscale_view()
+        # После расчета оси перестраиваются полностью
+        self.drawnVersions[graphType] = None
 
     def saveTable(self):
         path, _ = QFileDialog.getSaveFileName(self, "Сохранить таблицу", "trajectory.csv", "CSV Files (*.csv)")
         if path:
             with open(path, 'w', encoding='utf-8') as f:
-                headers = [self.table.horizontalHeaderItem(col).text() for col in range(self.table.columnCount())]
-                f.write(','.join(headers) + '\n')
+                f.write(','.join(self.tableModel.headers) + '\n')
 
-                for row in range(self.table.rowCount()):
-                    values = [self.table.item(row,col).text() for col in range(self.table.columnCount())]
+                for row in range(self.tableModel.rowCount()):
+                    values = [self.tableModel.text(row, col) for col in range(self.tableModel.columnCount())]
                     f.write(','.join(values) + '\n')
 
 
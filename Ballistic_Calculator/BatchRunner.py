@@ -0,0 +1,246 @@
+"""
+Пакетный расчет траекторий без графического интерфейса.
+
+Сценарии читаются из CSV или JSON (одна строка - один выстрел, поля как в
+BallisticCalculator.collectParameters, пропущенные поля берутся по умолчанию),
+считаются пачками в пуле процессов и записываются по мере готовности в CSV
+или в каталог столбцовых файлов .npz (по файлу на пачку).
+
+    python BatchRunner.py scenarios.csv -o results.csv --workers 4
+    python BatchRunner.py scenarios.json -o results --format npz --trajectories
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from Calculations.Atmosphere import Atmosphere
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+# Значения по умолчанию совпадают с начальными значениями полей формы
+defaultParameters = {
+    'v0': 740.0, 'windSpeed': 10.0, 'windAngle': -30.0, 'horizAngle': 0.0, 'vertAngle': 15.0,
+    'mass': 0.01, 'area': 0.00025, 'formFactor': 0.3,
+    'pressure': 101325.0, 'temp': 15.0, 'humidity': 0.78,
+    'lat': 55.75, 'elev': 200.0,
+    'minV': 30.0, 'minH': -10.0, 'maxDist': 5000.0, 'dt': 0.1,
+    'model': 'G1', 'method': 'RK4',
+}
+textParameters = ('model', 'method')
+
+# Сценарии с одинаковыми значениями этих полей считаются одним пакетным расчетом
+groupParameters = ('mass', 'area', 'lat', 'elev', 'minV', 'minH', 'maxDist', 'dt', 'model', 'method')
+
+resultFields = ('x', 'y', 'z', 'time', 'distance', 'velocity', 'mach', 'energy')
+
+
+def readScenarios(path):
+    """Читает сценарии из CSV или JSON (список объектов или {"scenarios": [...]})."""
+    if path.lower().endswith('.json'):
+        with open(path, encoding='utf-8') as f:
+            rows = json.load(f)
+        if isinstance(rows, dict):
+            rows = rows['scenarios']
+    else:
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+
+    scenarios = []
+    for number, row in enumerate(rows):
+        unknown = set(row) - set(defaultParameters) - {'id'}
+        if unknown:
+            raise ValueError(f"Unknown scenario fields: {', '.join(sorted(unknown))}")
+
+        scenario = dict(defaultParameters, id=str(row.get('id', number)))
+        for key, value in row.items():
+            if key != 'id' and value not in ('', None):
+                scenario[key] = str(value) if key in textParameters else float(value)
+        if scenario['method'] not in ('Euler', 'RK4', 'RK45'):
+            raise ValueError(f"Unknown integration method in scenario {scenario['id']}: choose 'Euler', 'RK4' or 'RK45'")
+        scenarios.append(scenario)
+    return scenarios
+
+
+def solveChunk(scenarios, keepTrajectories=False):
+    """
+    Рассчитывает пачку сценариев. Функция верхнего уровня, чтобы ее можно было выполнять
+    в пуле процессов. Сценарии с одинаковыми groupParameters методами Euler и RK4 считаются
+    одним пакетным расчетом, атмосфера и форм-фактор задаются отдельно для каждого выстрела.
+    Сценарии RK45 считаются по одному.
+
+    :return: (конечные точки по полям resultFields, число точек, траектории или None)
+    """
+    count = len(scenarios)
+    final = {name: np.full(count, np.nan) for name in resultFields}
+    points = np.zeros(count, dtype=int)
+    trajectories = [None] * count if keepTrajectories else None
+
+    groups = {}
+    for index, scenario in enumerate(scenarios):
+        groups.setdefault(tuple(scenario[name] for name in groupParameters), []).append(index)
+
+    calculator = TrajectoryCalculator()
+    for key, indices in groups.items():
+        setup = dict(zip(groupParameters, key))
+        calculator.M = setup['mass']
+        calculator.A = setup['area']
+        calculator.latitude = setup['lat']
+        calculator.elevation = setup['elev']
+        options = {
+            'dt': setup['dt'], 'minVelocity': setup['minV'], 'minAltitude': setup['minH'],
+            'maxDistance': setup['maxDist'], 'model': setup['model'], 'method': setup['method'],
+        }
+
+        def column(name):
+            return np.array([scenarios[index][name] for index in indices], dtype=float)
+
+        if setup['method'] == 'RK45':
+            for index in indices:
+                scenario = scenarios[index]
+                calculator.formFactor = scenario['formFactor']
+                calculator.atmosphere = Atmosphere(scenario['pressure'], scenario['temp'], scenario['humidity'])
+                trajectory = calculator.ballisticTrajectory(
+                    scenario['v0'], scenario['horizAngle'], scenario['vertAngle'],
+                    scenario['windSpeed'], scenario['windAngle'], **options
+                )
+                for name in resultFields:
+                    final[name][index] = trajectory.column(name)[-1]
+                points[index] = len(trajectory)
+                if keepTrajectories:
+                    trajectories[index] = trajectory
+            continue
+
+        # Одинаковая атмосфера - расчет по таблице высот, иначе атмосфера задается массивами
+        pressure, temperature, humidity = column('pressure'), column('temp'), column('humidity')
+        atmosphere = Atmosphere(pressure, temperature, humidity)
+        if np.all(pressure == pressure[0]) and np.all(temperature == temperature[0]) and np.all(humidity == humidity[0]):
+            calculator.atmosphere = Atmosphere(pressure[0], temperature[0], humidity[0])
+            atmosphere = None
+
+        result = calculator.ballisticTrajectoryBatch(
+            column('v0'), column('horizAngle'), column('vertAngle'),
+            column('windSpeed'), column('windAngle'),
+            keepTrajectories=keepTrajectories,
+            formFactor=column('formFactor'), atmosphere=atmosphere, **options
+        )
+        for name in resultFields:
+            final[name][indices] = result.final[name]
+        points[indices] = result.lengths
+        if keepTrajectories:
+            for shot, index in enumerate(indices):
+                trajectories[index] = result.shot(shot)
+
+    return final, points, trajectories
+
+
+class CsvResultWriter:
+    """Дописывает результаты в CSV: параметры сценария, конечная точка и число точек."""
+
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(['id', *defaultParameters, *resultFields, 'points'])
+
+    def close(self):
+        self.file.close()
+
+    def write(self, scenarios, final, points, trajectories):
+        for index, scenario in enumerate(scenarios):
+            self.writer.writerow([
+                scenario['id'], *(scenario[name] for name in defaultParameters),
+                *(repr(float(final[name][index])) for name in resultFields), int(points[index])
+            ])
+        self.file.flush()
+
+
+class NpzResultWriter:
+    """
+    Сохраняет каждую пачку в отдельный файл part-NNNNN.npz каталога directory: столбцы
+    параметров и конечных точек, а при сохранении траекторий - их столбцы подряд
+    (trajectoryX, trajectoryTime, ...) и смещения начала каждой траектории (offsets).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.part = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def close(self):
+        pass
+
+    def write(self, scenarios, final, points, trajectories):
+        columns = {'id': np.array([scenario['id'] for scenario in scenarios])}
+        for name in defaultParameters:
+            columns[name] = np.array([scenario[name] for scenario in scenarios])
+        columns.update(final)
+        columns['points'] = points
+
+        if trajectories is not None:
+            columns['offsets'] = np.concatenate(([0], np.cumsum(points)))
+            for name in resultFields:
+                columns['trajectory' + name[0].upper() + name[1:]] = np.concatenate([
+                    trajectory.column(name) for trajectory in trajectories
+                ])
+
+        np.savez(os.path.join(self.directory, f"part-{self.part:05d}.npz"), **columns)
+        self.part += 1
+
+
+def runScenarios(scenarios, writer, workers=None, chunkSize=500, keepTrajectories=False, log=None):
+    """
+    Считает сценарии пачками по chunkSize в ProcessPoolExecutor (workers=1 - в текущем
+    процессе) и передает результаты writer в исходном порядке по мере готовности.
+    """
+    chunks = [scenarios[start:start + chunkSize] for start in range(0, len(scenarios), chunkSize)]
+    workers = os.cpu_count() if workers is None else workers
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(chunks))) if workers > 1 and len(chunks) > 1 else None
+
+    startTime = time.perf_counter()
+    done = 0
+    try:
+        results = (executor.map(solveChunk, chunks, [keepTrajectories] * len(chunks)) if executor is not None
+                   else (solveChunk(chunk, keepTrajectories) for chunk in chunks))
+        for chunk, result in zip(chunks, results):
+            writer.write(chunk, *result)
+            done += len(chunk)
+            if log is not None:
+                log(f"{done}/{len(scenarios)} сценариев, {time.perf_counter() - startTime:.1f} с")
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Пакетный расчет траекторий по файлу сценариев")
+    parser.add_argument('scenarios', help="CSV или JSON со сценариями")
+    parser.add_argument('-o', '--output', required=True, help="CSV-файл или каталог для .npz")
+    parser.add_argument('--format', choices=('csv', 'npz'), help="Формат результата (по расширению output)")
+    parser.add_argument('--workers', type=int, default=None, help="Число процессов (по умолчанию - число ядер)")
+    parser.add_argument('--chunk-size', dest='chunkSize', type=int, default=500, help="Сценариев в пачке")
+    parser.add_argument('--trajectories', action='store_true', help="Сохранять траектории целиком (только npz)")
+    parser.add_argument('--quiet', action='store_true', help="Не выводить ход расчета")
+    args = parser.parse_args(arguments)
+
+    outputFormat = args.format or ('csv' if args.output.lower().endswith('.csv') else 'npz')
+    if args.trajectories and outputFormat != 'npz':
+        parser.error("--trajectories requires the npz format")
+
+    scenarios = readScenarios(args.scenarios)
+    writer = CsvResultWriter(args.output) if outputFormat == 'csv' else NpzResultWriter(args.output)
+    try:
+        runScenarios(
+            scenarios, writer, workers=args.workers, chunkSize=args.chunkSize,
+            keepTrajectories=args.trajectories,
+            log=None if args.quiet else lambda text: print(text, file=sys.stderr)
+        )
+    finally:
+        writer.close()
+
+
+if __name__ == "__main__":
+    main()
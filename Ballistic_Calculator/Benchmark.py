@@ -0,0 +1,223 @@
+"""
+Замеры скорости и точности баллистического движка (Calculations/).
+
+Для каждого режима (Euler, RK4, RK45, пакетный расчет, подбор угла) измеряются время
+расчета, число шагов и вычислений правой части, а точность оценивается по отклонению
+точки падения и времени полета от эталонного расчета RK45 с жесткими допусками.
+Отчет сохраняется в JSON; при сравнении с прошлым отчетом (--baseline) выводятся
+ухудшения скорости и точности, а код возврата равен 1.
+
+    python Benchmark.py -o benchmark.json
+    python Benchmark.py --quick --baseline benchmark.json
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from Calculations.TargetPath import TargetPath
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+# Условия выстрела совпадают с начальными значениями полей формы
+shot = {'velocity': 740.0, 'horizAngle': 0.0, 'vertAngle': 15.0, 'windSpeed': 10.0, 'windAngle': -30.0}
+limits = {'maxTime': 100, 'minVelocity': 30, 'minAltitude': -10, 'maxDistance': 5000}
+target = ('969', 'sin(t)', 'cos(t)')
+
+
+def makeCalculator():
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    calculator.evaluations = 0
+    acceleration, batchAcceleration = calculator.acceleration, calculator.batchAcceleration
+    accelerationFunction = calculator.accelerationFunction
+
+    # Счетчики вычислений правой части (для пакета - по числу выстрелов)
+    def countedAcceleration(*args):
+        calculator.evaluations += 1
+        return acceleration(*args)
+
+    def countedBatchAcceleration(vx, *args):
+        calculator.evaluations += np.size(vx)
+        return batchAcceleration(vx, *args)
+
+    def countedAccelerationFunction(*args):
+        function = accelerationFunction(*args)
+
+        def countedFunction(*state):
+            calculator.evaluations += 1
+            return function(*state)
+        return countedFunction
+
+    calculator.acceleration = countedAcceleration
+    calculator.batchAcceleration = countedBatchAcceleration
+    calculator.accelerationFunction = countedAccelerationFunction
+    return calculator
+
+
+def impactPoint(x, y, z, time, minAltitude):
+    """Точка пересечения высоты minAltitude по двум последним точкам: (x, y, время)."""
+    if len(z) < 2 or z[-1] >= minAltitude:
+        return float(x[-1]), float(y[-1]), float(time[-1])
+    fraction = (minAltitude - z[-2]) / (z[-1] - z[-2])
+    return tuple(float(column[-2] + fraction * (column[-1] - column[-2])) for column in (x, y, time))
+
+
+def measure(function, repeat):
+    """Вызывает function repeat раз и возвращает (результат, наименьшее время)."""
+    bestTime = np.inf
+    for _ in range(repeat):
+        startTime = time.perf_counter()
+        result = function()
+        bestTime = min(bestTime, time.perf_counter() - startTime)
+    return result, bestTime
+
+
+def referenceImpacts(models):
+    """Эталонные точки падения: RK45 с допусками 1e-10."""
+    calculator = makeCalculator()
+    references = {}
+    for model in models:
+        trajectory = calculator.ballisticTrajectory(
+            *shot.values(), dt=0.01, model=model, method='RK45', rtol=1e-10, atol=1e-10, **limits
+        )
+        references[model] = impactPoint(trajectory.x, trajectory.y, trajectory.z, trajectory.time, limits['minAltitude'])
+    return references
+
+
+def trajectoryCase(calculator, reference, model, method, dt, repeat):
+    calculator.evaluations = 0
+    trajectory, wallTime = measure(lambda: calculator.ballisticTrajectory(
+        *shot.values(), dt=dt, model=model, method=method, **limits
+    ), repeat)
+    x, y, flightTime = impactPoint(trajectory.x, trajectory.y, trajectory.z, trajectory.time, limits['minAltitude'])
+    steps = len(trajectory) - 1
+    return {
+        'name': f"trajectory {method} {model} dt={dt}", 'kind': 'trajectory',
+        'model': model, 'method': method, 'dt': dt,
+        'wallTime': wallTime, 'steps': steps, 'stepsPerSecond': steps / wallTime,
+        'derivativeEvaluations': calculator.evaluations // repeat,
+        'impactError': float(np.hypot(x - reference[0], y - reference[1])),
+        'timeError': abs(flightTime - reference[2]),
+    }
+
+
+def batchCase(calculator, reference, model, method, dt, shotCount, repeat):
+    # Выстрелы отличаются углом возвышения; первый совпадает с эталонным
+    vertAngles = shot['vertAngle'] + np.linspace(0.0, 1.0, shotCount)
+    calculator.evaluations = 0
+    result, wallTime = measure(lambda: calculator.ballisticTrajectoryBatch(
+        shot['velocity'], shot['horizAngle'], vertAngles, shot['windSpeed'], shot['windAngle'],
+        dt=dt, model=model, method=method, keepTrajectories=False, **limits
+    ), repeat)
+    impact = result.crossing(limits['minAltitude'], name='z')
+    steps = int((result.lengths - 1).sum())
+    return {
+        'name': f"batch {method} {model} dt={dt} shots={shotCount}", 'kind': 'batch',
+        'model': model, 'method': method, 'dt': dt, 'shots': shotCount,
+        'wallTime': wallTime, 'steps': steps, 'stepsPerSecond': steps / wallTime,
+        'derivativeEvaluations': calculator.evaluations // repeat,
+        'impactError': float(np.hypot(impact['x'][0] - reference[0], impact['y'][0] - reference[1])),
+        'timeError': float(abs(impact['time'][0] - reference[2])),
+    }
+
+
+def aimCase(calculator, model, method, solver, dt, repeat):
+    targetPath = TargetPath(*target)
+    trials = []
+
+    def solve():
+        calculator.aimSolver.lastSolution = None
+        trials.clear()
+        return calculator.findAimAngles(
+            shot['velocity'], shot['windSpeed'], shot['windAngle'], targetPath, 1.0,
+            dt=dt, model=model, method=method, solver=solver,
+            progressCallback=lambda trial, angles: trials.append(trial), **limits
+        )
+
+    calculator.evaluations = 0
+    (horizAngle, vertAngle, trajectory, impactTime), wallTime = measure(solve, repeat)
+    _, miss, _ = calculator.aimSolver.closestApproach(trajectory, targetPath)
+    return {
+        'name': f"aim {solver} {method} {model} dt={dt}", 'kind': 'aim',
+        'model': model, 'method': method, 'dt': dt, 'solver': solver,
+        'wallTime': wallTime, 'trials': len(trials),
+        'derivativeEvaluations': calculator.evaluations // repeat,
+        'miss': float(miss), 'horizAngle': horizAngle, 'vertAngle': vertAngle,
+    }
+
+
+def runBenchmark(quick=False, repeat=3, shotCount=1000):
+    models = ('G1', 'G7')
+    steps = (0.1, 0.01) if quick else (0.1, 0.01, 0.001)
+    references = referenceImpacts(models)
+    calculator = makeCalculator()
+
+    cases = []
+    for model in models:
+        for method in ('Euler', 'RK4'):
+            for dt in steps:
+                cases.append(trajectoryCase(calculator, references[model], model, method, dt, repeat))
+        cases.append(trajectoryCase(calculator, references[model], model, 'RK45', 0.1, repeat))
+        cases.append(batchCase(calculator, references[model], model, 'RK4', 0.01, shotCount, 1))
+        for solver in ('secant', 'Nelder-Mead'):
+            cases.append(aimCase(calculator, model, 'RK4', solver, 0.01, 1))
+
+    return {
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform(),
+        'references': {model: dict(zip(('x', 'y', 'time'), point)) for model, point in references.items()},
+        'cases': cases,
+    }
+
+
+def compareReports(report, baseline, timeTolerance=1.5, errorTolerance=1.1):
+    """
+    Возвращает список ухудшений относительно baseline: время больше в timeTolerance раз
+    (с запасом 2 мс на шум таймера), ошибка или промах больше в errorTolerance раз
+    (с запасом 1e-6).
+    """
+    previous = {case['name']: case for case in baseline['cases']}
+    regressions = []
+    for case in report['cases']:
+        old = previous.get(case['name'])
+        if old is None:
+            continue
+        if case['wallTime'] > timeTolerance * old['wallTime'] + 0.002:
+            regressions.append(f"{case['name']}: время {old['wallTime']:.4f} -> {case['wallTime']:.4f} с")
+        for key in ('impactError', 'timeError', 'miss'):
+            if key in case and case[key] > errorTolerance * old[key] + 1e-6:
+                regressions.append(f"{case['name']}: {key} {old[key]:.3g} -> {case[key]:.3g}")
+    return regressions
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Замеры скорости и точности баллистического движка")
+    parser.add_argument('-o', '--output', default='benchmark.json', help="Файл отчета JSON")
+    parser.add_argument('--baseline', help="Прошлый отчет для поиска ухудшений")
+    parser.add_argument('--quick', action='store_true', help="Без расчетов с шагом 0.001 с")
+    parser.add_argument('--repeat', type=int, default=3, help="Повторов каждого замера (берется лучшее время)")
+    parser.add_argument('--shots', type=int, default=1000, help="Выстрелов в пакетном расчете")
+    args = parser.parse_args(arguments)
+
+    report = runBenchmark(quick=args.quick, repeat=args.repeat, shotCount=args.shots)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    for case in report['cases']:
+        accuracy = (f"промах {case['miss']:.3f} м, проб {case['trials']}" if case['kind'] == 'aim'
+                    else f"ошибка {case['impactError']:.3f} м / {case['timeError']:.4f} с")
+        print(f"{case['name']:<40} {case['wallTime']:8.4f} с  {case['derivativeEvaluations']:>10} выч.  {accuracy}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compareReports(report, json.load(f))
+        for regression in regressions:
+            print("Ухудшение:", regression)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
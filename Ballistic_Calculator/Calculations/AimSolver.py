@@ -0,0 +1,206 @@
+import numpy as np
+from scipy.optimize import minimize
+
+
+def targetPositions(targetFunction, times):
+    """
+    Возвращает координаты цели для массива моментов времени массивом (3, n).
+    Скомпилированная траектория цели (TargetPath) вычисляется своим методом evaluate.
+    Иначе функция цели вызывается сразу для всего массива, а если она не поддерживает
+    массивы, значения вычисляются поточечно.
+    """
+    if hasattr(targetFunction, 'evaluate'):
+        return targetFunction.evaluate(times)
+    times = np.asarray(times, dtype=float)
+    try:
+        positions = np.array(np.broadcast_arrays(*targetFunction(times), times)[:3], dtype=float)
+    except (TypeError, ValueError):
+        positions = np.array([targetFunction(t) for t in times.tolist()], dtype=float).reshape(-1, 3).T
+    return positions
+
+
+class MissStopCondition:
+    """Условие остановки интегрирования: промах до цели начал расти после сближения."""
+
+    def __init__(self, targetFunction, checkInterval=5):
+        """
+        :param targetFunction: Функция положения цели от времени
+        :param checkInterval: Проверять промах каждые checkInterval точек
+        """
+        self.targetFunction = targetFunction
+        self.checkInterval = checkInterval
+        self.calls = 0
+        self.previousMiss = np.inf
+
+    def __call__(self, t, x, y, z):
+        self.calls += 1
+        if self.calls % self.checkInterval:
+            return False
+
+        targetX, targetY, targetZ = self.targetFunction(t)
+        miss = (x - targetX)**2 + (y - targetY)**2 + (z - targetZ)**2
+        growing = miss > self.previousMiss
+        self.previousMiss = miss
+        return growing
+
+
+class AimSolver:
+    """Поиск углов прицеливания по движущейся цели."""
+
+    def __init__(self, calculator):
+        self.calculator = calculator
+        self.lastSolution = None
+
+    def closestApproach(self, trajectory, targetFunction, targetRadius=0.0):
+        """
+        Находит момент наибольшего сближения пули с целью одной векторной операцией.
+        Между соседними точками траектории относительное движение считается линейным.
+        Если пуля попадает в сферу targetRadius, возвращается первый такой момент.
+
+        :return: (время, промах, номер точки)
+        """
+        times = trajectory.time
+        relative = np.array([trajectory.x, trajectory.y, trajectory.z]) - targetPositions(targetFunction, times)
+        distances = np.sqrt((relative**2).sum(axis=0))
+
+        hits = np.flatnonzero(distances <= targetRadius)
+        if hits.size:
+            index = int(hits[0])
+            return float(times[index]), float(distances[index]), index
+
+        index = int(np.argmin(distances))
+        bestTime, bestDistance = float(times[index]), float(distances[index])
+
+        for start in (index - 1, index):
+            if start < 0 or start + 1 >= times.size:
+                continue
+            segment = relative[:, start + 1] - relative[:, start]
+            length2 = segment @ segment
+            if length2 == 0.0:
+                continue
+            fraction = min(1.0, max(0.0, -(relative[:, start] @ segment) / length2))
+            distance = float(np.linalg.norm(relative[:, start] + fraction * segment))
+            if distance < bestDistance:
+                bestDistance = distance
+                bestTime = float(times[start] + fraction * (times[start + 1] - times[start]))
+
+        return bestTime, bestDistance, index
+
+    def solve(self,
+            velocity,
+            windSpeed, windAngle,
+            targetFunction, targetRadius,
+            dt=0.1, maxTime=100,
+            minVelocity=30, minAltitude=0, maxDistance=np.inf,
+            model='G1', method='RK4',
+            solver='Nelder-Mead', initialAngles=None, tolerance=1e-2, maxIterations=20,
+            progressCallback=None
+            ):
+        """
+        Подбирает горизонтальный и вертикальный углы выстрела.
+
+        solver='Nelder-Mead' - минимизация промаха симплекс-методом,
+        solver='secant' - метод стрельбы: секущие по вертикальному и горизонтальному углам
+        по угловому промаху в точке наибольшего сближения (при неудаче - Nelder-Mead).
+        Интегрирование каждой пробной траектории останавливается, когда промах начал расти.
+        progressCallback(номер пробы, углы) вызывается перед каждой пробной траекторией
+        и может прервать подбор исключением.
+        """
+        trials = 0
+
+        def trajectory(angles, early=True):
+            nonlocal trials
+            trials += 1
+            if progressCallback is not None:
+                progressCallback(trials, angles)
+            return self.calculator.ballisticTrajectory(
+                velocity, angles[0], angles[1],
+                windSpeed, windAngle,
+                dt=dt, maxTime=maxTime,
+                minVelocity=minVelocity,
+                minAltitude=minAltitude,
+                maxDistance=maxDistance,
+                model=model, method=method,
+                stopCondition=MissStopCondition(targetFunction) if early else None
+            )
+
+        def miss(angles):
+            return self.closestApproach(trajectory(angles), targetFunction)[1]
+
+        x0, y0, z0 = targetFunction(0)
+        geometricAngles = np.array([
+            np.degrees(np.arctan2(y0, x0)),
+            np.degrees(np.arctan2(z0, np.hypot(x0, y0)))
+        ])
+        # Начальные приближения (переданные или геометрическое) сравниваются с прошлым решением;
+        # initialAngles - пара углов или несколько пар
+        seeds = [geometricAngles] if initialAngles is None else list(np.reshape(np.asarray(initialAngles, dtype=float), (-1, 2)))
+        candidates = [
+            np.asarray(angles, dtype=float)
+            for angles in seeds + [self.lastSolution]
+            if angles is not None and np.all(np.isfinite(angles))
+        ] or [geometricAngles]
+        angles = candidates[0] if len(candidates) == 1 else min(candidates, key=miss)
+
+        if solver == 'secant':
+            angles, converged = self.secant(trajectory, targetFunction, angles, tolerance, maxIterations)
+        elif solver == 'Nelder-Mead':
+            converged = False
+        else:
+            raise ValueError("Unknown aim solver: choose 'Nelder-Mead' or 'secant'")
+
+        if not converged:
+            result = minimize(
+                lambda angles: miss(angles)**2,
+                x0=angles,
+                method='Nelder-Mead',
+                options={'xatol':1e-3, 'fatol':1e-2, 'maxiter':200}
+            )
+            angles = result.x
+
+        horizontalAngle, verticalAngle = (float(angle) for angle in angles)
+        self.lastSolution = (horizontalAngle, verticalAngle)
+
+        finalTrajectory = trajectory(angles, early=False)
+        impactTime, _, _ = self.closestApproach(finalTrajectory, targetFunction, targetRadius)
+        return horizontalAngle, verticalAngle, finalTrajectory, impactTime
+
+    def secant(self, trajectory, targetFunction, angles, tolerance, maxIterations, maxCorrection=10.0):
+        """
+        Метод стрельбы: угловые ошибки по азимуту и возвышению в точке сближения
+        обнуляются методом секущих независимо по каждому углу.
+
+        :return: (углы, сошелся ли метод)
+        """
+        angles = np.asarray(angles, dtype=float)
+        previousAngles = previousErrors = None
+        bestAngles, bestMiss = angles, np.inf
+
+        for _ in range(maxIterations):
+            path = trajectory(angles)
+            time, miss, _ = self.closestApproach(path, targetFunction)
+            if miss < bestMiss:
+                bestAngles, bestMiss = angles, miss
+            if miss <= tolerance:
+                return angles, True
+
+            bullet = np.array([np.interp(time, path.time, column) for column in (path.x, path.y, path.z)])
+            target = targetPositions(targetFunction, [time])[:, 0]
+            errors = np.degrees(np.array([
+                np.arctan2(target[1], target[0]) - np.arctan2(bullet[1], bullet[0]),
+                np.arctan2(target[2], np.hypot(target[0], target[1])) - np.arctan2(bullet[2], np.hypot(bullet[0], bullet[1])),
+            ]))
+
+            corrections = errors.copy()
+            if previousErrors is not None:
+                errorChange = errors - previousErrors
+                angleChange = angles - previousAngles
+                usable = (np.abs(errorChange) > 1e-12) & (np.abs(angleChange) > 1e-12)
+                slopes = np.where(usable, errorChange / np.where(usable, angleChange, 1.0), -1.0)
+                usable &= slopes < 0
+                corrections = np.where(usable, -errors / np.where(usable, slopes, -1.0), errors)
+
+            previousAngles, previousErrors = angles, errors
+            angles = angles + np.clip(corrections, -maxCorrection, maxCorrection)
+
+        return bestAngles, False
@@ -38,6 +38,14 @@ class Atmosphere:
         temperatureCelsius = temperature - 273.15
         return 331.3 + 0.606 * temperatureCelsius + 0.0124 * self.humidity
 
+    def select(self, indices):
+        """Возвращает атмосферу для части выстрелов, если условия заданы массивами по выстрелам."""
+        selected = Atmosphere.__new__(Atmosphere)
+        for name in ('pressure0', 'temperature0', 'humidity'):
+            value = getattr(self, name)
+            setattr(selected, name, value[indices] if np.ndim(value) else value)
+        return selected
+
     def saturatedVaporPressure(self, tCelsius):
         """Рассчитывает насыщенное давление пара при заданной температуре."""
         pt = sum(c * tCelsius**i for i, c in enumerate(self.saturationVaporPressureCoefficients))
@@ -0,0 +1,89 @@
+import numpy as np
+
+from Calculations.Gravity import gravityAcceleration
+
+class AtmosphereTable:
+    """Предрассчитанная по высоте таблица ускорения свободного падения, плотности воздуха и скорости звука."""
+
+    cache = {}
+    cacheSize = 16
+
+    def __init__(self, atmosphere, latitude=55.75, elevation=200,
+            minAltitude=-1000, maxAltitude=20000, step=1.0
+            ):
+        """
+        :param atmosphere: Атмосфера (Atmosphere), для которой строится таблица
+        :param latitude: Широта (°)
+        :param elevation: Высота точки выстрела над уровнем моря (м)
+        :param minAltitude: Нижняя граница таблицы относительно точки выстрела (м)
+        :param maxAltitude: Верхняя граница таблицы относительно точки выстрела (м)
+        :param step: Шаг таблицы по высоте (м)
+        """
+        self.atmosphere = atmosphere
+        self.latitude = latitude
+        self.elevation = elevation
+
+        count = int(round((maxAltitude - minAltitude) / step)) + 1
+        self.origin = minAltitude
+        self.step = step
+        self.inverseStep = 1.0 / step
+        self.lastCell = count - 1
+
+        self.altitudes = minAltitude + step * np.arange(count)
+        self.gravity = gravityAcceleration(latitude=latitude, altitude=elevation + self.altitudes)
+        self.density, self.soundVelocity = atmosphere.atAltitude(self.altitudes, self.gravity)
+
+        # Списки Python для скалярного пути без накладных расходов на скаляры NumPy
+        self.gravityList = self.gravity.tolist()
+        self.densityList = self.density.tolist()
+        self.soundVelocityList = self.soundVelocity.tolist()
+        self.gravitySlopes = np.diff(self.gravity).tolist()
+        self.densitySlopes = np.diff(self.density).tolist()
+        self.soundVelocitySlopes = np.diff(self.soundVelocity).tolist()
+
+    @classmethod
+    def forConfiguration(cls, atmosphere, latitude, elevation):
+        """Возвращает таблицу из кэша или строит новую для данных условий."""
+        key = (atmosphere.pressure0, atmosphere.temperature0, atmosphere.humidity, latitude, elevation)
+        table = cls.cache.get(key)
+        if table is None:
+            if len(cls.cache) >= cls.cacheSize:
+                del cls.cache[next(iter(cls.cache))]
+            table = cls(atmosphere, latitude, elevation)
+            cls.cache[key] = table
+        return table
+
+    def at(self, altitude):
+        """Возвращает g, плотность воздуха и скорость звука на высоте altitude (скаляр)."""
+        position = (altitude - self.origin) * self.inverseStep
+        if 0.0 <= position < self.lastCell:
+            cell = int(position)
+            fraction = position - cell
+            return (self.gravityList[cell] + self.gravitySlopes[cell] * fraction,
+                    self.densityList[cell] + self.densitySlopes[cell] * fraction,
+                    self.soundVelocityList[cell] + self.soundVelocitySlopes[cell] * fraction)
+
+        g = gravityAcceleration(latitude=self.latitude, altitude=self.elevation + altitude)
+        density, soundVelocity = self.atmosphere.atAltitude(altitude, g)
+        return g, density, soundVelocity
+
+    def atArray(self, altitudes):
+        """Векторизованный вариант at для массива высот."""
+        altitudes = np.asarray(altitudes, dtype=float)
+        position = (altitudes - self.origin) * self.inverseStep
+        inside = (position >= 0.0) & (position < self.lastCell)
+
+        cells = np.where(inside, position, 0.0).astype(int)
+        fraction = np.where(inside, position - cells, 0.0)
+
+        g = self.gravity[cells] + (self.gravity[cells + 1] - self.gravity[cells]) * fraction
+        density = self.density[cells] + (self.density[cells + 1] - self.density[cells]) * fraction
+        soundVelocity = (self.soundVelocity[cells] +
+                         (self.soundVelocity[cells + 1] - self.soundVelocity[cells]) * fraction)
+
+        if not inside.all():
+            outside = ~inside
+            g[outside] = gravityAcceleration(latitude=self.latitude, altitude=self.elevation + altitudes[outside])
+            density[outside], soundVelocity[outside] = self.atmosphere.atAltitude(altitudes[outside], g[outside])
+
+        return g, density, soundVelocity
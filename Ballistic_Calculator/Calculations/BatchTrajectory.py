@@ -0,0 +1,118 @@
+import numpy as np
+
+from Calculations.Trajectory import Trajectory
+
+class BatchTrajectory:
+    """Результат пакетного расчета: траектории и конечные точки для каждого выстрела."""
+
+    fields = ('x', 'y', 'z', 'time', 'distance', 'velocity', 'mach', 'energy')
+
+    def __init__(self, shotCount, keepTrajectories=True, crossings=()):
+        """
+        :param shotCount: Количество выстрелов в пакете
+        :param keepTrajectories: Сохранять ли все точки траекторий (иначе только конечные точки)
+        :param crossings: Отслеживаемые пересечения (поле, значение, направление): направление
+            -1 - поле убывает, 1 - возрастает. Запоминается первое такое пересечение за полет.
+        """
+        self.shotCount = shotCount
+        self.keepTrajectories = keepTrajectories
+        self.lengths = np.zeros(shotCount, dtype=int)
+        self.final = {name: np.full(shotCount, np.nan) for name in self.fields}
+        self.previous = {name: np.full(shotCount, np.nan) for name in self.fields}
+        self._steps = []
+        self._columns = {}
+        self.crossings = {
+            (name, float(value), direction): {field: np.full(shotCount, np.nan) for field in self.fields}
+            for name, value, direction in crossings
+        }
+
+    def record(self, indices, values):
+        """Добавляет очередную точку для выстрелов с номерами indices."""
+        for name, value in zip(self.fields, values):
+            self.previous[name][indices] = self.final[name][indices]
+            self.final[name][indices] = value
+        self.lengths[indices] += 1
+
+        for key, state in self.crossings.items():
+            self.recordCrossing(indices, key, state)
+
+        if self.keepTrajectories:
+            self._steps.append((indices, np.array(np.broadcast_arrays(*values))))
+            self._columns = {}
+
+    def recordCrossing(self, indices, key, state):
+        """Запоминает состояние выстрелов, впервые пересекших значение на последнем шаге."""
+        name, value, direction = key
+        previous, final = self.previous[name][indices], self.final[name][indices]
+        if direction < 0:
+            crossed = (previous >= value) & (final < value)
+        else:
+            crossed = (previous <= value) & (final > value)
+        crossed &= np.isnan(state[name][indices])
+        if not crossed.any():
+            return
+
+        hit = indices[crossed]
+        fraction = (value - previous[crossed]) / (final[crossed] - previous[crossed])
+        for field in self.fields:
+            start = self.previous[field][hit]
+            state[field][hit] = start + fraction * (self.final[field][hit] - start)
+
+    def column(self, name):
+        """
+        Возвращает матрицу (шаг, выстрел) значений поля; после остановки выстрела - NaN.
+        Матрица строится только для запрошенного поля.
+        """
+        if not self.keepTrajectories:
+            raise ValueError("Trajectories were not kept: use keepTrajectories=True")
+
+        if name not in self._columns:
+            field = self.fields.index(name)
+            column = np.full((len(self._steps), self.shotCount), np.nan)
+            for step, (indices, values) in enumerate(self._steps):
+                column[step, indices] = values[field]
+            self._columns[name] = column
+        return self._columns[name]
+
+    def shot(self, index):
+        """Возвращает траекторию одного выстрела (Trajectory)."""
+        if not self.keepTrajectories:
+            raise ValueError("Trajectories were not kept: use keepTrajectories=True")
+
+        points = []
+        for indices, values in self._steps:
+            # Номера выстрелов в шаге упорядочены; выбывший выстрел в расчет не возвращается
+            position = np.searchsorted(indices, index)
+            if position == indices.size or indices[position] != index:
+                break
+            points.append(values[:, position])
+        return Trajectory.fromColumns(*np.array(points).reshape(-1, len(self.fields)).T)
+
+    def crossing(self, value, name='distance', direction=None):
+        """
+        Интерполирует состояние выстрелов в момент, когда поле name достигло значения value.
+        Для отслеживаемого пересечения (см. crossings) возвращается первое пересечение в
+        направлении direction за весь полет, иначе - по двум последним точкам.
+        Для выстрелов, не достигших этого значения, - NaN.
+        """
+        key = (name, float(value), direction)
+        if key in self.crossings:
+            return {field: values.copy() for field, values in self.crossings[key].items()}
+
+        previous, final = self.previous[name], self.final[name]
+        reached = (final - value) * (previous - value) <= 0
+        span = final - previous
+        fraction = np.where(reached & (span != 0), (value - previous) / np.where(span != 0, span, 1.0), 1.0)
+
+        state = {}
+        for field in self.fields:
+            interpolated = self.previous[field] + fraction * (self.final[field] - self.previous[field])
+            state[field] = np.where(reached, interpolated, np.nan)
+        return state
+
+    def impactPoints(self):
+        """Возвращает конечные точки всех выстрелов массивом (выстрел, 3)."""
+        return np.column_stack((self.final['x'], self.final['y'], self.final['z']))
+
+    def __len__(self):
+        return self.shotCount
@@ -0,0 +1,179 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from Calculations.Atmosphere import Atmosphere
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+# Среднеквадратичные отклонения по умолчанию
+defaultSpreads = {
+    'velocity': 5.0,      # Начальная скорость (м/с)
+    'windSpeed': 1.0,     # Скорость ветра, порывы (м/с)
+    'windAngle': 5.0,     # Направление ветра (°)
+    'temperature': 1.0,   # Ошибка температуры (°C)
+    'humidity': 0.05,     # Ошибка влажности (0-1)
+    'formFactor': 0.01,   # Разброс форм-фактора
+}
+
+
+class DispersionResult:
+    """Результат статистического моделирования рассеивания в плоскости цели."""
+
+    def __init__(self, targetDistance, targetY, targetZ, targetRadius, impactY, impactZ, energy, time):
+        """
+        :param targetDistance: Дальность плоскости цели (м)
+        :param targetY: Боковое положение центра цели (м)
+        :param targetZ: Высота центра цели (м)
+        :param targetRadius: Радиус цели (м)
+        :param impactY: Боковые отклонения точек попадания (м), NaN - пуля не долетела
+        :param impactZ: Высоты точек попадания (м), NaN - пуля не долетела
+        :param energy: Энергия пули у цели (Дж)
+        :param time: Время полета до цели (с)
+        """
+        self.targetDistance = targetDistance
+        self.targetY = targetY
+        self.targetZ = targetZ
+        self.targetRadius = targetRadius
+        self.impactY = impactY
+        self.impactZ = impactZ
+        self.energy = energy
+        self.time = time
+
+        self.reached = ~np.isnan(impactY)
+        y, z = impactY[self.reached], impactZ[self.reached]
+
+        self.shotCount = impactY.size
+        self.reachedCount = int(self.reached.sum())
+        self.meanY = float(y.mean()) if y.size else np.nan
+        self.meanZ = float(z.mean()) if z.size else np.nan
+        self.stdY = float(y.std()) if y.size else np.nan
+        self.stdZ = float(z.std()) if z.size else np.nan
+
+        targetMiss = np.hypot(y - targetY, z - targetZ)
+        # CEP - радиус круга, в который попадает половина пуль
+        self.cep = float(np.median(np.hypot(y - self.meanY, z - self.meanZ))) if y.size else np.nan
+        self.cepAboutTarget = float(np.median(targetMiss)) if y.size else np.nan
+        self.hitProbability = float((targetMiss <= targetRadius).sum() / self.shotCount) if self.shotCount else 0.0
+
+        reachedEnergy = energy[self.reached]
+        self.energyMean = float(reachedEnergy.mean()) if y.size else np.nan
+        self.energyStd = float(reachedEnergy.std()) if y.size else np.nan
+        self.energyPercentiles = (np.percentile(reachedEnergy, [5, 50, 95]) if y.size else np.full(3, np.nan))
+
+    def __repr__(self):
+        return (f"DispersionResult(shots={self.shotCount}, reached={self.reachedCount}, "
+                f"CEP={self.cep:.3f}m, hit={self.hitProbability:.1%}, "
+                f"MPI=({self.meanY:.3f}, {self.meanZ:.3f})m, energy={self.energyMean:.1f}J)")
+
+
+def simulateShots(setup, shot, spreads, targetDistance, shotCount, seed, options):
+    """
+    Моделирует shotCount выстрелов со случайными возмущениями пакетным движком.
+    Функция верхнего уровня, чтобы ее можно было выполнять в пуле процессов.
+
+    :return: (боковое отклонение, высота, энергия, время) в плоскости цели
+    """
+    rng = np.random.default_rng(seed)
+    calculator = TrajectoryCalculator(
+        formFactor=setup['formFactor'], latitude=setup['latitude'], elevation=setup['elevation']
+    )
+    calculator.M = setup['mass']
+    calculator.A = setup['area']
+
+    def perturbed(value, spread):
+        return value + spread * rng.standard_normal(shotCount) if spread else np.full(shotCount, float(value))
+
+    atmosphere = Atmosphere(
+        pressure=setup['pressure'],
+        temperature=perturbed(setup['temperature'], spreads.get('temperature', 0.0)),
+        humidity=np.clip(perturbed(setup['humidity'], spreads.get('humidity', 0.0)), 0.0, 1.0),
+    )
+
+    result = calculator.ballisticTrajectoryBatch(
+        perturbed(shot['velocity'], spreads.get('velocity', 0.0)),
+        shot['horizAngle'], shot['vertAngle'],
+        np.abs(perturbed(shot['windSpeed'], spreads.get('windSpeed', 0.0))),
+        perturbed(shot['windAngle'], spreads.get('windAngle', 0.0)),
+        maxDistance=targetDistance, keepTrajectories=False,
+        formFactor=np.maximum(perturbed(setup['formFactor'], spreads.get('formFactor', 0.0)), 0.0),
+        atmosphere=atmosphere, **options
+    )
+    crossing = result.crossing(targetDistance)
+    return crossing['y'], crossing['z'], crossing['energy'], crossing['time']
+
+
+def dispersionAnalysis(calculator,
+        velocity, horizAngle, vertAngle,
+        windSpeed, windAngle,
+        targetDistance, targetY=None, targetZ=None, targetRadius=1.0,
+        shotCount=1000, spreads=None, seed=None, workers=None, chunkSize=250,
+        dt=0.01, maxTime=100, minVelocity=30, minAltitude=0,
+        model='G1', method='RK4', progressCallback=None
+        ):
+    """
+    Оценивает рассеивание и вероятность попадания методом Монте-Карло.
+
+    Выстрелы делятся на пачки по chunkSize, каждая пачка получает собственное зерно из
+    np.random.SeedSequence(seed), поэтому результат воспроизводим при любом числе процессов.
+    Пачки считаются пакетным движком в ProcessPoolExecutor (workers=1 - в текущем процессе).
+    Если центр цели не задан, им считается точка попадания выстрела без возмущений.
+
+    progressCallback(рассчитано выстрелов, всего выстрелов) вызывается после каждой пачки;
+    исключение из него прерывает расчет, а еще не начатые пачки отменяются.
+    """
+    spreads = defaultSpreads if spreads is None else spreads
+    setup = {
+        'mass': calculator.M, 'area': calculator.A, 'formFactor': calculator.formFactor,
+        'pressure': calculator.atmosphere.pressure0,
+        'temperature': calculator.atmosphere.temperature0 - 273.15,
+        'humidity': calculator.atmosphere.humidity,
+        'latitude': calculator.latitude, 'elevation': calculator.elevation,
+    }
+    shot = {
+        'velocity': velocity, 'horizAngle': horizAngle, 'vertAngle': vertAngle,
+        'windSpeed': windSpeed, 'windAngle': windAngle,
+    }
+    options = {
+        'dt': dt, 'maxTime': maxTime, 'minVelocity': minVelocity, 'minAltitude': minAltitude,
+        'model': model, 'method': method,
+    }
+
+    if targetY is None or targetZ is None:
+        nominalY, nominalZ, _, _ = simulateShots(setup, shot, {}, targetDistance, 1, 0, options)
+        targetY = float(nominalY[0]) if targetY is None else targetY
+        targetZ = float(nominalZ[0]) if targetZ is None else targetZ
+
+    chunkSizes = [min(chunkSize, shotCount - start) for start in range(0, shotCount, chunkSize)]
+    seeds = np.random.SeedSequence(seed).spawn(len(chunkSizes))
+    tasks = [(setup, shot, spreads, targetDistance, size, chunkSeed, options)
+             for size, chunkSeed in zip(chunkSizes, seeds)]
+
+    chunks = [None] * len(tasks)
+    finished = 0
+
+    def chunkDone(index, chunk):
+        nonlocal finished
+        chunks[index] = chunk
+        finished += chunkSizes[index]
+        if progressCallback is not None:
+            progressCallback(finished, shotCount)
+
+    workers = os.cpu_count() if workers is None else workers
+    if workers > 1 and len(tasks) > 1:
+        executor = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+        try:
+            futures = {executor.submit(simulateShots, *task): index for index, task in enumerate(tasks)}
+            for future in as_completed(futures):
+                chunkDone(futures[future], future.result())
+        except BaseException:
+            # Расчет прерван (например, отменен из progressCallback): ожидающие пачки не запускаются
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
+    else:
+        for index, task in enumerate(tasks):
+            chunkDone(index, simulateShots(*task))
+
+    impactY, impactZ, energy, time = (np.concatenate(column) for column in zip(*chunks))
+    return DispersionResult(targetDistance, targetY, targetZ, targetRadius, impactY, impactZ, energy, time)
@@ -1,4 +1,4 @@
-from scipy.interpolate import interp1d
+import numpy as np
 
 G1DragTable = {
     0.00: 0.2629, 0.05: 0.2558, 0.10: 0.2487, 0.15: 0.2413, 0.20: 0.2344,
@@ -40,23 +40,116 @@ G7DragTable = {
 }
 
 class DragTable:
+    """
+    Таблица коэффициентов сопротивления с быстрым поиском.
+
+    Кусочно-линейная функция каждой модели заранее раскладывается на равномерную сетку
+    по числу Маха с шагом не больше минимального расстояния между узлами таблицы.
+    Поиск - прямое вычисление номера ячейки и не более одного сравнения с узлом,
+    поэтому результат совпадает с линейной интерполяцией (и экстраполяцией) по узлам.
+    """
+
     def __init__(self):
-        self.interpolators = {
-            "G1": interp1d(
-                list(G1DragTable.keys()),
-                list(G1DragTable.values()),
-                kind="linear",
-                fill_value="extrapolate"
-            ),
-            "G7": interp1d(
-                list(G7DragTable.keys()),
-                list(G7DragTable.values()),
-                kind="linear",
-                fill_value="extrapolate"
-            ),
-        }
+        self.models = {}
+        self.registerModel("G1", G1DragTable)
+        self.registerModel("G7", G7DragTable)
+
+    def buildCoefficientFunction(self, table):
+        """Строит скалярную функцию Cd(Mach) по разложенной таблице."""
+        origin = table["origin"]
+        inverseCellSize = table["inverseCellSize"]
+        lastCell = table["lastCell"]
+        lastSegment = table["lastSegment"]
+        machs = table["machList"]
+        slopes = table["slopeList"]
+        intercepts = table["interceptList"]
+        cellSegments = table["cellSegmentList"]
+
+        def coefficient(mach):
+            cell = int((mach - origin) * inverseCellSize)
+            if cell < 0:
+                cell = 0
+            elif cell > lastCell:
+                cell = lastCell
+            segment = cellSegments[cell]
+            if segment < lastSegment and mach >= machs[segment + 1]:
+                segment += 1
+            return intercepts[segment] + slopes[segment] * mach
+
+        return coefficient
+
+    def coefficientFunction(self, model="G1"):
+        """Возвращает быструю скалярную функцию Cd(Mach) для модели."""
+        return self.getModel(model)["function"]
 
     def dragCoefficient(self, mach, model="G1"):
-        if model not in self.interpolators:
-            raise ValueError("Acceptable models: 'G1' or 'G7'")
-        return float(self.interpolators[model](mach))
+        if np.ndim(mach) == 0:
+            return self.coefficientFunction(model)(float(mach))
+        return self.dragCoefficients(mach, model)
+
+    def dragCoefficients(self, mach, model="G1"):
+        """Возвращает коэффициенты сопротивления для массива чисел Маха."""
+        table = self.getModel(model)
+        mach = np.asarray(mach, dtype=float)
+
+        cells = ((mach - table["origin"]) * table["inverseCellSize"]).astype(int)
+        np.clip(cells, 0, table["lastCell"], out=cells)
+        segments = table["cellSegments"][cells]
+        segments += (segments < table["lastSegment"]) & (
+            mach >= table["machs"][segments + 1])
+        return table["intercepts"][segments] + table["slopes"][segments] * mach
+
+    def getModel(self, model):
+        if model not in self.models:
+            raise ValueError(f"Acceptable models: {', '.join(repr(name) for name in self.models)}")
+        return self.models[model]
+
+    def loadCsv(self, name, path, delimiter=","):
+        """Добавляет модель из CSV-файла с двумя столбцами: Мах и Cd (строки-заголовки пропускаются)."""
+        table = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                parts = line.strip().split(delimiter)
+                if len(parts) < 2:
+                    continue
+                try:
+                    table[float(parts[0])] = float(parts[1])
+                except ValueError:
+                    continue
+        self.registerModel(name, table)
+
+    def modelNames(self):
+        return list(self.models)
+
+    def registerModel(self, name, table):
+        """Добавляет модель сопротивления по словарю {Мах: Cd}."""
+        machs = np.array(sorted(table), dtype=float)
+        coefficients = np.array([table[m] for m in sorted(table)], dtype=float)
+        if machs.size < 2:
+            raise ValueError("Drag table must contain at least two points")
+
+        slopes = np.diff(coefficients) / np.diff(machs)
+        intercepts = coefficients[:-1] - slopes * machs[:-1]
+
+        cellSize = np.diff(machs).min()
+        cellCount = int(np.ceil((machs[-1] - machs[0]) / cellSize)) + 1
+        cellStarts = machs[0] + cellSize * np.arange(cellCount)
+        cellSegments = np.clip(np.searchsorted(machs, cellStarts, side="right") - 1, 0, slopes.size - 1)
+
+        table = {
+            "origin": machs[0],
+            "inverseCellSize": 1.0 / cellSize,
+            "lastCell": cellCount - 1,
+            "lastSegment": slopes.size - 1,
+            "machs": machs,
+            "slopes": slopes,
+            "intercepts": intercepts,
+            "cellSegments": cellSegments,
+            # Списки Python для скалярного пути без накладных расходов на скаляры NumPy
+            "machList": machs.tolist(),
+            "slopeList": slopes.tolist(),
+            "interceptList": intercepts.tolist(),
+            "cellSegmentList": cellSegments.tolist(),
+        }
+        table["function"] = self.buildCoefficientFunction(table)
+        self.models[name] = table
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+
+class FiringTable:
+    """
+    Таблица стрельбы для одного профиля патрона и атмосферы.
+
+    Строится одним пакетным расчетом по сетке углов возвышения и хранит для каждого угла
+    дальность до точки падения на высоту impactAltitude, время полета, понижение относительно
+    линии ствола, боковой снос, скорость и энергию. Обратные запросы (дальность -> угол,
+    дальность -> время полета) решаются интерполяцией по восходящей ветви до угла
+    наибольшей дальности, на которой дальность монотонно растет.
+    """
+
+    columns = ('angles', 'ranges', 'times', 'drops', 'drifts', 'velocities', 'energies')
+    altitudeMargin = 1.0  # Запас по высоте ниже точки падения, до которого ведется расчет (м)
+
+    def __init__(self, angles, ranges, times, drops, drifts, velocities, energies, profile=None):
+        """
+        :param angles: Углы возвышения (°)
+        :param ranges: Дальности до точки падения (м)
+        :param times: Время полета (с)
+        :param drops: Понижение траектории относительно линии ствола в точке падения (м)
+        :param drifts: Боковой снос в точке падения (м)
+        :param velocities: Скорость в точке падения (м/с)
+        :param energies: Энергия в точке падения (Дж)
+        :param profile: Параметры, по которым построена таблица
+        """
+        self.angles = np.asarray(angles, dtype=float)
+        self.ranges = np.asarray(ranges, dtype=float)
+        self.times = np.asarray(times, dtype=float)
+        self.drops = np.asarray(drops, dtype=float)
+        self.drifts = np.asarray(drifts, dtype=float)
+        self.velocities = np.asarray(velocities, dtype=float)
+        self.energies = np.asarray(energies, dtype=float)
+        self.profile = profile or {}
+
+        # Восходящая ветвь: от наименьшего угла до угла наибольшей дальности
+        valid = np.flatnonzero(~np.isnan(self.ranges))
+        if valid.size:
+            last = valid[np.argmax(self.ranges[valid])]
+            branch = valid[valid <= last]
+            branch = branch[np.concatenate(([True], np.diff(np.maximum.accumulate(self.ranges[branch])) > 0))]
+        else:
+            branch = valid
+        self.branch = branch
+
+    @classmethod
+    def build(cls, calculator,
+            velocity, windSpeed=0.0, windAngle=0.0,
+            maxAngle=45.0, angleStep=0.25, impactAltitude=0.0,
+            dt=0.01, maxTime=100, minVelocity=30,
+            model='G1', method='RK4'
+            ):
+        """
+        Строит таблицу одним пакетным расчетом по сетке углов возвышения. Точка падения -
+        пересечение высоты impactAltitude на нисходящей ветви траектории, поэтому выстрелы
+        рассчитываются до высоты ниже и точки вылета, и impactAltitude.
+        """
+        angles = np.arange(0.0, maxAngle + angleStep / 2, angleStep)
+        batch = calculator.ballisticTrajectoryBatch(
+            velocity, 0.0, angles, windSpeed, windAngle,
+            dt=dt, maxTime=maxTime, minVelocity=minVelocity, minAltitude=min(0.0, impactAltitude) - cls.altitudeMargin,
+            model=model, method=method, keepTrajectories=False, crossings=[('z', impactAltitude, -1)]
+        )
+        impact = batch.crossing(impactAltitude, name='z', direction=-1)
+        ranges = impact['distance']
+        drops = ranges * np.tan(np.radians(angles)) - impact['z']
+
+        profile = cls.profileOf(calculator, velocity, windSpeed, windAngle, maxAngle, angleStep,
+                                impactAltitude, dt, maxTime, minVelocity, model, method)
+        return cls(angles, ranges, impact['time'], drops, impact['y'], impact['velocity'], impact['energy'], profile)
+
+    @classmethod
+    def buildOrLoad(cls, calculator, velocity, directory="FiringTables", **options):
+        """Загружает таблицу для профиля из каталога directory или строит и сохраняет новую."""
+        profile = cls.profileOf(calculator, velocity, **options)
+        path = os.path.join(directory, f"firingTable_{cls.profileKey(profile)}.npz")
+        if os.path.exists(path):
+            return cls.load(path)
+
+        table = cls.build(calculator, velocity, **options)
+        os.makedirs(directory, exist_ok=True)
+        table.save(path)
+        return table
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            profile = json.loads(str(data['profile']))
+            return cls(*(data[name] for name in cls.columns), profile=profile)
+
+    @staticmethod
+    def profileKey(profile):
+        """Возвращает короткий хэш профиля для имени файла."""
+        return hashlib.sha1(json.dumps(profile, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def profileOf(calculator,
+            velocity, windSpeed=0.0, windAngle=0.0,
+            maxAngle=45.0, angleStep=0.25, impactAltitude=0.0,
+            dt=0.01, maxTime=100, minVelocity=30,
+            model='G1', method='RK4'
+            ):
+        """Собирает все параметры, от которых зависит таблица."""
+        atmosphere = calculator.atmosphere
+        return {
+            'mass': float(calculator.M), 'area': float(calculator.A), 'formFactor': float(calculator.formFactor),
+            'pressure': float(atmosphere.pressure0), 'temperature': float(atmosphere.temperature0),
+            'humidity': float(atmosphere.humidity),
+            'latitude': float(calculator.latitude), 'elevation': float(calculator.elevation),
+            'velocity': float(velocity), 'windSpeed': float(windSpeed), 'windAngle': float(windAngle),
+            'maxAngle': float(maxAngle), 'angleStep': float(angleStep), 'impactAltitude': float(impactAltitude),
+            'dt': float(dt), 'maxTime': float(maxTime), 'minVelocity': float(minVelocity),
+            'model': model, 'method': method,
+        }
+
+    def aimAngles(self, distance, height=0.0, lateral=0.0):
+        """
+        Начальное приближение углов выстрела по цели на дальности distance (по оси x), высоте
+        height и с боковым смещением lateral (по оси y): угол возвышения по таблице для
+        горизонтальной дальности плюс угол места цели, горизонтальный угол - направление на
+        цель плюс поправка на снос.
+        """
+        groundRange = np.hypot(distance, lateral)
+        horizAngle = np.degrees(np.arctan2(lateral, distance)) + self.windageForRange(groundRange)
+        vertAngle = self.angleForRange(groundRange) + np.degrees(np.arctan2(height, groundRange))
+        return horizAngle, vertAngle
+
+    def angleForRange(self, distance):
+        """Угол возвышения (°) для дальности distance; NaN, если дальность недостижима."""
+        return self.interpolate(distance, self.angles)
+
+    def driftForRange(self, distance):
+        return self.interpolate(distance, self.drifts)
+
+    def dropForRange(self, distance):
+        return self.interpolate(distance, self.drops)
+
+    def energyForRange(self, distance):
+        return self.interpolate(distance, self.energies)
+
+    def interpolate(self, distance, values):
+        """Интерполирует столбец values по дальности на восходящей ветви таблицы."""
+        ranges = self.ranges[self.branch]
+        if ranges.size == 0:
+            return np.full(np.shape(distance), np.nan) if np.ndim(distance) else np.nan
+        result = np.interp(distance, ranges, values[self.branch], left=np.nan, right=np.nan)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def maxRange(self):
+        return float(self.ranges[self.branch].max()) if self.branch.size else np.nan
+
+    def save(self, path):
+        np.savez(path, profile=json.dumps(self.profile), **{name: getattr(self, name) for name in self.columns})
+
+    def timeForRange(self, distance):
+        """Время полета (с) до дальности distance."""
+        return self.interpolate(distance, self.times)
+
+    def velocityForRange(self, distance):
+        return self.interpolate(distance, self.velocities)
+
+    def windageForRange(self, distance):
+        """Горизонтальная поправка (°), компенсирующая боковой снос на дальности distance."""
+        return -np.degrees(np.arctan2(self.driftForRange(distance), distance))
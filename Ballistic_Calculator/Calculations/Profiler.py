@@ -0,0 +1,179 @@
+import functools
+import time
+
+from Calculations.Trajectory import Trajectory
+
+_missing = object()
+
+
+def profiled(phase):
+    """
+    Декоратор методов TrajectoryCalculator. Если calculator.profiler не задан, метод
+    вызывается напрямую (одна проверка атрибута), иначе расчет замеряется профилировщиком.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            profiler = self.profiler
+            if profiler is None:
+                return method(self, *args, **kwargs)
+            return profiler.run(self, phase, method, args, kwargs)
+        return wrapper
+    return decorator
+
+
+class Profiler:
+    """
+    Счетчики и суммарное время по фазам расчета траектории.
+
+    На время внешнего расчета на объекты калькулятора ставятся замеряющие обертки
+    (правая часть уравнений, коэффициент сопротивления, таблица атмосферы), после
+    расчета исходные методы восстанавливаются. Общая для калькуляторов кэшированная
+    таблица атмосферы не меняется: калькулятор получает замеряющую ее обертку.
+    Время сопротивления входит во время правой части; "прочее" - шаг интегратора и
+    запись точек траектории (время вне всех замеряемых фаз).
+    """
+
+    phaseNames = {
+        'trajectory': "траектория",
+        'batch': "пакет",
+        'aim': "подбор угла",
+        'derivatives': "правая часть",
+        'batchDerivatives': "правая часть (пакет)",
+        'drag': "сопротивление",
+        'atmosphere': "атмосфера и g",
+        'other': "прочее",
+    }
+
+    def __init__(self):
+        self.counts = {}
+        self.times = {}
+        self.steps = 0
+        self.total = 0.0
+        self.depth = 0
+        self.patches = []
+        self.nesting = 0
+        self.measured = 0.0  # Время замеряемых фаз без вложенных друг в друга вызовов
+
+    def add(self, phase, elapsed, count=1):
+        self.counts[phase] = self.counts.get(phase, 0) + count
+        self.times[phase] = self.times.get(phase, 0.0) + elapsed
+
+    def attach(self, calculator):
+        """Ставит замеряющие обертки на калькулятор, его таблицу сопротивления и таблицу атмосферы."""
+        for target, name, phase in (
+                (calculator, 'acceleration', 'derivatives'),
+                (calculator, 'batchAcceleration', 'batchDerivatives'),
+                (calculator.dragTable, 'dragCoefficients', 'drag'),
+                ):
+            self.patches.append((target, name, target.__dict__.get(name, _missing)))
+            setattr(target, name, self.wrap(phase, getattr(target, name)))
+
+        # Таблица атмосферы общая для всех калькуляторов (кэш AtmosphereTable): замеряется обертка
+        table = calculator.environment()
+        environment = MeasuredEnvironment(table, self.wrap('atmosphere', table.at),
+                                          self.wrap('atmosphere', table.atArray))
+        self.patches.append((calculator, 'environment', calculator.__dict__.get('environment', _missing)))
+        calculator.environment = lambda: environment
+
+        # Методы, возвращающие функции для цикла интегратора: замеряются сами возвращенные функции
+        for target, name, phase in (
+                (calculator, 'accelerationFunction', 'derivatives'),
+                (calculator.dragTable, 'coefficientFunction', 'drag'),
+                ):
+            self.patches.append((target, name, target.__dict__.get(name, _missing)))
+            setattr(target, name, self.wrapFactory(phase, getattr(target, name)))
+
+    def detach(self):
+        """Восстанавливает исходные методы."""
+        for target, name, previous in reversed(self.patches):
+            if previous is _missing:
+                delattr(target, name)
+            else:
+                setattr(target, name, previous)
+        self.patches = []
+
+    def report(self):
+        """Возвращает список (фаза, число вызовов, время) в порядке убывания времени."""
+        phases = [(phase, self.counts[phase], self.times[phase]) for phase in self.times]
+        phases.append(('other', 0, max(0.0, self.total - self.measured)))
+        return sorted(phases, key=lambda phase: -phase[2])
+
+    def reset(self):
+        self.counts = {}
+        self.times = {}
+        self.steps = 0
+        self.total = 0.0
+        self.measured = 0.0
+
+    def run(self, calculator, phase, method, args, kwargs):
+        """Выполняет метод калькулятора с замером; обертки ставятся только внешним вызовом."""
+        outermost = self.depth == 0
+        if outermost:
+            self.attach(calculator)
+        self.depth += 1
+        startTime = time.perf_counter()
+        try:
+            result = method(calculator, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - startTime
+            self.depth -= 1
+            if outermost:
+                self.detach()
+                self.total += elapsed
+
+        self.add(phase, elapsed)
+        if isinstance(result, Trajectory):
+            self.steps += len(result) - 1
+        elif hasattr(result, 'lengths'):
+            self.steps += int((result.lengths - 1).sum())
+        return result
+
+    def wrap(self, phase, function):
+        """Возвращает обертку function, накапливающую число вызовов и время в фазе phase."""
+        counts, times = self.counts, self.times
+        counts.setdefault(phase, 0)
+        times.setdefault(phase, 0.0)
+
+        def wrapper(*args, **kwargs):
+            self.nesting += 1
+            startTime = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - startTime
+                times[phase] += elapsed
+                counts[phase] += 1
+                self.nesting -= 1
+                if self.nesting == 0:
+                    self.measured += elapsed
+        return wrapper
+
+    def wrapFactory(self, phase, factory):
+        """Возвращает обертку factory, замеряющую в фазе phase каждую созданную функцию."""
+        def wrapper(*args, **kwargs):
+            return self.wrap(phase, factory(*args, **kwargs))
+        return wrapper
+
+    def __str__(self):
+        lines = [f"Шагов: {self.steps}  |  Вызовов правой части: "
+                 f"{self.counts.get('derivatives', 0) + self.counts.get('batchDerivatives', 0)}"]
+        for phase, count, elapsed in self.report():
+            if phase in ('trajectory', 'batch', 'aim') or elapsed == 0.0:
+                continue
+            share = elapsed / self.total if self.total else 0.0
+            calls = f", {count} выз." if count else ""
+            lines.append(f"{self.phaseNames.get(phase, phase)}: {elapsed:.3f} с ({share:.0%}{calls})")
+        return "\n".join(lines)
+
+
+class MeasuredEnvironment:
+    """Обертка таблицы атмосферы (AtmosphereTable) с замеряемыми at и atArray; остальное - из таблицы."""
+
+    def __init__(self, table, at, atArray):
+        self.table = table
+        self.at = at
+        self.atArray = atArray
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
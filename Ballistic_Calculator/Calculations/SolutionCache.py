@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+from Calculations.Trajectory import Trajectory
+
+class SolutionCache:
+    """
+    Кэш решений с ключом по содержимому параметров расчета.
+
+    В памяти хранится LRU с ограничением по числу записей и объему траекторий; при заданном
+    каталоге записи дублируются в файлы .npz (столбцы траектории и JSON с параметрами и
+    результатами), а при превышении maxDiskBytes удаляются давно не использованные файлы.
+    Для подбора угла можно найти решение с ближайшими параметрами (теплый старт).
+    """
+
+    def __init__(self, maxEntries=64, maxMemoryBytes=64 * 2**20, directory=None, maxDiskBytes=256 * 2**20):
+        """
+        :param maxEntries: Наибольшее число записей в памяти
+        :param maxMemoryBytes: Наибольший объем траекторий в памяти (байт)
+        :param directory: Каталог для хранения на диске (None - только в памяти)
+        :param maxDiskBytes: Наибольший объем файлов в каталоге (байт)
+        """
+        self.maxEntries = maxEntries
+        self.maxMemoryBytes = maxMemoryBytes
+        self.directory = directory
+        self.maxDiskBytes = maxDiskBytes
+        self.entries = OrderedDict()  # ключ -> (траектория, результаты)
+        self.memoryBytes = 0
+        self.index = {}  # ключ -> (вид расчета, параметры, результаты) для поиска ближайшего решения
+
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            for name in os.listdir(directory):
+                if name.endswith('.npz'):
+                    try:
+                        with np.load(os.path.join(directory, name)) as data:
+                            meta = json.loads(str(data['meta']))
+                    except (OSError, ValueError, KeyError):
+                        continue
+                    self.index[name[:-4]] = (meta['kind'], meta['params'], meta['values'])
+
+    def evictDisk(self):
+        """Удаляет давно не использованные файлы, пока их объем больше maxDiskBytes."""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.npz'):
+                path = os.path.join(self.directory, name)
+                status = os.stat(path)
+                files.append((status.st_mtime, status.st_size, name))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, name in sorted(files):
+            if total <= self.maxDiskBytes:
+                break
+            os.remove(os.path.join(self.directory, name))
+            if name[:-4] not in self.entries:
+                self.index.pop(name[:-4], None)
+            total -= size
+
+    def get(self, key):
+        """Возвращает (траектория, результаты) или None, если решения нет ни в памяти, ни на диске."""
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+
+        path = self.path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                trajectory = Trajectory.fromColumns(*data['columns'])
+                meta = json.loads(str(data['meta']))
+        except (OSError, ValueError, KeyError):
+            return None
+        os.utime(path)
+        entry = (trajectory, meta['values'])
+        self.remember(key, entry)
+        return entry
+
+    @staticmethod
+    def key(kind, params):
+        """Возвращает ключ кэша: хэш вида расчета и всех его параметров."""
+        content = json.dumps({'kind': kind, 'params': params}, sort_keys=True)
+        return hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    def nearest(self, kind, params, exact=()):
+        """
+        Ищет результаты решения вида kind с ближайшими числовыми параметрами.
+        Параметры с именами из exact (и все нечисловые) должны совпадать точно.
+
+        :return: результаты ближайшего решения или None
+        """
+        best, bestDistance = None, np.inf
+        for storedKind, storedParams, values in self.index.values():
+            if storedKind != kind or storedParams.keys() != params.keys():
+                continue
+            distance = 0.0
+            for name, value in params.items():
+                stored = storedParams[name]
+                if name in exact or not isinstance(value, (int, float)) or not isinstance(stored, (int, float)):
+                    if stored != value:
+                        break
+                else:
+                    distance += abs(stored - value) / (abs(stored) + abs(value) + 1e-9)
+            else:
+                if distance < bestDistance:
+                    best, bestDistance = values, distance
+        return best
+
+    def path(self, key):
+        return None if self.directory is None else os.path.join(self.directory, f"{key}.npz")
+
+    def put(self, kind, params, trajectory, values=None):
+        """Сохраняет решение с параметрами params и возвращает его ключ."""
+        key = self.key(kind, params)
+        values = dict(values or {})
+        self.remember(key, (trajectory, values))
+        self.index[key] = (kind, params, values)
+
+        path = self.path(key)
+        if path is not None:
+            columns = np.array([trajectory.column(name) for name in Trajectory.fields])
+            meta = json.dumps({'kind': kind, 'params': params, 'values': values})
+            np.savez(path, columns=columns, meta=meta)
+            self.evictDisk()
+        return key
+
+    def remember(self, key, entry):
+        """Кладет запись в память и вытесняет самые старые записи сверх ограничений."""
+        if key in self.entries:
+            self.memoryBytes -= 8 * len(Trajectory.fields) * len(self.entries.pop(key)[0])
+        self.entries[key] = entry
+        self.memoryBytes += 8 * len(Trajectory.fields) * len(entry[0])
+
+        while len(self.entries) > 1 and (len(self.entries) > self.maxEntries or self.memoryBytes > self.maxMemoryBytes):
+            oldKey, (oldTrajectory, _) = self.entries.popitem(last=False)
+            self.memoryBytes -= 8 * len(Trajectory.fields) * len(oldTrajectory)
+            if self.directory is None:
+                self.index.pop(oldKey, None)
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,49 @@
+import numpy as np
+from sympy import lambdify, symbols, sympify
+
+class TargetPath:
+    """
+    Траектория цели x(t), y(t), z(t), заданная выражениями от t.
+
+    Выражения компилируются один раз (кэш по строке выражения) в две функции: для массивов
+    NumPy и для скаляров через math. Массив моментов времени вычисляется одним векторным
+    вызовом; поточечный расчет остается только для выражений, не поддерживающих массивы.
+    """
+
+    cache = {}
+    cacheSize = 32
+    t = symbols('t')
+
+    def __init__(self, xExpression, yExpression, zExpression):
+        self.expressions = (str(xExpression), str(yExpression), str(zExpression))
+        self.functions = tuple(self.compile(expression) for expression in self.expressions)
+
+    @classmethod
+    def compile(cls, expression):
+        """Возвращает пару (векторная функция, скалярная функция) для выражения (с кэшированием)."""
+        compiled = cls.cache.get(expression)
+        if compiled is None:
+            if len(cls.cache) >= cls.cacheSize:
+                del cls.cache[next(iter(cls.cache))]
+            parsed = sympify(expression)
+            compiled = (lambdify(cls.t, parsed, modules='numpy'), lambdify(cls.t, parsed, modules=['math', 'numpy']))
+            cls.cache[expression] = compiled
+        return compiled
+
+    def evaluate(self, times):
+        """Возвращает координаты цели для массива моментов времени массивом (3, n)."""
+        times = np.asarray(times, dtype=float)
+        positions = np.empty((3,) + times.shape)
+        for row, (vectorFunction, scalarFunction) in zip(positions, self.functions):
+            try:
+                row[...] = vectorFunction(times)
+            except (TypeError, ValueError):
+                row[...] = np.reshape([float(scalarFunction(t)) for t in times.ravel().tolist()], times.shape)
+        return positions
+
+    def __call__(self, t):
+        """Возвращает координаты цели (x, y, z) в момент t."""
+        return tuple(float(scalarFunction(t)) for _, scalarFunction in self.functions)
+
+    def __repr__(self):
+        return "TargetPath(x(t)={}, y(t)={}, z(t)={})".format(*self.expressions)
@@ -0,0 +1,127 @@
+import numpy as np
+
+from Calculations.TrajectoryPoint import TrajectoryPoint
+
+class Trajectory:
+    """
+    Траектория пули в виде столбцов float64 (структура массивов).
+
+    Столбцы выделяются заранее и растут геометрически, поэтому добавление точки не создает
+    объектов Python. Индексирование целым числом возвращает ленивое представление строки
+    (TrajectoryRow) с теми же полями, что у TrajectoryPoint.
+    """
+
+    __slots__ = ('_data', '_length')
+
+    fields = ('x', 'y', 'z', 'time', 'distance', 'velocity', 'mach', 'energy')
+    pointFields = ('x', 'y', 'z', 'time', 'distance', 'velocity', 'mach', 'drop', 'windage', 'energy')
+
+    def __init__(self, capacity=256):
+        self._data = np.empty((len(self.fields), max(1, capacity)))
+        self._length = 0
+
+    @classmethod
+    def fromColumns(cls, x, y, z, time, distance, velocity, mach, energy):
+        """Создает траекторию из готовых столбцов одинаковой длины."""
+        columns = np.array(np.broadcast_arrays(x, y, z, time, distance, velocity, mach, energy), dtype=float)
+        trajectory = cls(columns.shape[1])
+        trajectory._data[:, :columns.shape[1]] = columns
+        trajectory._length = columns.shape[1]
+        return trajectory
+
+    def append(self, x, y, z, time, distance, velocity, mach, energy):
+        """Добавляет точку траектории."""
+        if self._length == self._data.shape[1]:
+            grown = np.empty((self._data.shape[0], 2 * self._data.shape[1]))
+            grown[:, :self._length] = self._data
+            self._data = grown
+        self._data[:, self._length] = (x, y, z, time, distance, velocity, mach, energy)
+        self._length += 1
+
+    def column(self, name):
+        """Возвращает столбец по имени поля (представление без копирования)."""
+        if name == 'drop':
+            name = 'z'
+        elif name == 'windage':
+            name = 'y'
+        return self._data[self.fields.index(name), :self._length]
+
+    def extend(self, trajectory):
+        """Добавляет все точки другой траектории."""
+        length = self._length + len(trajectory)
+        if length > self._data.shape[1]:
+            grown = np.empty((self._data.shape[0], max(length, 2 * self._data.shape[1])))
+            grown[:, :self._length] = self._data[:, :self._length]
+            self._data = grown
+        self._data[:, self._length:length] = trajectory._data[:, :len(trajectory)]
+        self._length = length
+
+    def toArray(self):
+        """Возвращает матрицу (точка, поле) в порядке pointFields."""
+        return np.column_stack([self.column(name) for name in self.pointFields])
+
+    def toPoints(self):
+        """Возвращает список объектов TrajectoryPoint."""
+        return [TrajectoryPoint(*row) for row in self.toArray().tolist()]
+
+    def upTo(self, time):
+        """Возвращает часть траектории с моментами времени не позже time."""
+        return self[:int(np.searchsorted(self.time, time, side='right'))]
+
+    def __getitem__(self, index):
+        if isinstance(index, str):
+            return self.column(index)
+
+        if isinstance(index, (int, np.integer)):
+            if index < 0:
+                index += self._length
+            if not 0 <= index < self._length:
+                raise IndexError("Trajectory index out of range")
+            return TrajectoryRow(self, int(index))
+
+        columns = self._data[:, :self._length][:, index]
+        return Trajectory.fromColumns(*columns)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield TrajectoryRow(self, index)
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"Trajectory(points={self._length})"
+
+
+def _makeColumnProperty(name):
+    return property(lambda self: self.column(name), doc=f"Столбец '{name}'")
+
+
+for _name in Trajectory.pointFields:
+    setattr(Trajectory, _name, _makeColumnProperty(_name))
+
+
+class TrajectoryRow:
+    """Ленивое представление одной точки траектории с интерфейсом TrajectoryPoint."""
+
+    __slots__ = ('trajectory', 'index')
+
+    def __init__(self, trajectory, index):
+        self.trajectory = trajectory
+        self.index = index
+
+    def toPoint(self):
+        """Возвращает независимую копию точки в виде TrajectoryPoint."""
+        return TrajectoryPoint(*(getattr(self, name) for name in Trajectory.pointFields))
+
+    def __repr__(self):
+        return (f"TrajectoryPoint(time={self.time:.3f}s, distance={self.distance:.2f}m, velocity={self.velocity:.2f}m/s, "
+                f"mach={self.mach:.2f}, drop={self.drop:.2f}m, windage={self.windage:.2f}m, energy={self.energy:.2f}J)")
+
+
+def _makeRowProperty(name):
+    return property(lambda self: float(self.trajectory.column(name)[self.index]))
+
+
+for _name in Trajectory.pointFields:
+    setattr(TrajectoryRow, _name, _makeRowProperty(_name))
@@ -1,10 +1,16 @@
+import math
+
 import numpy as np
-from scipy.optimize import minimize
+from scipy.integrate import solve_ivp
 
+from Calculations.AimSolver import AimSolver
 from Calculations.Atmosphere import Atmosphere
+from Calculations.AtmosphereTable import AtmosphereTable
+from Calculations.BatchTrajectory import BatchTrajectory
 from Calculations.DragTables import DragTable
 from Calculations.Gravity import gravityAcceleration
-from Calculations.TrajectoryPoint import TrajectoryPoint
+from Calculations.Profiler import profiled
+from Calculations.Trajectory import Trajectory
 
 class TrajectoryCalculator:
     def __init__(self,
@@ -19,13 +25,15 @@ class TrajectoryCalculator:
 
         self.dragTable = DragTable()
         self.atmosphere = Atmosphere(pressure=pressure, temperature=temperature, humidity=humidity)
+        self.aimSolver = AimSolver(self)
+        self.profiler = None  # Profiler для замеров по фазам расчета (None - замеры выключены)
     
     def acceleration(self,
             vx, vy, vz,
             windX, windY,
             density, mach, model, g
             ):
-        relativeVelocity = np.sqrt((vx - windX)**2 + (vy - windY)**2 + vz**2)
+        relativeVelocity = math.sqrt((vx - windX)**2 + (vy - windY)**2 + vz**2)
         Fd = self.dragForce(mach, relativeVelocity, density, model)
 
         Fdx = Fd * ((vx - windX) / relativeVelocity)
@@ -38,42 +46,176 @@ class TrajectoryCalculator:
 
         return ax, ay, az
 
-    def ballisticTrajectory(self,
+    def accelerationFunction(self, windX, windY, model='G1'):
+        """
+        Возвращает функцию acceleration(z, vx, vy, vz, g) -> (ax, ay, az) на обычных float
+        с заранее выбранными атмосферой и функцией Cd(Mach). Формулы и порядок операций
+        те же, что в acceleration и dragForce.
+        """
+        sqrt = math.sqrt
+        atmosphereAt = self.environment().at
+        dragCoefficient = self.dragTable.coefficientFunction(model)
+        mass, area, formFactor = self.M, self.A, self.formFactor
+
+        def acceleration(z, vx, vy, vz, g):
+            _, density, soundVelocity = atmosphereAt(z)
+            mach = sqrt(vx**2 + vy**2 + vz**2) / soundVelocity
+            relativeX, relativeY = vx - windX, vy - windY
+            relativeVelocity = sqrt(relativeX**2 + relativeY**2 + vz**2)
+            Fd = 0.5 * formFactor * dragCoefficient(mach) * density * area * relativeVelocity**2
+            return (-(Fd * (relativeX / relativeVelocity)) / mass,
+                    -(Fd * (relativeY / relativeVelocity)) / mass,
+                    -g - (Fd * (vz / relativeVelocity)) / mass)
+
+        return acceleration
+
+    def adaptiveTrajectory(self,
             velocity, horizAngle, vertAngle,
             windSpeed, windAngle,
             dt=0.1, maxTime=100,
             minVelocity=30, minAltitude=0, maxDistance=np.inf,
-            model='G1',method='euler'
+            model='G1', rtol=1e-6, atol=1e-6
             ):
+        """
+        Интегрирует траекторию методом Дормана-Принса (RK45) с адаптивным шагом.
+        Моменты достижения minAltitude, minVelocity и maxDistance находятся как корни
+        событий, а траектория выдается с шагом dt по плотному выходу интегратора.
+        """
         horizRad = np.radians(horizAngle)
         vertRad  = np.radians(vertAngle)
 
         windAngleRad = np.radians(windAngle)
         windX = -windSpeed * np.cos(windAngleRad)
-        windY = -windSpeed * np.sin(windAngleRad) 
+        windY = -windSpeed * np.sin(windAngleRad)
 
-        vx = velocity * np.cos(vertRad) * np.cos(horizRad)
-        vy = velocity * np.cos(vertRad) * np.sin(horizRad)
-        vz = velocity * np.sin(vertRad)
+        initialState = [
+            0.0, 0.0, 0.0,
+            velocity * np.cos(vertRad) * np.cos(horizRad),
+            velocity * np.cos(vertRad) * np.sin(horizRad),
+            velocity * np.sin(vertRad),
+        ]
+
+        environment = self.environment()
+
+        def derivatives(t, state):
+            x, y, z, vx, vy, vz = state
+            g, density, soundVelocity = environment.at(z)
+            mach = np.sqrt(vx**2 + vy**2 + vz**2) / soundVelocity
+            ax, ay, az = self.acceleration(vx, vy, vz, windX, windY, density, mach, model, g)
+            return [vx, vy, vz, ax, ay, az]
+
+        def altitudeEvent(t, state):
+            return state[2] - minAltitude
+
+        def velocityEvent(t, state):
+            return np.sqrt(state[3]**2 + state[4]**2 + state[5]**2) - minVelocity
+
+        def distanceEvent(t, state):
+            return maxDistance - np.sqrt(state[0]**2 + state[1]**2)
+
+        events = [altitudeEvent, velocityEvent]
+        if np.isfinite(maxDistance):
+            events.append(distanceEvent)
+        for event in events:
+            event.terminal = True
+            event.direction = -1
+
+        if velocity > minVelocity and minAltitude <= 0 <= maxDistance and maxTime > 0:
+            startTime, startState, first = 0.0, initialState, None
+            if any(event(0.0, initialState) == 0.0 for event in events):
+                # Старт на плоскости события (например, minAltitude=0): событие сработало бы в t=0,
+                # поэтому, как в методах Эйлера и РК4, первый шаг dt делается без проверки событий
+                first = solve_ivp(
+                    derivatives, (0.0, min(dt, maxTime)), initialState,
+                    method='RK45', dense_output=True, rtol=rtol, atol=atol
+                )
+                startTime, startState = first.t[-1], first.y[:, -1]
+
+            if first is not None and (startTime >= maxTime or
+                                      any(event(startTime, startState) < 0.0 for event in events)):
+                solution = first
+            else:
+                solution = solve_ivp(
+                    derivatives, (startTime, maxTime), startState,
+                    method='RK45', events=events, dense_output=True,
+                    rtol=rtol, atol=atol
+                )
+            endTime = solution.t[-1]
+            times = np.arange(0.0, endTime, dt)
+            if times.size == 0 or endTime - times[-1] > 1e-9:
+                times = np.append(times, endTime)
+            states = solution.sol(times)
+            if first is not None and solution is not first:
+                firstStep = times <= startTime
+                states[:, firstStep] = first.sol(times[firstStep])
+            states[:, -1] = solution.y[:, -1]
+        else:
+            times = np.zeros(1)
+            states = np.array(initialState).reshape(6, 1)
+
+        x, y, z, vx, vy, vz = states
+        speed = np.sqrt(vx**2 + vy**2 + vz**2)
+        _, _, soundVelocity = environment.atArray(z)
+
+        return Trajectory.fromColumns(
+            x, y, z,
+            times, np.sqrt(x**2 + y**2), speed,
+            speed / soundVelocity, 0.5 * self.M * speed**2,
+        )
+
+    @profiled('trajectory')
+    def ballisticTrajectory(self,
+            velocity, horizAngle, vertAngle,
+            windSpeed, windAngle,
+            dt=0.1, maxTime=100,
+            minVelocity=30, minAltitude=0, maxDistance=np.inf,
+            model='G1',method='euler',
+            rtol=1e-6, atol=1e-6, stopCondition=None,
+            progressCallback=None, progressInterval=200
+            ):
+        # stopCondition(t, x, y, z) -> True прерывает расчет после очередной точки
+        # (для RK45 не используется: там остановка задается событиями интегратора)
+        # progressCallback(trajectory) вызывается каждые progressInterval точек и
+        # может прервать расчет исключением; для RK45 - один раз по готовой траектории
+        if method == 'RK45':
+            trajectory = self.adaptiveTrajectory(
+                velocity, horizAngle, vertAngle,
+                windSpeed, windAngle,
+                dt=dt, maxTime=maxTime,
+                minVelocity=minVelocity, minAltitude=minAltitude, maxDistance=maxDistance,
+                model=model, rtol=rtol, atol=atol
+            )
+            if progressCallback is not None:
+                progressCallback(trajectory)
+            return trajectory
+
+        horizRad = np.radians(horizAngle)
+        vertRad  = np.radians(vertAngle)
+
+        windAngleRad = np.radians(windAngle)
+        windX = float(-windSpeed * np.cos(windAngleRad))
+        windY = float(-windSpeed * np.sin(windAngleRad))
+
+        vx = float(velocity * np.cos(vertRad) * np.cos(horizRad))
+        vy = float(velocity * np.cos(vertRad) * np.sin(horizRad))
+        vz = float(velocity * np.sin(vertRad))
 
         x = y = z = t = 0.0
 
-        g = gravityAcceleration(latitude=self.latitude, altitude=self.elevation + z)
-        density, soundVelocity = self.atmosphere.atAltitude(z, g)
+        # В цикле только обычные float: скаляры NumPy на каждом шаге стоят дороже самой арифметики
+        sqrt = math.sqrt
+        environment = self.environment()
+        g, density, soundVelocity = environment.at(z)
         mach = velocity / soundVelocity
+        acceleration = self.accelerationFunction(windX, windY, model) if method == 'RK4' else None
 
-
-        trajectory = []
-        trajectory.append(TrajectoryPoint(
-                x=x, y=y, z=z, 
-                time=t, distance=0.0, velocity=velocity, mach=mach, 
-                drop=z, windage=y, energy=0.5 * self.M * velocity**2,
-            ))
+        trajectory = Trajectory(int(min(maxTime / dt, 4096)) + 2)
+        trajectory.append(x, y, z, t, 0.0, velocity, mach, 0.5 * self.M * velocity**2)
 
         while (t < maxTime and
                velocity > minVelocity and
                z >= minAltitude and
-               np.sqrt(x**2 + y**2) <= maxDistance
+               sqrt(x**2 + y**2) <= maxDistance
                ):
             if method == 'Euler':
                 ax, ay, az = self.acceleration(vx, vy, vz, windX, windY, density, mach, model, g)
@@ -87,46 +229,202 @@ class TrajectoryCalculator:
                 z += vz * dt
 
             elif method == 'RK4':
-                def derivatives(state):
-                    x, y, z, vx, vy, vz = state
-                    density, soundVelocity = self.atmosphere.atAltitude(z, g)
-                    velocity = np.sqrt(vx**2 + vy**2 + vz**2)
-                    mach = velocity / soundVelocity
-                    ax, ay, az = self.acceleration(vx, vy, vz, windX, windY, density, mach, model, g)
-                    return np.array([vx, vy, vz, ax, ay, az])
-                
+                # Стадии по компонентам на float; порядок операций тот же, что у векторной
+                # записи state + (k1 + 2*k2 + 2*k3 + k4) / 6, поэтому траектория не меняется
+                ax, ay, az = acceleration(z, vx, vy, vz, g)
+                k1x, k1y, k1z = dt * vx, dt * vy, dt * vz
+                k1vx, k1vy, k1vz = dt * ax, dt * ay, dt * az
+
+                vx2, vy2, vz2 = vx + 0.5 * k1vx, vy + 0.5 * k1vy, vz + 0.5 * k1vz
+                ax, ay, az = acceleration(z + 0.5 * k1z, vx2, vy2, vz2, g)
+                k2x, k2y, k2z = dt * vx2, dt * vy2, dt * vz2
+                k2vx, k2vy, k2vz = dt * ax, dt * ay, dt * az
+
+                vx3, vy3, vz3 = vx + 0.5 * k2vx, vy + 0.5 * k2vy, vz + 0.5 * k2vz
+                ax, ay, az = acceleration(z + 0.5 * k2z, vx3, vy3, vz3, g)
+                k3x, k3y, k3z = dt * vx3, dt * vy3, dt * vz3
+                k3vx, k3vy, k3vz = dt * ax, dt * ay, dt * az
+
+                vx4, vy4, vz4 = vx + k3vx, vy + k3vy, vz + k3vz
+                ax, ay, az = acceleration(z + k3z, vx4, vy4, vz4, g)
+                k4x, k4y, k4z = dt * vx4, dt * vy4, dt * vz4
+                k4vx, k4vy, k4vz = dt * ax, dt * ay, dt * az
+
+                x = x + (k1x + 2*k2x + 2*k3x + k4x) / 6.0
+                y = y + (k1y + 2*k2y + 2*k3y + k4y) / 6.0
+                z = z + (k1z + 2*k2z + 2*k3z + k4z) / 6.0
+                vx = vx + (k1vx + 2*k2vx + 2*k3vx + k4vx) / 6.0
+                vy = vy + (k1vy + 2*k2vy + 2*k3vy + k4vy) / 6.0
+                vz = vz + (k1vz + 2*k2vz + 2*k3vz + k4vz) / 6.0
+
+            else:
+                raise ValueError("Unknown integration method: choose 'Euler', 'RK4' or 'RK45'")
+            
+            t += dt
+            velocity = sqrt(vx**2 + vy**2 + vz**2)
+            distance = sqrt(x**2 + y**2)
+            g, density, soundVelocity = environment.at(z)
+            mach = velocity / soundVelocity
+            energy = 0.5 * self.M * velocity**2
+
+            trajectory.append(x, y, z, t, distance, velocity, mach, energy)
+
+            if stopCondition is not None and stopCondition(t, x, y, z):
+                break
+            if progressCallback is not None and len(trajectory) % progressInterval == 0:
+                progressCallback(trajectory)
+
+        return trajectory
+
+    @profiled('batch')
+    def ballisticTrajectoryBatch(self,
+            velocity, horizAngle, vertAngle,
+            windSpeed, windAngle,
+            dt=0.1, maxTime=100,
+            minVelocity=30, minAltitude=0, maxDistance=np.inf,
+            model='G1', method='RK4', keepTrajectories=True,
+            formFactor=None, atmosphere=None, crossings=()
+            ):
+        """
+        Рассчитывает пакет выстрелов одновременно, продвигая все выстрелы массивами NumPy.
+        Параметры выстрела - скаляры или массивы одинаковой длины. Выстрел исключается из
+        расчета, как только нарушено одно из условий остановки, как в ballisticTrajectory.
+
+        formFactor и atmosphere позволяют задать форм-фактор и атмосферу (Atmosphere с
+        массивами температуры, давления или влажности) отдельно для каждого выстрела.
+        crossings - пересечения, отслеживаемые за весь полет (см. BatchTrajectory).
+        """
+        velocity, horizAngle, vertAngle, windSpeed, windAngle = np.broadcast_arrays(*(
+            np.atleast_1d(np.asarray(value, dtype=float))
+            for value in (velocity, horizAngle, vertAngle, windSpeed, windAngle)
+        ))
+        shotCount = velocity.size
+
+        if formFactor is None:
+            formFactor = self.formFactor
+        else:
+            formFactor = np.broadcast_to(np.asarray(formFactor, dtype=float), (shotCount,)).copy()
+
+        horizRad = np.radians(horizAngle)
+        vertRad  = np.radians(vertAngle)
+
+        windAngleRad = np.radians(windAngle)
+        windX = -windSpeed * np.cos(windAngleRad)
+        windY = -windSpeed * np.sin(windAngleRad)
+
+        vx = velocity * np.cos(vertRad) * np.cos(horizRad)
+        vy = velocity * np.cos(vertRad) * np.sin(horizRad)
+        vz = velocity * np.sin(vertRad)
+
+        x = np.zeros(shotCount)
+        y = np.zeros(shotCount)
+        z = np.zeros(shotCount)
+        t = 0.0
+
+        environment = self.environment() if atmosphere is None else None
+        activeAtmosphere = atmosphere
+
+        def atmosphereAt(z, activeAtmosphere):
+            if environment is not None:
+                return environment.atArray(z)
+            g = gravityAcceleration(latitude=self.latitude, altitude=self.elevation + z)
+            density, soundVelocity = activeAtmosphere.atAltitude(z, g)
+            return g, density, soundVelocity
+
+        g, density, soundVelocity = atmosphereAt(z, activeAtmosphere)
+        mach = velocity / soundVelocity
+
+        result = BatchTrajectory(shotCount, keepTrajectories, crossings)
+        indices = np.arange(shotCount)
+        result.record(indices, (x, y, z, t, 0.0, velocity, mach, 0.5 * self.M * velocity**2))
+
+        def derivatives(state, windX, windY, g, formFactor, activeAtmosphere):
+            x, y, z, vx, vy, vz = state
+            _, density, soundVelocity = atmosphereAt(z, activeAtmosphere)
+            velocity = np.sqrt(vx**2 + vy**2 + vz**2)
+            mach = velocity / soundVelocity
+            ax, ay, az = self.batchAcceleration(vx, vy, vz, windX, windY, density, mach, model, g, formFactor)
+            return np.array([vx, vy, vz, ax, ay, az])
+
+        while t < maxTime:
+            running = ((velocity > minVelocity) &
+                       (z >= minAltitude) &
+                       (np.sqrt(x**2 + y**2) <= maxDistance))
+            if not running.all():
+                indices = indices[running]
+                if indices.size == 0:
+                    break
+                x, y, z, vx, vy, vz = x[running], y[running], z[running], vx[running], vy[running], vz[running]
+                windX, windY = windX[running], windY[running]
+                g, density, mach = g[running], density[running], mach[running]
+                if np.ndim(formFactor):
+                    formFactor = formFactor[running]
+                if atmosphere is not None:
+                    activeAtmosphere = atmosphere.select(indices)
+
+            if method == 'Euler':
+                ax, ay, az = self.batchAcceleration(vx, vy, vz, windX, windY, density, mach, model, g, formFactor)
+
+                vx = vx + ax * dt
+                vy = vy + ay * dt
+                vz = vz + az * dt
+
+                x = x + vx * dt
+                y = y + vy * dt
+                z = z + vz * dt
+
+            elif method == 'RK4':
                 state = np.array([x, y, z, vx, vy, vz])
-                k1 = dt * derivatives(state)
-                k2 = dt * derivatives(state + 0.5 * k1)
-                k3 = dt * derivatives(state + 0.5 * k2)
-                k4 = dt * derivatives(state + k3)
-                newState = state + (k1 + 2*k2 + 2*k3 + k4) / 6.0
-                x, y, z, vx, vy, vz = newState
+                shot = (windX, windY, g, formFactor, activeAtmosphere)
+                k1 = dt * derivatives(state, *shot)
+                k2 = dt * derivatives(state + 0.5 * k1, *shot)
+                k3 = dt * derivatives(state + 0.5 * k2, *shot)
+                k4 = dt * derivatives(state + k3, *shot)
+                x, y, z, vx, vy, vz = state + (k1 + 2*k2 + 2*k3 + k4) / 6.0
 
             else:
                 raise ValueError("Unknown integration method: choose 'Euler' or 'RK4'")
-            
+
             t += dt
             velocity = np.sqrt(vx**2 + vy**2 + vz**2)
             distance = np.sqrt(x**2 + y**2)
-            g = gravityAcceleration(latitude=self.latitude, altitude=self.elevation + z)
-            density, soundVelocity = self.atmosphere.atAltitude(z, g)
+            g, density, soundVelocity = atmosphereAt(z, activeAtmosphere)
             mach = velocity / soundVelocity
             energy = 0.5 * self.M * velocity**2
 
-            trajectory.append(TrajectoryPoint(
-                x=x, y=y, z=z, 
-                time=t, distance=distance, velocity=velocity, 
-                mach=mach, 
-                drop=z, windage=y, energy=energy,
-            ))
+            result.record(indices, (x, y, z, t, distance, velocity, mach, energy))
 
-        return np.array(trajectory)
+        return result
+
+    def batchAcceleration(self,
+            vx, vy, vz,
+            windX, windY,
+            density, mach, model, g,
+            formFactor=None
+            ):
+        """Векторизованный вариант acceleration для массивов скоростей."""
+        if formFactor is None:
+            formFactor = self.formFactor
+
+        relativeVelocity = np.sqrt((vx - windX)**2 + (vy - windY)**2 + vz**2)
+        Cd = self.dragTable.dragCoefficients(mach, model)
+        Fd = 0.5 * formFactor * Cd * density * self.A * relativeVelocity**2
+
+        ax = -Fd * ((vx - windX) / relativeVelocity) / self.M
+        ay = -Fd * ((vy - windY) / relativeVelocity) / self.M
+        az = -g - Fd * (vz / relativeVelocity) / self.M
+
+        return ax, ay, az
     
     def dragForce(self, mach, velocity, density, model='G1'):
         Cd = self.dragTable.dragCoefficient(mach, model)
         return 0.5 * self.formFactor * Cd * density * self.A * velocity**2
     
+    def environment(self):
+        """Возвращает таблицу атмосферы и гравитации по высоте для текущих условий (с кэшированием)."""
+        return AtmosphereTable.forConfiguration(self.atmosphere, self.latitude, self.elevation)
+
+    @profiled('aim')
     def findAimAngles(
             self,
             velocity,
@@ -134,68 +432,15 @@ class TrajectoryCalculator:
             targetFunction, targetRadius,
             dt=0.1, maxTime=100,
             minVelocity=30, minAltitude=0, maxDistance=np.inf,
-            model='G1', method='RK4'
+            model='G1', method='RK4',
+            solver='Nelder-Mead', initialAngles=None, progressCallback=None
         ):
-        def cost(angles):
-            horizAngle, vertAngle = angles
-            traj = self.ballisticTrajectory(
-                velocity, horizAngle, vertAngle,
-                windSpeed, windAngle,
-                dt=dt, maxTime=maxTime,
-                minVelocity=minVelocity,
-                minAltitude=minAltitude,
-                maxDistance=maxDistance,
-                model=model, method=method
-            )
-            minD2 = float('inf')
-            for p in traj:
-                tx, ty, tz = targetFunction(p.time)
-                d2 = (p.x - tx)**2 + (p.y - ty)**2 + (p.z - tz)**2
-                if d2 < minD2:
-                    minD2 = d2
-            return minD2
-
-        x0, y0, z0 = targetFunction(0)
-        horizAngle0 = np.degrees(np.arctan2(y0, x0))
-        vertAngle0 = np.degrees(np.arctan2(z0, np.hypot(x0, y0)))
-
-        result = minimize(
-            cost,
-            x0=[horizAngle0, vertAngle0],
-            method='Nelder-Mead',
-            options={'xatol':1e-3, 'fatol':1e-2, 'maxiter':200}
-        )
-
-        horizontalAngle, verticalAngle = result.x
-        finalTrajectory = self.ballisticTrajectory(
-            velocity, horizontalAngle, verticalAngle,
+        return self.aimSolver.solve(
+            velocity,
             windSpeed, windAngle,
+            targetFunction, targetRadius,
             dt=dt, maxTime=maxTime,
-            minVelocity=minVelocity,
-            minAltitude=minAltitude,
-            maxDistance=maxDistance,
-            model=model, method=method
+            minVelocity=minVelocity, minAltitude=minAltitude, maxDistance=maxDistance,
+            model=model, method=method,
+            solver=solver, initialAngles=initialAngles, progressCallback=progressCallback
         )
-
-        closestPoint = None
-        closestDistance = float('inf')
-        impactTime = finalTrajectory[-1].time
-
-        for point in finalTrajectory:
-            targetXt, targetYt, targetZt = targetFunction(point.time)
-            distance = np.sqrt(
-                (point.x - targetXt)**2 +
-                (point.y - targetYt)**2 +
-                (point.z - targetZt)**2
-            )
-
-            if distance <= targetRadius:
-                closestPoint = point
-                break
-            
-            if distance < closestDistance:
-                closestDistance = distance
-                closestPoint = point
-
-        impactTime = closestPoint.time
-        return horizontalAngle, verticalAngle, finalTrajectory, impactTime
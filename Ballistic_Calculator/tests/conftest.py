@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули калькулятора импортируются как Calculations.* из каталога приложения
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+
+@pytest.mark.parametrize('vertAngle', [0.0, -1.0])
+def test_launch_on_impact_plane_takes_first_step(vertAngle):
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    expected = calculator.ballisticTrajectory(800, 0, vertAngle, 0, 0, dt=0.1, minAltitude=0, method='RK4')
+    trajectory = calculator.ballisticTrajectory(800, 0, vertAngle, 0, 0, dt=0.1, minAltitude=0, method='RK45')
+
+    # Как и в методе РК4, событие в точке старта не срабатывает
+    assert len(trajectory) == len(expected) == 2
+    assert trajectory.column('time')[-1] == pytest.approx(0.1)
+    np.testing.assert_allclose(trajectory.column('z'), expected.column('z'), atol=1e-3)
+
+
+def test_rising_shot_stops_on_impact_plane():
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    trajectory = calculator.ballisticTrajectory(800, 0, 5.0, 0, 0, dt=0.1, minAltitude=0, method='RK45')
+
+    assert len(trajectory) > 2
+    assert trajectory.column('z')[-1] == pytest.approx(0.0, abs=1e-6)
+    assert np.all(trajectory.column('z')[1:-1] > 0.0)
@@ -0,0 +1,29 @@
+import numpy as np
+import pytest
+
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+
+@pytest.mark.parametrize('method', ['Euler', 'RK4'])
+def test_batch_matches_scalar_trajectories(method):
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    velocities = np.array([400.0, 600.0, 740.0, 900.0])
+    vertAngles = np.array([0.5, 3.0, 10.0, 30.0])
+    windSpeeds = np.array([0.0, 5.0, 2.0, 8.0])
+    windAngles = np.array([0.0, 90.0, 45.0, 270.0])
+
+    batch = calculator.ballisticTrajectoryBatch(
+        velocities, 15.0, vertAngles, windSpeeds, windAngles, dt=0.01, maxTime=30, method=method
+    )
+
+    for index in range(velocities.size):
+        expected = calculator.ballisticTrajectory(
+            velocities[index], 15.0, vertAngles[index], windSpeeds[index], windAngles[index],
+            dt=0.01, maxTime=30, method=method
+        )
+        shot = batch.shot(index)
+        assert len(shot.column('x')) == len(expected.column('x'))
+        for name in batch.fields:
+            np.testing.assert_allclose(shot.column(name), expected.column(name), rtol=1e-9, atol=1e-9)
+            column = batch.column(name)[:batch.lengths[index], index]
+            np.testing.assert_allclose(column, expected.column(name), rtol=1e-9, atol=1e-9)
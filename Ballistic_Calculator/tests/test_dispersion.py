@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from Calculations.Dispersion import dispersionAnalysis
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+
+class Cancelled(Exception):
+    pass
+
+
+def analysis(workers, **options):
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    return dispersionAnalysis(calculator, 740, 0, 1.5, 5, 90, targetDistance=600, shotCount=200,
+                              seed=1, workers=workers, chunkSize=50, dt=0.01, **options)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_progress_after_each_chunk(workers):
+    progress = []
+    result = analysis(workers, progressCallback=lambda done, total: progress.append((done, total)))
+
+    assert progress == [(50, 200), (100, 200), (150, 200), (200, 200)]
+    reference = analysis(1)
+    np.testing.assert_array_equal(result.impactY, reference.impactY)
+    np.testing.assert_array_equal(result.impactZ, reference.impactZ)
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_cancel_from_progress_callback(workers):
+    progress = []
+
+    def cancel(done, total):
+        progress.append(done)
+        raise Cancelled()
+
+    with pytest.raises(Cancelled):
+        analysis(workers, progressCallback=cancel)
+    assert progress == [50]
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+from scipy.interpolate import interp1d
+
+from Calculations.DragTables import DragTable, G1DragTable, G7DragTable
+
+
+@pytest.mark.parametrize('model, table', [('G1', G1DragTable), ('G7', G7DragTable)])
+def test_matches_linear_interpolation(model, table):
+    reference = interp1d(list(table.keys()), list(table.values()), kind="linear", fill_value="extrapolate")
+    dragTable = DragTable()
+
+    # Узлы таблицы, середины отрезков, случайные точки и экстраполяция за пределы таблицы
+    machs = np.array(sorted(table))
+    rng = np.random.default_rng(0)
+    points = np.concatenate((
+        machs, (machs[:-1] + machs[1:]) / 2, rng.uniform(-0.5, 6.0, 10000), [-1.0, 5.5, 8.0]
+    ))
+
+    expected = reference(points)
+    np.testing.assert_allclose(dragTable.dragCoefficients(points, model), expected, rtol=1e-12, atol=1e-12)
+    scalar = [dragTable.dragCoefficient(mach, model) for mach in points]
+    np.testing.assert_allclose(scalar, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_csv_model(tmp_path):
+    path = tmp_path / "drag.csv"
+    path.write_text("Mach,Cd\n0.0,0.2\n0.5,0.3\n1.5,0.1\n", encoding="utf-8")
+    dragTable = DragTable()
+    dragTable.loadCsv("Custom", path)
+
+    reference = interp1d([0.0, 0.5, 1.5], [0.2, 0.3, 0.1], kind="linear", fill_value="extrapolate")
+    points = np.linspace(-0.5, 2.0, 101)
+    np.testing.assert_allclose(dragTable.dragCoefficients(points, "Custom"), reference(points), atol=1e-12)
+    with pytest.raises(ValueError):
+        dragTable.dragCoefficient(1.0, "G2")
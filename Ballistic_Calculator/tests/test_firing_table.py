@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from Calculations.FiringTable import FiringTable
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+
+def descendingCrossing(trajectory, altitude):
+    """Дальность и время первого пересечения высоты altitude сверху вниз по точкам траектории."""
+    z, distance, time = (trajectory.column(name) for name in ('z', 'distance', 'time'))
+    for i in range(1, len(z)):
+        if z[i - 1] >= altitude > z[i]:
+            fraction = (altitude - z[i - 1]) / (z[i] - z[i - 1])
+            return (distance[i - 1] + fraction * (distance[i] - distance[i - 1]),
+                    time[i - 1] + fraction * (time[i] - time[i - 1]))
+    return np.nan, np.nan
+
+
+@pytest.mark.parametrize('impactAltitude', [0.0, 5.0, -5.0])
+def test_impact_matches_scalar_trajectory(impactAltitude):
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    table = FiringTable.build(calculator, 740, maxAngle=6, angleStep=1, impactAltitude=impactAltitude, dt=0.01)
+
+    for angle, distance, time in zip(table.angles, table.ranges, table.times):
+        trajectory = calculator.ballisticTrajectory(
+            740, 0, angle, 0, 0, dt=0.01, minAltitude=min(0.0, impactAltitude) - 1, method='RK4'
+        )
+        expectedDistance, expectedTime = descendingCrossing(trajectory, impactAltitude)
+        np.testing.assert_allclose([distance, time], [expectedDistance, expectedTime], rtol=1e-9, equal_nan=True)
+
+
+def test_raised_impact_plane():
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    table = FiringTable.build(calculator, 740, maxAngle=10, angleStep=1, impactAltitude=5.0, dt=0.01)
+
+    # Пологие выстрелы не поднимаются на 5 м, остальные падают на эту высоту на нисходящей ветви
+    assert np.isnan(table.ranges[:2]).all()
+    assert np.isfinite(table.ranges[2:]).all()
+    assert table.branch.size == len(table.angles) - 2
+    assert 2 < table.angleForRange(table.maxRange() * 0.9) < 10
+
+
+def test_aim_angles_for_off_axis_target():
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    table = FiringTable.build(calculator, 740, maxAngle=10, angleStep=0.25, dt=0.01)
+    x, y = 600.0, 300.0
+
+    horizAngle, vertAngle = table.aimAngles(x, 0.0, lateral=y)
+    assert horizAngle == pytest.approx(np.degrees(np.arctan2(y, x)))
+
+    # Без ветра выстрел по начальному приближению падает рядом с целью
+    trajectory = calculator.ballisticTrajectory(740, horizAngle, vertAngle, 0, 0, dt=0.01, minAltitude=-1, method='RK4')
+    distance, _ = descendingCrossing(trajectory, 0.0)
+    bearing = np.degrees(np.arctan2(trajectory.column('y')[-1], trajectory.column('x')[-1]))
+    assert distance == pytest.approx(np.hypot(x, y), abs=2.0)
+    assert bearing == pytest.approx(np.degrees(np.arctan2(y, x)), abs=0.05)
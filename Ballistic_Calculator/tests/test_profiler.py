@@ -0,0 +1,46 @@
+from Calculations.AtmosphereTable import AtmosphereTable
+from Calculations.Profiler import Profiler
+from Calculations.TrajectoryCalculator import TrajectoryCalculator
+
+
+def test_shared_atmosphere_table_is_not_patched():
+    profiled, plain = TrajectoryCalculator(formFactor=0.3), TrajectoryCalculator(formFactor=0.3)
+    table = plain.environment()
+    assert profiled.environment() is table
+
+    profiler = Profiler()
+    profiled.profiler = profiler
+
+    def trajectory(calculator):
+        return calculator.ballisticTrajectory(740, 0, 5, 0, 0, dt=0.01, method='RK4')
+
+    calls = []
+    original = profiled.accelerationFunction
+
+    def accelerationFunction(*args, **kwargs):
+        # Во время замера соседний калькулятор видит исходную таблицу без оберток
+        calls.append(vars(plain.environment()).keys() & {'at', 'atArray'})
+        return original(*args, **kwargs)
+
+    profiled.accelerationFunction = accelerationFunction
+    trajectory(profiled)
+
+    assert calls == [set()]
+    assert 'at' not in vars(table) and 'atArray' not in vars(table)
+    assert 'environment' not in vars(profiled)
+    assert profiler.counts['atmosphere'] > 0
+    assert isinstance(plain.environment(), AtmosphereTable)
+
+
+def test_other_excludes_nested_phases():
+    calculator = TrajectoryCalculator(formFactor=0.3)
+    profiler = Profiler()
+    calculator.profiler = profiler
+    calculator.ballisticTrajectory(740, 0, 5, 0, 0, dt=0.01, method='RK4')
+    calculator.ballisticTrajectoryBatch([600, 740], 0, [3, 5], 0, 0, dt=0.01)
+
+    phases = {phase: elapsed for phase, _, elapsed in profiler.report()}
+    # Атмосфера вызывается и внутри правой части: ее время не вычитается из "прочего" дважды
+    nested = phases['derivatives'] + phases['batchDerivatives'] + phases['atmosphere']
+    assert 0.0 < profiler.measured < nested
+    assert phases['other'] == profiler.total - profiler.measured
@@ -0,0 +1,384 @@
+import multiprocessing
+import os
+
+import numpy as np
+
+
+class AntColony:
+    """
+    Муравьиный алгоритм на матрицах феромона и эвристики.
+
+    Все муравьи строят маршруты одновременно: на каждом шаге для каждого муравья берется
+    строка весов (феромон^alpha * (1/длина)^beta) из текущей вершины, посещенные вершины
+    зануляются маской, и следующая вершина выбирается по накопленной сумме одним вызовом
+    для всех муравьев. Испарение и откладывание феромона - операции над матрицей.
+    Модификация ("память шаблонов") добавляет феромон на ребрах пропорционально тому,
+    сколько раз они входили в полные маршруты за все итерации.
+    """
+
+    def __init__(self, distances, antCount=20, alpha=1.0, beta=5.0, evaporationRate=0.5,
+                 pheromoneDeposit=100.0, useModification=False, seed=None):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param antCount: Количество муравьев
+        :param alpha: Влияние феромона
+        :param beta: Влияние расстояния
+        :param evaporationRate: Коэффициент испарения
+        :param pheromoneDeposit: Количество феромона, откладываемое муравьем
+        :param useModification: Учитывать память шаблонов
+        :param seed: Начальное значение генератора случайных чисел
+        """
+        self.distances = np.asarray(distances, dtype=float)
+        self.nodeCount = len(self.distances)
+        self.antCount = antCount
+        self.alpha = alpha
+        self.beta = beta
+        self.evaporationRate = evaporationRate
+        self.pheromoneDeposit = pheromoneDeposit
+        self.useModification = useModification
+        self.rng = np.random.default_rng(seed)
+
+        self.edgeMask = np.isfinite(self.distances)
+        with np.errstate(divide='ignore'):
+            self.heuristic = np.where(self.edgeMask, 1.0 / self.distances, 0.0)
+        self.pheromone = np.ones_like(self.distances)
+        self.patternMemory = np.zeros_like(self.distances)
+        self.weights = None
+
+        self.bestPath = None
+        self.bestDistance = np.inf
+
+    def acceptTour(self, path, distance):
+        """Принимает маршрут другой колонии: откладывает на нем феромон и запоминает, если он лучше."""
+        tour = np.asarray(path[:-1])
+        self.pheromone[tour, np.roll(tour, -1)] += self.pheromoneDeposit / distance
+        if distance < self.bestDistance:
+            self.bestPath, self.bestDistance = list(path), distance
+
+    def chooseNext(self, current, unvisited):
+        """
+        Выбирает следующую вершину для каждого муравья пропорционально весам ребер
+        в непосещенные вершины. Возвращает -1 для муравьев, которым некуда идти.
+        """
+        rows = self.weights[current] * unvisited
+        cumulative = np.cumsum(rows, axis=1)
+        totals = cumulative[:, -1]
+
+        # Порог в (0, total], поэтому выбирается вершина с положительным весом
+        thresholds = (1.0 - self.rng.random(len(current))) * totals
+        nextNodes = np.minimum((cumulative < thresholds[:, None]).sum(axis=1), self.nodeCount - 1)
+        return np.where(totals > 0.0, nextNodes, -1)
+
+    def constructTours(self):
+        """
+        Строит маршруты всех муравьев.
+
+        :return: (маршруты массивом (муравьи, вершины), длины замкнутых маршрутов;
+                  inf - муравей не обошел все вершины или не может вернуться в начало)
+        """
+        antCount, nodeCount = self.antCount, self.nodeCount
+        self.updateWeights()
+
+        ants = np.arange(antCount)
+        tours = np.empty((antCount, nodeCount), dtype=np.intp)
+        tours[:, 0] = self.rng.integers(nodeCount, size=antCount)
+        unvisited = np.ones((antCount, nodeCount), dtype=bool)
+        unvisited[ants, tours[:, 0]] = False
+        alive = np.ones(antCount, dtype=bool)
+
+        for step in range(1, nodeCount):
+            current = tours[:, step - 1]
+            nextNodes = self.chooseNext(current, unvisited)
+            alive &= nextNodes >= 0
+            nextNodes = np.where(alive, nextNodes, current)
+            tours[:, step] = nextNodes
+            unvisited[ants, nextNodes] = False
+
+        lengths = np.full(antCount, np.inf)
+        if alive.any():
+            closed = np.concatenate((tours[alive], tours[alive, :1]), axis=1)
+            lengths[alive] = self.distances[closed[:, :-1], closed[:, 1:]].sum(axis=1)
+        return tours, lengths
+
+    def iterate(self):
+        """Одна итерация: маршруты, испарение и откладывание феромона. Возвращает число полных маршрутов."""
+        tours, lengths = self.constructTours()
+        complete = np.isfinite(lengths)
+        tours, lengths = tours[complete], lengths[complete]
+
+        if len(lengths):
+            best = int(np.argmin(lengths))
+            if lengths[best] < self.bestDistance:
+                self.bestDistance = float(lengths[best])
+                self.bestPath = tours[best].tolist() + [int(tours[best, 0])]
+
+        self.pheromone *= 1.0 - self.evaporationRate
+        if len(lengths):
+            fromNodes, toNodes = tours, np.roll(tours, -1, axis=1)
+            deposits = np.broadcast_to((self.pheromoneDeposit / lengths)[:, None], tours.shape)
+            np.add.at(self.pheromone, (fromNodes, toNodes), deposits)
+            if self.useModification:
+                np.add.at(self.patternMemory, (fromNodes, toNodes), 1.0)
+
+        if self.useModification:
+            self.pheromone += (self.pheromoneDeposit * 0.1) * self.patternMemory
+        return len(lengths)
+
+    def run(self, iterations):
+        """Выполняет iterations итераций и возвращает (лучший путь, его длина)."""
+        for _ in range(iterations):
+            self.iterate()
+        return self.bestPath, self.bestDistance
+
+    def updateWeights(self):
+        """Пересчитывает веса ребер по феромону (один раз за итерацию)."""
+        self.weights = np.where(self.edgeMask, self.pheromone**self.alpha * self.heuristic**self.beta, 0.0)
+
+
+class MaxMinAntSystem(AntColony):
+    """
+    MAX-MIN Ant System для больших графов.
+
+    Феромон откладывает только один муравей - лучший на итерации, а каждые
+    bestDepositInterval итераций лучший за все время; феромон ограничен снизу и сверху
+    (tauMax = Q / (rho * L лучшего), tauMin по вероятности pBest построить лучший
+    маршрут), в начале равен tauMax. Если лучший маршрут не улучшается stagnationLimit
+    итераций, феромон сбрасывается к tauMax. Муравей выбирает вершину среди
+    candidateCount ближайших соседей текущей вершины (O(k) на шаг) и только если все
+    они посещены - лучшую по весу из остальных вершин.
+    """
+
+    def __init__(self, distances, antCount=20, alpha=1.0, beta=5.0, evaporationRate=0.2,
+                 pheromoneDeposit=1.0, candidateCount=15, bestDepositInterval=5,
+                 stagnationLimit=50, pBest=0.05, seed=None):
+        """
+        :param candidateCount: Число ближайших соседей в списке кандидатов вершины
+        :param bestDepositInterval: Через сколько итераций феромон откладывает лучший за все время
+        :param stagnationLimit: Итераций без улучшения до сброса феромона
+        :param pBest: Вероятность построить лучший маршрут при сошедшемся феромоне (для tauMin)
+
+        Остальные параметры - как у AntColony.
+        """
+        super().__init__(distances, antCount, alpha, beta, evaporationRate, pheromoneDeposit, seed=seed)
+        self.bestDepositInterval = bestDepositInterval
+        self.stagnationLimit = stagnationLimit
+        self.pBest = pBest
+
+        self.tauMin = 0.0
+        self.tauMax = None
+        self.candidateWeights = None
+        self.iteration = 0
+        self.stagnation = 0
+        self.restarts = 0
+
+        # Списки кандидатов: k ближайших соседей по возрастанию расстояния
+        nodeCount = self.nodeCount
+        k = max(1, min(candidateCount, nodeCount - 1))
+        nodes = np.arange(nodeCount)[:, None]
+        nearest = np.argpartition(self.distances, k - 1, axis=1)[:, :k]
+        order = np.argsort(self.distances[nodes, nearest], axis=1, kind='stable')
+        self.candidates = np.take_along_axis(nearest, order, axis=1)
+        self.candidateMask = self.edgeMask[nodes, self.candidates]
+        self.candidateHeuristic = self.heuristic[nodes, self.candidates]**self.beta
+
+    def acceptTour(self, path, distance):
+        """Лучший маршрут другой колонии феромон откладывает по обычному расписанию как лучший за все время."""
+        if distance < self.bestDistance:
+            self.bestPath, self.bestDistance = list(path), distance
+            self.stagnation = 0
+
+    def chooseNext(self, current, unvisited):
+        ants = np.arange(len(current))
+        candidates = self.candidates[current]
+        rows = self.candidateWeights[current] * unvisited[ants[:, None], candidates]
+        cumulative = np.cumsum(rows, axis=1)
+        totals = cumulative[:, -1]
+
+        thresholds = (1.0 - self.rng.random(len(current))) * totals
+        choice = np.minimum((cumulative < thresholds[:, None]).sum(axis=1), candidates.shape[1] - 1)
+        nextNodes = np.where(totals > 0.0, candidates[ants, choice], -1)
+
+        # Все кандидаты посещены: лучшая по весу из остальных вершин
+        stuck = np.flatnonzero(totals <= 0.0)
+        if len(stuck):
+            nodes = current[stuck]
+            rows = np.where(unvisited[stuck] & self.edgeMask[nodes],
+                            self.pheromone[nodes]**self.alpha * self.heuristic[nodes]**self.beta, 0.0)
+            best = np.argmax(rows, axis=1)
+            nextNodes[stuck] = np.where(rows[np.arange(len(stuck)), best] > 0.0, best, -1)
+        return nextNodes
+
+    def iterate(self):
+        """Одна итерация MMAS. Возвращает число полных маршрутов."""
+        tours, lengths = self.constructTours()
+        complete = np.isfinite(lengths)
+        tours, lengths = tours[complete], lengths[complete]
+        self.iteration += 1
+
+        improved = False
+        if len(lengths):
+            best = int(np.argmin(lengths))
+            if lengths[best] < self.bestDistance:
+                self.bestDistance = float(lengths[best])
+                self.bestPath = tours[best].tolist() + [int(tours[best, 0])]
+                improved = True
+
+        if self.bestPath is None:
+            return len(lengths)
+
+        rho = self.evaporationRate
+        first = self.tauMax is None
+        self.tauMax = self.pheromoneDeposit / (rho * self.bestDistance)
+        pBestRoot = self.pBest**(1.0 / self.nodeCount)
+        self.tauMin = self.tauMax * (1.0 - pBestRoot) / (max(self.nodeCount / 2.0 - 1.0, 1.0) * pBestRoot)
+
+        if first or self.stagnation >= self.stagnationLimit:
+            # Начало или застой: феромон на всех ребрах равен верхней границе
+            self.pheromone.fill(self.tauMax)
+            if self.stagnation >= self.stagnationLimit:
+                self.restarts += 1
+            self.stagnation = 0
+            return len(lengths)
+        self.stagnation = 0 if improved else self.stagnation + 1
+
+        if len(lengths) and self.iteration % self.bestDepositInterval:
+            depositTour, depositLength = tours[best], lengths[best]
+        else:
+            depositTour, depositLength = np.asarray(self.bestPath[:-1]), self.bestDistance
+
+        self.pheromone *= 1.0 - rho
+        self.pheromone[depositTour, np.roll(depositTour, -1)] += self.pheromoneDeposit / depositLength
+        np.clip(self.pheromone, self.tauMin, self.tauMax, out=self.pheromone)
+        return len(lengths)
+
+    def updateWeights(self):
+        """Веса только для списков кандидатов: O(n * k) за итерацию."""
+        nodes = np.arange(self.nodeCount)[:, None]
+        self.candidateWeights = np.where(
+            self.candidateMask, self.pheromone[nodes, self.candidates]**self.alpha * self.candidateHeuristic, 0.0
+        )
+
+
+def islandWorker(connection, distances, variant, options):
+    """
+    Процесс одной колонии. Получает (число итераций, маршрут другой колонии или None),
+    выполняет итерации и отправляет (лучший путь, длина); None - завершение.
+    """
+    colony = (MaxMinAntSystem if variant == 'maxmin' else AntColony)(distances, **options)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        iterations, migrant = message
+        if migrant is not None:
+            colony.acceptTour(*migrant)
+        colony.run(iterations)
+        connection.send((colony.bestPath, colony.bestDistance))
+    connection.close()
+
+
+class IslandColonies:
+    """
+    Несколько независимых колоний ("островов") в отдельных процессах.
+
+    Колонии отличаются seed, а также beta и коэффициентом испарения, и каждые
+    exchangeInterval итераций передают лучший маршрут следующей колонии по кольцу.
+    После каждого обмена общий лучший результат передается в callback, поэтому
+    расчет можно показывать по ходу. При islandCount=1 колония считается в текущем процессе.
+    """
+
+    betaFactors = (1.0, 0.75, 1.25)
+    evaporationFactors = (1.0, 1.5, 0.5)
+
+    def __init__(self, distances, islandCount=None, variant='basic', exchangeInterval=10, seed=None, **options):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param islandCount: Число колоний (по умолчанию - число ядер)
+        :param variant: 'basic' - AntColony, 'maxmin' - MaxMinAntSystem
+        :param exchangeInterval: Итераций между обменами лучшими маршрутами
+        :param seed: Начальное значение генераторов (колония i получает seed + i)
+        :param options: Параметры колоний (antCount, alpha, beta, ...)
+        """
+        self.distances = np.asarray(distances, dtype=float)
+        self.islandCount = islandCount or os.cpu_count() or 1
+        self.variant = variant
+        self.exchangeInterval = max(1, exchangeInterval)
+        self.islandOptions = [self.optionsFor(island, options, seed) for island in range(self.islandCount)]
+
+        self.bestPath = None
+        self.bestDistance = np.inf
+        self.bestIsland = None
+
+    def optionsFor(self, island, options, seed):
+        """Параметры колонии island: первая колония - с исходными параметрами."""
+        options = dict(options, seed=None if seed is None else seed + island)
+        beta = options.get('beta', 5.0)
+        evaporationRate = options.get('evaporationRate', 0.2 if self.variant == 'maxmin' else 0.5)
+        options['beta'] = beta * self.betaFactors[island % len(self.betaFactors)]
+        options['evaporationRate'] = min(0.95, evaporationRate * self.evaporationFactors[
+            island // len(self.betaFactors) % len(self.evaporationFactors)])
+        return options
+
+    def run(self, iterations, callback=None):
+        """
+        Выполняет iterations итераций в каждой колонии.
+
+        :param callback: Функция callback(лучший путь, длина, выполнено итераций) после каждого обмена
+        :return: (лучший путь, его длина)
+        """
+        if self.islandCount == 1:
+            colony = (MaxMinAntSystem if self.variant == 'maxmin' else AntColony)(self.distances, **self.islandOptions[0])
+            done = 0
+            while done < iterations:
+                step = min(self.exchangeInterval, iterations - done)
+                colony.run(step)
+                done += step
+                self.update([(colony.bestPath, colony.bestDistance)])
+                if callback is not None:
+                    callback(self.bestPath, self.bestDistance, done)
+            return self.bestPath, self.bestDistance
+
+        connections, processes = [], []
+        try:
+            for options in self.islandOptions:
+                connection, workerConnection = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=islandWorker, args=(workerConnection, self.distances, self.variant, options), daemon=True
+                )
+                process.start()
+                workerConnection.close()
+                connections.append(connection)
+                processes.append(process)
+
+            migrants = [None] * self.islandCount
+            done = 0
+            while done < iterations:
+                step = min(self.exchangeInterval, iterations - done)
+                for connection, migrant in zip(connections, migrants):
+                    connection.send((step, migrant))
+                results = [connection.recv() for connection in connections]
+                done += step
+
+                # Кольцо: колония i получает лучший маршрут колонии i - 1
+                migrants = [results[island - 1] if results[island - 1][0] is not None else None
+                            for island in range(self.islandCount)]
+                self.update(results)
+                if callback is not None:
+                    callback(self.bestPath, self.bestDistance, done)
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        return self.bestPath, self.bestDistance
+
+    def update(self, results):
+        for island, (path, distance) in enumerate(results):
+            if path is not None and distance < self.bestDistance:
+                self.bestPath, self.bestDistance, self.bestIsland = path, distance, island
@@ -1,8 +1,6 @@
-import sys, time
+import os, sys, time
 import numpy as np
 import pandas as pd
-import random
-import math
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel,
                              QVBoxLayout, QHBoxLayout, QWidget, QTextEdit, 
                              QTableWidget, QTableWidgetItem, QGraphicsScene, 
@@ -11,6 +9,13 @@ from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel,
 from PyQt5.QtGui import QPen, QBrush, QPainter, QPolygonF, QIcon
 from PyQt5.QtCore import Qt, QPointF
 
+# Общие для приложений TSP модули лежат в tsp_common в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from AntColony import AntColony, IslandColonies, MaxMinAntSystem
+from tsp_common.LocalSearch import LocalSearch
+from tsp_common.TSPGraph import TSPGraph
+
 class TSPApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -44,6 +49,8 @@ class TSPApp(QMainWindow):
         self.clearButton.clicked.connect(self.clearGraph)
 
         self.useModificationCheckBox = QCheckBox("Использовать модификацию")
+        self.useMaxMinCheckBox = QCheckBox("MAX-MIN Ant System (для больших графов)")
+        self.localSearchCheckBox = QCheckBox("Улучшить маршрут локальным поиском (2-opt, or-opt)")
 
         self.resultText = QTextEdit()
         self.resultText.setReadOnly(True)
@@ -78,6 +85,10 @@ class TSPApp(QMainWindow):
         self.betaInput = QLineEdit("5.0")
         self.evaporationRateInput = QLineEdit("0.5")
         self.pheromoneDepositInput = QLineEdit("100.0")
+        self.candidateCountInput = QLineEdit("15")
+        self.stagnationLimitInput = QLineEdit("50")
+        self.islandCountInput = QLineEdit("1")
+        self.exchangeIntervalInput = QLineEdit("10")
 
         paramsForm.addRow("Количество муравьев:", self.antCountInput)
         paramsForm.addRow("Итерации:", self.iterationsInput)
@@ -85,6 +96,10 @@ class TSPApp(QMainWindow):
         paramsForm.addRow("Beta (влияние расстояния):", self.betaInput)
         paramsForm.addRow("Коэффициент испарения:", self.evaporationRateInput)
         paramsForm.addRow("Количество феромона:", self.pheromoneDepositInput)
+        paramsForm.addRow("Кандидатов на вершину (MAX-MIN):", self.candidateCountInput)
+        paramsForm.addRow("Итераций до сброса (MAX-MIN):", self.stagnationLimitInput)
+        paramsForm.addRow("Колоний (процессов):", self.islandCountInput)
+        paramsForm.addRow("Обмен лучшим путем, итераций:", self.exchangeIntervalInput)
 
         leftLayout.addLayout(paramsForm)
 
@@ -96,6 +111,8 @@ class TSPApp(QMainWindow):
         leftLayout.addWidget(QLabel("Рассчитанный путь"))
         leftLayout.addWidget(self.resultText)
         leftLayout.addWidget(self.useModificationCheckBox)
+        leftLayout.addWidget(self.useMaxMinCheckBox)
+        leftLayout.addWidget(self.localSearchCheckBox)
         leftLayout.addWidget(self.calculateButton)
         leftLayout.addWidget(self.undoButton)
         leftLayout.addWidget(self.loadButton)
@@ -109,6 +126,7 @@ class TSPApp(QMainWindow):
 
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selectedNode = None
         self.history = []
@@ -119,12 +137,14 @@ class TSPApp(QMainWindow):
         dist = round(np.linalg.norm(np.array([x1, y1]) - np.array([x2, y2])), 2)
 
         self.edges.append([node1, node2, dist])
+        self.graph.addEdge(node1, node2, dist)
         self.history.append(("edge", node1, node2))
         self.redrawGraph()
 
     def addNode(self, pos):
         nodeId = len(self.nodes)
         self.nodes.append(nodeId)
+        self.graph.addNode(nodeId)
         self.nodePositions[nodeId] = (pos.x(), pos.y())
         self.history.append(("node", nodeId))
         self.redrawGraph()
@@ -153,6 +173,7 @@ class TSPApp(QMainWindow):
         self.table.setRowCount(0)
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selected_node = None
         self.history = []
@@ -209,6 +230,7 @@ class TSPApp(QMainWindow):
             for j in range(num_nodes):
                 if adjacency_matrix[i, j] > 0:
                     self.edges.append([i, j, adjacency_matrix[i, j]])
+        self.graph = TSPGraph.fromAdjacency(adjacency_matrix)
 
         df = pd.DataFrame(adjacency_matrix, columns=[f"V{j}" for j in range(num_nodes)], index=[f"V{i}" for i in range(num_nodes)])
         df.to_excel("adjacency_matrix.xlsx")
@@ -217,8 +239,7 @@ class TSPApp(QMainWindow):
         self.redrawGraph()
 
     def getDistance(self, i, j):
-        weights = [edge[2] for edge in self.edges if (edge[0] == i and edge[1] == j)]
-        return min(weights, default=float('inf'))
+        return self.graph.distance(i, j)
     
     def handleSolveTsp(self):
         try:
@@ -228,15 +249,29 @@ class TSPApp(QMainWindow):
             beta = float(self.betaInput.text())
             evaporationRate = float(self.evaporationRateInput.text())
             pheromoneDeposit = float(self.pheromoneDepositInput.text())
-
-            self.solveTsp(
-                antCount=antCount,
-                iterations=iterations,
-                alpha=alpha,
-                beta=beta,
-                evaporationRate=evaporationRate,
-                pheromoneDeposit=pheromoneDeposit
-            )
+            candidateCount = int(self.candidateCountInput.text())
+            stagnationLimit = int(self.stagnationLimitInput.text())
+            islandCount = int(self.islandCountInput.text())
+            exchangeInterval = int(self.exchangeIntervalInput.text())
+
+            # Пока идет расчет, окно обрабатывает события (ход расчета): граф и кнопки блокируются,
+            # чтобы не запустить вложенный расчет и не изменить граф под ним
+            self.setControlsEnabled(False)
+            try:
+                self.solveTsp(
+                    antCount=antCount,
+                    iterations=iterations,
+                    alpha=alpha,
+                    beta=beta,
+                    evaporationRate=evaporationRate,
+                    pheromoneDeposit=pheromoneDeposit,
+                    candidateCount=candidateCount,
+                    stagnationLimit=stagnationLimit,
+                    islandCount=islandCount,
+                    exchangeInterval=exchangeInterval
+                )
+            finally:
+                self.setControlsEnabled(True)
         except ValueError:
             self.resultText.setText("Ошибка: Проверьте корректность введённых параметров.")
 
@@ -263,6 +298,7 @@ class TSPApp(QMainWindow):
                 if df.iloc[i, j] > 0:
                     self.edges.append([i, j, df.iloc[i, j]])
                     self.history.append(("edge", i, j))
+        self.graph = TSPGraph.fromAdjacency(df.values)
 
         self.redrawGraph()
     
@@ -306,106 +342,58 @@ class TSPApp(QMainWindow):
             return
 
         num_nodes = len(self.nodes)
-        adjacency_matrix = np.zeros((num_nodes, num_nodes), dtype=int)
-
-        for node1, node2, weight in self.edges:
-            adjacency_matrix[node1, node2] = weight
+        adjacency_matrix = self.graph.toAdjacency().astype(int)
 
         df = pd.DataFrame(adjacency_matrix, columns=[f"V{j}" for j in range(num_nodes)], index=[f"V{i}" for i in range(num_nodes)])
         df.to_excel(filePath)
 
-    def solveTsp(self, antCount=20, iterations=100, alpha=1.0, beta=5.0, evaporationRate=0.5, pheromoneDeposit=100.0):
+    def setControlsEnabled(self, enabled):
+        """Включает или выключает кнопки, редактирование графа и таблицу ребер."""
+        widgets = (self.calculateButton, self.undoButton, self.loadButton, self.saveButton, self.clearButton,
+                   self.graphView, self.table)
+        for widget in widgets:
+            widget.setEnabled(enabled)
+
+    def showProgress(self, path, distance, done, iterations):
+        """Промежуточный результат многоколонного расчета после очередного обмена."""
+        if path:
+            self.resultText.setText(f"Итерация {done} из {iterations}, лучшая длина пути: {distance:.4f}")
+            self.drawSolution(path)
+        QApplication.processEvents()
+
+    def solveTsp(self, antCount=20, iterations=100, alpha=1.0, beta=5.0, evaporationRate=0.5, pheromoneDeposit=100.0,
+                 candidateCount=15, stagnationLimit=50, islandCount=1, exchangeInterval=10):
         if not self.edges:
             return
 
-        def totalDistance(path):
-            return sum(self.getDistance(path[i], path[i + 1]) for i in range(len(path) - 1))
-
-        nodeCount = len(self.nodes)
-        pheromone = { (edge[0], edge[1]): 1.0 for edge in self.edges }
-
-        useModification = self.useModificationCheckBox.isChecked()
-        patternMemory = {}
-
-        bestPath = None
-        bestDistance = float('inf')
+        options = dict(
+            antCount=antCount,
+            alpha=alpha,
+            beta=beta,
+            evaporationRate=evaporationRate,
+            pheromoneDeposit=pheromoneDeposit
+        )
+        if self.useMaxMinCheckBox.isChecked():
+            variant = 'maxmin'
+            options.update(candidateCount=candidateCount, stagnationLimit=stagnationLimit)
+        else:
+            variant = 'basic'
+            options.update(useModification=self.useModificationCheckBox.isChecked())
 
         startTime = time.perf_counter()
 
-        for iterationIndex in range(iterations):
-            allAntPaths = []
-            allAntDistances = []
-
-            for antIndex in range(antCount):
-                currentNode = random.choice(self.nodes)
-                visited = {currentNode}
-                path = [currentNode]
-
-                while len(visited) < nodeCount:
-                    possibleMoves = [(toNode, self.getDistance(currentNode, toNode)) 
-                                    for toNode in self.nodes 
-                                    if toNode not in visited and self.getDistance(currentNode, toNode) < float('inf')]
-
-                    if not possibleMoves:
-                        break
-
-                    moveProbabilities = []
-                    total = 0.0
-                    for toNode, distance in possibleMoves:
-                        pheromoneLevel = pheromone.get((currentNode, toNode), 1.0)
-                        heuristic = 1.0 / distance
-                        score = (pheromoneLevel ** alpha) * (heuristic ** beta)
-                        moveProbabilities.append((toNode, score))
-                        total += score
-
-                    if total == 0.0:
-                        break
-
-                    r = random.random()
-                    cumulative = 0.0
-                    for toNode, probability in moveProbabilities:
-                        cumulative += probability / total
-                        if r <= cumulative:
-                            nextNode = toNode
-                            break
-                    else:
-                        nextNode = moveProbabilities[-1][0]
-
-                    path.append(nextNode)
-                    visited.add(nextNode)
-                    currentNode = nextNode
-
-                if len(path) == nodeCount and self.getDistance(path[-1], path[0]) < float("inf"):
-                    path.append(path[0])
-                    distance = totalDistance(path)
-                    allAntPaths.append(path)
-                    allAntDistances.append(distance)
-
-                    if distance < bestDistance:
-                        bestDistance = distance
-                        bestPath = path
-
-            for edgeKey in pheromone:
-                pheromone[edgeKey] *= (1 - evaporationRate)
-
-            for path, distance in zip(allAntPaths, allAntDistances):
-                for i in range(len(path) - 1):
-                    edge = (path[i], path[i + 1])
-                    if edge in pheromone:
-                        pheromone[edge] += pheromoneDeposit / distance
-
-            if useModification:
-                for path in allAntPaths:
-                    for i in range(len(path) - 1):
-                        key = (path[i], path[i + 1])
-                        if key in patternMemory:
-                            patternMemory[key] += 1
-                        else:
-                            patternMemory[key] = 1
-
-                for (i, j), count in patternMemory.items():
-                    if (i, j) in pheromone:
-                        pheromone[i, j] += (pheromoneDeposit * 0.1) * count
+        if islandCount > 1:
+            colony = IslandColonies(self.graph.matrix, islandCount, variant, exchangeInterval, **options)
+            bestPath, bestDistance = colony.run(
+                iterations, callback=lambda path, distance, done: self.showProgress(path, distance, done, iterations)
+            )
+        else:
+            colony = (MaxMinAntSystem if variant == 'maxmin' else AntColony)(self.graph.matrix, **options)
+            bestPath, bestDistance = colony.run(iterations)
+
+        if bestPath and self.localSearchCheckBox.isChecked():
+            initialDistance = bestDistance
+            bestPath, bestDistance = LocalSearch(self.graph.matrix).improve(bestPath)
 
         endTime = time.perf_counter()
         elapsedTime = endTime - startTime
@@ -414,6 +402,12 @@ class TSPApp(QMainWindow):
             self.resultText.setText(f"Лучший путь: {' -> '.join(map(str, bestPath))}")
             self.resultText.append(f"Длина пути: {bestDistance:.4f}")
             self.resultText.append(f"Время выполнения: {elapsedTime:.4f} сек")
+            if self.localSearchCheckBox.isChecked():
+                self.resultText.append(f"Длина до локального поиска: {initialDistance:.4f}")
+            if isinstance(colony, IslandColonies):
+                self.resultText.append(f"Колоний: {colony.islandCount}, лучший путь нашла колония {colony.bestIsland + 1}")
+            elif isinstance(colony, MaxMinAntSystem):
+                self.resultText.append(f"Сбросов феромона при застое: {colony.restarts}")
             self.drawSolution(bestPath)
         else:
             self.resultText.setText("Невозможно найти путь, соединяющий все вершины.")
@@ -428,9 +422,11 @@ class TSPApp(QMainWindow):
             nodeId = lastAction[1]
             del self.nodePositions[nodeId]
             self.nodes.remove(nodeId)
+            self.graph.removeNode(nodeId)
         elif lastAction[0] == "edge":
             node1, node2 = lastAction[1], lastAction[2]
             self.edges = [edge for edge in self.edges if not (edge[0] == node1 and edge[1] == node2)]
+            self.graph.removeEdge(node1, node2)
 
         self.redrawGraph()
 
@@ -438,7 +434,12 @@ class TSPApp(QMainWindow):
         if col == 2:
             try:
                 newWeight = float(self.table.item(row, col).text())
+                node1, node2, oldWeight = self.edges[row]
                 self.edges[row][2] = newWeight
+                # При перерисовке таблицы длины не меняются - матрицу трогать не нужно
+                if newWeight != oldWeight:
+                    self.graph.setEdge(node1, node2, min(edge[2] for edge in self.edges
+                                                         if edge[0] == node1 and edge[1] == node2))
             except ValueError:
                 pass
 
@@ -0,0 +1,137 @@
+import multiprocessing
+import os
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+inf = float('inf')
+
+# Построитель маршрутов в процессе пула (создается один раз на процесс)
+workerEngine = None
+
+
+def initWorker(distances, points):
+    global workerEngine
+    workerEngine = NearestNeighbor(distances, points)
+
+
+def startsWorker(starts):
+    return workerEngine.startTours(starts)
+
+
+class NearestNeighbor:
+    """
+    Построение маршрутов методом ближайшего соседа.
+
+    По матрице расстояний следующая вершина - argmin строки текущей вершины, в которой
+    посещенные вершины замаскированы inf. Для полного евклидова графа можно передать
+    только координаты вершин (points): ближайшая непосещенная вершина ищется в k-d дереве,
+    а матрица n x n не строится. Если из текущей вершины нет ребер в непосещенные,
+    маршрут идет в непосещенную вершину с наименьшим номером и его длина становится inf.
+
+    Дерево нужно только для графов, матрица которых не помещается в память: если матрица
+    уже есть, поиск по ней быстрее (в 2-6 раз на графах до 8000 вершин).
+    """
+
+    def __init__(self, distances=None, points=None):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param points: Координаты вершин (n x 2) для полного евклидова графа
+        """
+        self.matrix = None if distances is None else np.asarray(distances, dtype=float)
+        self.points = None if points is None else np.asarray(points, dtype=float)
+        self.tree = None if self.points is None else cKDTree(self.points)
+        self.size = len(self.points) if self.matrix is None else len(self.matrix)
+
+    def allStarts(self, starts=None, processCount=1):
+        """
+        Маршруты из каждой вершины starts (по умолчанию - из всех), распределенные по
+        processCount процессам. Возвращает (лучший путь, его длина, длины по стартам).
+        """
+        starts = list(range(self.size)) if starts is None else list(starts)
+        processCount = max(1, min(processCount or os.cpu_count() or 1, len(starts)))
+
+        if processCount == 1:
+            results = [self.startTours(starts)]
+        else:
+            chunks = np.array_split(np.asarray(starts), processCount * 4)
+            with multiprocessing.Pool(processCount, initWorker, (self.matrix, self.points)) as pool:
+                results = pool.map(startsWorker, chunks)
+
+        startLengths = np.array([length for lengths, _ in results for length in lengths])
+        bestPath, bestDistance = None, inf
+        for _, (path, length) in results:
+            if length < bestDistance:
+                bestPath, bestDistance = path, length
+        return bestPath, bestDistance, startLengths
+
+    def matrixTour(self, start):
+        distances = self.matrix
+        visited = np.zeros(self.size, dtype=bool)
+        visited[start] = True
+        path = [start]
+        length = 0.0
+
+        for _ in range(self.size - 1):
+            row = np.where(visited, inf, distances[path[-1]])
+            nearest = int(np.argmin(row))
+            if row[nearest] == inf:
+                nearest = int(np.argmin(visited))
+            length += distances[path[-1], nearest]
+            path.append(nearest)
+            visited[nearest] = True
+
+        length += distances[path[-1], start]
+        path.append(start)
+        return path, length
+
+    def startTours(self, starts):
+        """Маршруты из вершин starts: (длины по стартам, (лучший путь, его длина))."""
+        lengths = []
+        bestPath, bestDistance = None, inf
+        for start in starts:
+            path, length = self.tour(int(start))
+            lengths.append(length)
+            if length < bestDistance:
+                bestPath, bestDistance = path, length
+        return lengths, (bestPath, bestDistance)
+
+    def tour(self, start):
+        """Замкнутый маршрут из вершины start и его длина."""
+        if self.matrix is None:
+            return self.treeTour(start)
+        return self.matrixTour(start)
+
+    def treeTour(self, start, neighborCount=8, maxNeighborCount=64):
+        points, tree = self.points, self.tree
+        visited = np.zeros(self.size, dtype=bool)
+        visited[start] = True
+        path = [start]
+        length = 0.0
+
+        for _ in range(self.size - 1):
+            current = points[path[-1]]
+            k = min(neighborCount, self.size)
+            while True:
+                distances, indices = tree.query(current, k=k)
+                free = ~visited[indices]
+                if free.any():
+                    position = int(np.argmax(free))
+                    nearest, distance = int(indices[position]), float(distances[position])
+                    break
+                if k >= min(maxNeighborCount, self.size):
+                    # Ближайшие вершины уже посещены - перебираем оставшиеся
+                    remaining = np.flatnonzero(~visited)
+                    offsets = np.hypot(*(points[remaining] - current).T)
+                    position = int(np.argmin(offsets))
+                    nearest, distance = int(remaining[position]), float(offsets[position])
+                    break
+                k = min(k * 2, self.size)
+
+            length += distance
+            path.append(nearest)
+            visited[nearest] = True
+
+        length += float(np.hypot(*(points[path[-1]] - points[start])))
+        path.append(start)
+        return path, length
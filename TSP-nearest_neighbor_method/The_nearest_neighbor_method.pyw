@@ -1,11 +1,19 @@
-import sys, time
+import os, sys, time
 import numpy as np
 import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel, QVBoxLayout, QHBoxLayout, QWidget,
-                             QTextEdit, QTableWidget, QTableWidgetItem, QGraphicsScene, QGraphicsView, QCheckBox)
+                             QTextEdit, QTableWidget, QTableWidgetItem, QGraphicsScene, QGraphicsView, QCheckBox,
+                             QFormLayout, QLineEdit)
 from PyQt5.QtGui import QPen, QBrush, QPainter, QPolygonF, QIcon
 from PyQt5.QtCore import Qt, QPointF
 
+# Общие для приложений TSP модули лежат в tsp_common в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tsp_common.LocalSearch import LocalSearch
+from NearestNeighbor import NearestNeighbor
+from tsp_common.TSPGraph import TSPGraph
+
 class TSPApp(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -33,6 +41,11 @@ class TSPApp(QMainWindow):
         self.clearButton.clicked.connect(self.clearGraph)
 
         self.useModificationCheckBox = QCheckBox("Использовать модификацию")
+        self.localSearchCheckBox = QCheckBox("Улучшить маршрут локальным поиском (2-opt, or-opt)")
+
+        paramsForm = QFormLayout()
+        self.processCountInput = QLineEdit("1")
+        paramsForm.addRow(f"Процессов для всех стартов (ядер: {os.cpu_count()}):", self.processCountInput)
 
         self.resultText = QTextEdit()
         self.resultText.setReadOnly(True)
@@ -61,6 +74,8 @@ class TSPApp(QMainWindow):
         leftLayout.addWidget(QLabel("Рассчитанный путь"))
         leftLayout.addWidget(self.resultText)
         leftLayout.addWidget(self.useModificationCheckBox)
+        leftLayout.addWidget(self.localSearchCheckBox)
+        leftLayout.addLayout(paramsForm)
         leftLayout.addWidget(self.calculateButton)
         leftLayout.addWidget(self.undoButton)
         leftLayout.addWidget(self.clearButton)
@@ -72,6 +87,7 @@ class TSPApp(QMainWindow):
 
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selectedNode = None
         self.history = []
@@ -82,12 +98,14 @@ class TSPApp(QMainWindow):
         dist = round(np.linalg.norm(np.array([x1, y1]) - np.array([x2, y2])), 2)
 
         self.edges.append([node1, node2, dist])
+        self.graph.addEdge(node1, node2, dist)
         self.history.append(("edge", node1, node2))
         self.redrawGraph()
 
     def addNode(self, pos):
         nodeId = len(self.nodes)
         self.nodes.append(nodeId)
+        self.graph.addNode(nodeId)
         self.nodePositions[nodeId] = (pos.x(), pos.y())
         self.history.append(("node", nodeId))
         self.redrawGraph()
@@ -116,6 +134,7 @@ class TSPApp(QMainWindow):
         self.table.setRowCount(0)
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selected_node = None
         self.history = []
@@ -172,6 +191,7 @@ class TSPApp(QMainWindow):
             for j in range(num_nodes):
                 if adjacency_matrix[i, j] > 0:
                     self.edges.append([i, j, adjacency_matrix[i, j]])
+        self.graph = TSPGraph.fromAdjacency(adjacency_matrix)
 
         df = pd.DataFrame(adjacency_matrix, columns=[f"V{j}" for j in range(num_nodes)], index=[f"V{i}" for i in range(num_nodes)])
         df.to_excel("adjacency_matrix.xlsx")
@@ -180,8 +200,7 @@ class TSPApp(QMainWindow):
         self.redrawGraph()
 
     def getDistance(self, i, j):
-        weights = [edge[2] for edge in self.edges if (edge[0] == i and edge[1] == j)]
-        return min(weights, default=float('inf'))
+        return self.graph.distance(i, j)
     
     def lockColumns(self):
         for row in range(self.table.rowCount()):
@@ -220,32 +239,27 @@ class TSPApp(QMainWindow):
 
         startTime = time.perf_counter()
 
-        bestPath = None
-        bestDistance = float("inf")
+        # Матрица графа уже построена, а перебор строки матрицы быстрее поиска в k-d дереве
+        engine = NearestNeighbor(self.graph.matrix)
 
+        startLengths = None
         if self.useModificationCheckBox.isChecked():
-            startNodes = self.nodes
+            try:
+                processCount = int(self.processCountInput.text())
+            except ValueError:
+                self.resultText.setText("Ошибка: Проверьте корректность введённых параметров.")
+                return
+            bestPath, bestDistance, startLengths = engine.allStarts(self.nodes, processCount)
         else:
-            startNodes = [self.nodes[0]] 
-
-        for start in startNodes:
-            path = [start]
-            unvisited = set(self.nodes) - {start}
-            totalDistance = 0
-
-            while unvisited:
-                nearest = min(unvisited, key=lambda x: self.getDistance(path[-1], x))
-                totalDistance += self.getDistance(path[-1], nearest)
-                path.append(nearest)
-                unvisited.remove(nearest)
-
-            totalDistance += self.getDistance(path[-1], start)
-            path.append(start)
-
-            if totalDistance < bestDistance:
-                bestDistance = totalDistance
-                bestPath = path
-       
+            bestPath, bestDistance = engine.tour(self.nodes[0])
+
+        if bestDistance == float("inf"):
+            bestPath = None
+
+        if bestPath and self.localSearchCheckBox.isChecked():
+            initialDistance = bestDistance
+            bestPath, bestDistance = LocalSearch(self.graph.matrix).improve(bestPath)
+
         endTime = time.perf_counter()
         elapsedTime = endTime - startTime
 
@@ -253,6 +267,15 @@ class TSPApp(QMainWindow):
             self.resultText.setText(f"Лучший путь: {' -> '.join(map(str, bestPath))}")
             self.resultText.append(f"Длина пути: {bestDistance:.4f}")
             self.resultText.append(f"Время выполнения: {elapsedTime:.4f} сек")
+            if self.localSearchCheckBox.isChecked():
+                self.resultText.append(f"Длина до локального поиска: {initialDistance:.4f}")
+            if startLengths is not None:
+                feasible = startLengths[np.isfinite(startLengths)]
+                self.resultText.append(
+                    f"Старты: {len(startLengths)}, без замкнутого пути: {len(startLengths) - len(feasible)}, "
+                    f"длины от {feasible.min():.4f} до {feasible.max():.4f}, "
+                    f"средняя {feasible.mean():.4f}, медиана {np.median(feasible):.4f}"
+                )
             self.drawSolution(bestPath)
         else:
             self.resultText.setText("Невозможно найти путь, соединяющий все вершины.")
@@ -267,9 +290,11 @@ class TSPApp(QMainWindow):
             nodeId = lastAction[1]
             del self.nodePositions[nodeId]
             self.nodes.remove(nodeId)
+            self.graph.removeNode(nodeId)
         elif lastAction[0] == "edge":
             node1, node2 = lastAction[1], lastAction[2]
             self.edges = [edge for edge in self.edges if not (edge[0] == node1 and edge[1] == node2)]
+            self.graph.removeEdge(node1, node2)
 
         self.redrawGraph()
 
@@ -277,7 +302,12 @@ class TSPApp(QMainWindow):
         if col == 2:
             try:
                 newWeight = float(self.table.item(row, col).text())
+                node1, node2, oldWeight = self.edges[row]
                 self.edges[row][2] = newWeight
+                # При перерисовке таблицы длины не меняются - матрицу трогать не нужно
+                if newWeight != oldWeight:
+                    self.graph.setEdge(node1, node2, min(edge[2] for edge in self.edges
+                                                         if edge[0] == node1 and edge[1] == node2))
             except ValueError:
                 pass
 
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from NearestNeighbor import NearestNeighbor
+
+
+def euclidean(points):
+    distances = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    np.fill_diagonal(distances, np.inf)
+    return distances
+
+
+@pytest.mark.parametrize('usePoints', [False, True])
+def test_parallel_starts_match_serial(usePoints):
+    rng = np.random.default_rng(0)
+    points = rng.random((120, 2)) * 800
+    engine = NearestNeighbor(points=points) if usePoints else NearestNeighbor(euclidean(points))
+
+    serialPath, serialDistance, serialLengths = engine.allStarts(processCount=1)
+    parallelPath, parallelDistance, parallelLengths = engine.allStarts(processCount=3)
+
+    assert parallelPath == serialPath
+    assert parallelDistance == serialDistance
+    np.testing.assert_array_equal(parallelLengths, serialLengths)
+
+
+def test_incomplete_graph_starts():
+    rng = np.random.default_rng(1)
+    distances = rng.random((40, 40)) * 10
+    distances[rng.random((40, 40)) < 0.6] = np.inf
+    engine = NearestNeighbor(distances)
+
+    serial = engine.allStarts(range(0, 40, 3), processCount=1)
+    parallel = engine.allStarts(range(0, 40, 3), processCount=2)
+    assert parallel[:2] == serial[:2]
+    np.testing.assert_array_equal(parallel[2], serial[2])
+    assert len(serial[2]) == len(range(0, 40, 3))
+
+
+def test_tree_tour_matches_matrix_tour():
+    rng = np.random.default_rng(2)
+    points = rng.random((300, 2)) * 800
+    matrixEngine, treeEngine = NearestNeighbor(euclidean(points)), NearestNeighbor(points=points)
+    for start in (0, 17, 299):
+        matrixPath, matrixLength = matrixEngine.tour(start)
+        treePath, treeLength = treeEngine.tour(start)
+        assert treePath == matrixPath
+        assert treeLength == pytest.approx(matrixLength)
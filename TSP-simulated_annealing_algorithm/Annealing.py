@@ -0,0 +1,347 @@
+import math
+import multiprocessing
+import os
+import random
+
+import numpy as np
+
+from CoolingSchedules import ExponentialSchedule, calibrateTemperature
+from TourMoves import TourMoves
+
+
+def dfsInitialPath(distances, generator=random):
+    """
+    Начальный маршрут обходом в глубину из случайной вершины: соседи перебираются
+    по возрастанию номера. Если обход не дает замкнутого маршрута по всем вершинам,
+    возвращается маршрут 0 -> 1 -> ... -> 0.
+    """
+    distances = np.asarray(distances, dtype=float)
+    nodes = list(range(len(distances)))
+    neighborsOf = [np.flatnonzero(np.isfinite(row)).tolist() for row in distances]
+
+    start = generator.choice(nodes)
+    path = [start]
+    visited = {start}
+    stack = [(start, list(neighborsOf[start]))]
+
+    while stack:
+        node, neighbors = stack[-1]
+
+        while neighbors:
+            neighbor = neighbors.pop(0)
+            if neighbor not in visited:
+                path.append(neighbor)
+                visited.add(neighbor)
+                stack.append((neighbor, list(neighborsOf[neighbor])))
+                break
+        else:
+            stack.pop()
+
+    if len(path) == len(nodes) and np.isfinite(distances[path[-1], start]):
+        path.append(start)
+        return path
+
+    return nodes + [nodes[0]]
+
+
+class AnnealingChain:
+    """
+    Одна цепочка имитации отжига: маршрут TourMoves, свой генератор случайных чисел,
+    счетчики предложенных и принятых ходов и ход последнего отжига (trace).
+    """
+
+    def __init__(self, distances, kinds=('swap',), seed=None, initialPath=None):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param kinds: Виды ходов TourMoves, из которых ход выбирается случайно
+        :param seed: Начальное значение генератора случайных чисел
+        :param initialPath: Начальный маршрут (по умолчанию - обход в глубину)
+        """
+        self.random = random.Random(seed)
+        self.moves = TourMoves(distances, initialPath or dfsInitialPath(distances, self.random))
+        self.kinds = kinds if len(self.moves.path) > 4 else ('swap',)
+        self.firstDistance = self.moves.length
+        self.bestPath = self.moves.path[:]
+        self.bestDistance = self.moves.length
+        self.proposed = 0
+        self.accepted = 0
+        self.temperature = None
+        self.iterations = 0
+        self.reheats = 0
+        self.trace = []
+
+    def anneal(self, schedule=None, maxIterations=None):
+        """
+        Отжиг по расписанию schedule (CoolingSchedules, по умолчанию - экспоненциальное с
+        T0 = 1000). Останавливается после maxIterations ходов или когда расписание замерзло
+        либо застряло и повторные нагревы исчерпаны; без maxIterations расписание должно
+        останавливаться само. После каждой эпохи в trace записываются номер хода, температура,
+        доля принятых ходов, текущая и лучшая длина. Возвращает число выполненных ходов.
+        """
+        schedule = schedule or ExponentialSchedule()
+        epochLength = schedule.epochLength or len(self.moves.path) - 1
+        self.trace = []
+        self.iterations = 0
+        if len(self.moves.path) < 4:
+            return 0
+
+        startTemperature = schedule.initialTemperature
+        if startTemperature is None:
+            startTemperature = calibrateTemperature(self.sampleDeltas(), schedule.calibrationAcceptance)
+        temperature = schedule.start(startTemperature)
+
+        iteration, stagnation, reheats = 0, 0, 0
+        lastBest = self.bestDistance
+        while maxIterations is None or iteration < maxIterations:
+            frozen = temperature <= schedule.minTemperature
+            stalled = schedule.stagnationEpochs is not None and stagnation >= schedule.stagnationEpochs
+            if frozen or stalled:
+                if reheats >= schedule.reheats:
+                    break
+                reheats += 1
+                stagnation = 0
+                temperature = schedule.start(startTemperature * schedule.reheatFactor ** reheats)
+
+            count = epochLength if maxIterations is None else min(epochLength, maxIterations - iteration)
+            proposed, accepted = self.proposed, self.accepted
+            self.step(temperature, count)
+            iteration += count
+
+            acceptance = (self.accepted - accepted) / max(1, self.proposed - proposed)
+            self.trace.append({
+                'iteration': iteration, 'temperature': temperature, 'acceptance': acceptance,
+                'length': self.moves.length, 'bestDistance': self.bestDistance,
+            })
+            if self.bestDistance < lastBest:
+                lastBest = self.bestDistance
+                stagnation = 0
+            else:
+                stagnation += 1
+
+            temperature = schedule.next(acceptance)
+
+        self.temperature = temperature
+        self.reheats = reheats
+        return iteration
+
+    def sampleDeltas(self, samples=200):
+        """Ухудшения длины от случайных ходов (для подбора температур); маршрут не меняется."""
+        deltas = []
+        for _ in range(samples):
+            delta = self.moves.delta(self.moves.randomMove(self.random.choice(self.kinds), self.random))
+            if 0 < delta < math.inf:
+                deltas.append(delta)
+        return deltas
+
+    def stats(self):
+        """Состояние цепочки для отчета и обмена между процессами."""
+        return {
+            'length': self.moves.length, 'bestPath': self.bestPath, 'bestDistance': self.bestDistance,
+            'firstDistance': self.firstDistance, 'proposed': self.proposed, 'accepted': self.accepted,
+            'temperature': self.temperature, 'iterations': self.iterations, 'reheats': self.reheats,
+            'trace': self.trace,
+        }
+
+    def step(self, temperature, count=1):
+        """count ходов при постоянной температуре temperature."""
+        moves, generator, kinds = self.moves, self.random, self.kinds
+        if len(moves.path) < 4:
+            return
+        self.temperature = temperature
+        self.iterations += count
+
+        for _ in range(count):
+            # Ищем ход, не использующий несуществующих ребер
+            for attempt in range(1000):
+                move = moves.randomMove(generator.choice(kinds), generator)
+                delta = moves.delta(move)
+
+                if delta < math.inf:
+                    break
+            else:
+                continue
+
+            self.proposed += 1
+            if delta <= 0 or generator.random() < math.exp(-delta / temperature):
+                moves.apply(move, delta)
+                self.accepted += 1
+
+                if moves.length < self.bestDistance:
+                    self.bestPath = moves.path[:]
+                    self.bestDistance = moves.length
+
+
+def annealingWorker(connection, distances, kinds, seed):
+    """
+    Процесс одной реплики. Команды: ('step', параметры AnnealingChain.step) и
+    ('anneal', параметры AnnealingChain.anneal); после каждой отправляет stats(). None - завершение.
+    """
+    chain = AnnealingChain(distances, kinds, seed)
+    while True:
+        message = connection.recv()
+        if message is None:
+            break
+        command, arguments = message
+        getattr(chain, command)(**arguments)
+        connection.send(chain.stats())
+    connection.close()
+
+
+class ParallelAnnealing:
+    """
+    Отжиг несколькими репликами в отдельных процессах.
+
+    mode='tempering' - параллельный отжиг: реплики идут при постоянных температурах
+    геометрической лестницы от temperatureMax до temperatureMin и каждые exchangeInterval
+    ходов соседние по лестнице реплики меняются температурами с вероятностью
+    min(1, exp((1/Ti - 1/Tj) * (Ei - Ej))), так что хорошие маршруты опускаются к
+    холодным температурам. mode='restarts' - независимые отжиги по расписанию из разных
+    начальных маршрутов. Результат - лучший маршрут всех реплик, статистика по каждой
+    реплике (replicaStats) и ход расчета (trace): для 'tempering' - по самой холодной
+    реплике после каждого обмена, для 'restarts' - реплики с лучшим маршрутом.
+    """
+
+    def __init__(self, distances, replicaCount=None, mode='tempering', kinds=('swap',), exchangeInterval=1000,
+                 temperatureMax=None, temperatureMin=None, seed=None):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param replicaCount: Число реплик и процессов (по умолчанию - число ядер)
+        :param mode: 'tempering' или 'restarts'
+        :param kinds: Виды ходов TourMoves
+        :param exchangeInterval: Ходов каждой реплики между обменами температурами
+        :param temperatureMax: Самая высокая температура (по умолчанию - средний рост длины от случайного хода)
+        :param temperatureMin: Самая низкая температура (по умолчанию temperatureMax / 1000)
+        :param seed: Начальное значение генераторов (реплика i получает seed + i)
+        """
+        self.distances = np.asarray(distances, dtype=float)
+        self.replicaCount = max(1, replicaCount or os.cpu_count() or 1)
+        self.mode = mode
+        self.kinds = kinds
+        self.exchangeInterval = max(1, exchangeInterval)
+        self.temperatureMax = temperatureMax
+        self.temperatureMin = temperatureMin
+        self.seeds = [None if seed is None else seed + replica for replica in range(self.replicaCount)]
+
+        self.bestPath = None
+        self.bestDistance = math.inf
+        self.replicaStats = []
+        self.trace = []
+
+    def exchange(self, states, temperatures, generator, parity):
+        """Обмен температурами соседних по лестнице реплик (пары с четным или нечетным началом)."""
+        order = sorted(range(self.replicaCount), key=lambda replica: -temperatures[replica])
+        for position in range(parity, self.replicaCount - 1, 2):
+            hot, cold = order[position], order[position + 1]
+            hotLength, coldLength = states[hot]['length'], states[cold]['length']
+            self.replicaStats[hot]['swapAttempts'] += 1
+            self.replicaStats[cold]['swapAttempts'] += 1
+
+            # Горячая реплика с более коротким маршрутом всегда уходит на холодную температуру
+            argument = (1 / temperatures[cold] - 1 / temperatures[hot]) * (coldLength - hotLength)
+            if not math.isfinite(coldLength) or argument >= 0 or generator.random() < math.exp(argument):
+                temperatures[hot], temperatures[cold] = temperatures[cold], temperatures[hot]
+                self.replicaStats[hot]['swaps'] += 1
+                self.replicaStats[cold]['swaps'] += 1
+
+    def ladder(self):
+        """Температуры реплик: геометрическая прогрессия от temperatureMax до temperatureMin."""
+        temperatureMax = self.temperatureMax
+        if temperatureMax is None:
+            deltas = AnnealingChain(self.distances, self.kinds, self.seeds[0]).sampleDeltas()
+            temperatureMax = float(np.mean(deltas)) if deltas else 1.0
+        temperatureMin = self.temperatureMin if self.temperatureMin is not None else temperatureMax / 1000
+        if self.replicaCount == 1:
+            return [temperatureMin]
+        return np.geomspace(temperatureMax, temperatureMin, self.replicaCount).tolist()
+
+    def run(self, maxIterations=10000, callback=None, schedule=None):
+        """
+        Выполняет расчет.
+
+        :param maxIterations: Наибольшее число ходов каждой реплики (None - до остановки расписания,
+            для 'tempering' - до 20 обменов подряд без улучшения)
+        :param callback: Функция callback(лучший путь, длина, выполнено ходов) после каждого обмена
+        :param schedule: Расписание CoolingSchedules для 'restarts'; для 'tempering' из него берется
+            только stagnationEpochs - число обменов без улучшения до остановки
+        :return: (лучший путь, его длина)
+        """
+        self.replicaStats = [{'replica': replica + 1, 'swapAttempts': 0, 'swaps': 0}
+                             for replica in range(self.replicaCount)]
+        self.trace = []
+        connections, processes = [], []
+        try:
+            for seed in self.seeds:
+                connection, workerConnection = multiprocessing.Pipe()
+                process = multiprocessing.Process(
+                    target=annealingWorker, args=(workerConnection, self.distances, self.kinds, seed), daemon=True
+                )
+                process.start()
+                workerConnection.close()
+                connections.append(connection)
+                processes.append(process)
+
+            if self.mode == 'restarts':
+                for connection in connections:
+                    connection.send(('anneal', {'schedule': schedule, 'maxIterations': maxIterations}))
+                states = [connection.recv() for connection in connections]
+                self.update(states)
+                self.trace = min(states, key=lambda state: state['bestDistance'])['trace']
+                if callback is not None:
+                    callback(self.bestPath, self.bestDistance, max(state['iterations'] for state in states))
+                return self.bestPath, self.bestDistance
+
+            temperatures = self.ladder()
+            generator = random.Random(self.seeds[0])
+            # Сходимость: столько обменов подряд без улучшения лучшего маршрута
+            stagnationLimit = schedule.stagnationEpochs if schedule is not None else None
+            if maxIterations is None and stagnationLimit is None:
+                stagnationLimit = 20
+            done, parity, stagnation, lastBest = 0, 0, 0, math.inf
+            while maxIterations is None or done < maxIterations:
+                count = self.exchangeInterval if maxIterations is None else min(self.exchangeInterval, maxIterations - done)
+                for connection, temperature in zip(connections, temperatures):
+                    connection.send(('step', {'temperature': temperature, 'count': count}))
+                previous = [(stats.get('proposed', 0), stats.get('accepted', 0)) for stats in self.replicaStats]
+                states = [connection.recv() for connection in connections]
+                done += count
+
+                self.update(states)
+                coldest = temperatures.index(min(temperatures))
+                proposed, accepted = previous[coldest]
+                self.trace.append({
+                    'iteration': done, 'temperature': temperatures[coldest],
+                    'acceptance': (states[coldest]['accepted'] - accepted) / max(1, states[coldest]['proposed'] - proposed),
+                    'length': states[coldest]['length'], 'bestDistance': self.bestDistance,
+                })
+                self.exchange(states, temperatures, generator, parity)
+                parity = 1 - parity
+                if callback is not None:
+                    callback(self.bestPath, self.bestDistance, done)
+
+                if self.bestDistance < lastBest:
+                    lastBest, stagnation = self.bestDistance, 0
+                else:
+                    stagnation += 1
+                if stagnationLimit is not None and stagnation >= stagnationLimit:
+                    break
+        finally:
+            for connection in connections:
+                try:
+                    connection.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+                connection.close()
+            for process in processes:
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+        return self.bestPath, self.bestDistance
+
+    def update(self, states):
+        for replica, state in enumerate(states):
+            if state['bestDistance'] < self.bestDistance:
+                self.bestPath, self.bestDistance = state['bestPath'], state['bestDistance']
+            self.replicaStats[replica].update(
+                (key, state[key]) for key in ('firstDistance', 'bestDistance', 'proposed', 'accepted', 'temperature',
+                                              'iterations', 'reheats')
+            )
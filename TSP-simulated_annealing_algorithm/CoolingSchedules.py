@@ -0,0 +1,119 @@
+import math
+
+import numpy as np
+
+
+def calibrateTemperature(deltas, acceptance=0.8):
+    """
+    Начальная температура, при которой среднее ухудшение длины из выборки deltas
+    принимается с вероятностью acceptance: T0 = -mean(delta) / ln(acceptance).
+    """
+    deltas = [delta for delta in deltas if 0 < delta < math.inf]
+    if not deltas:
+        return 1.0
+    return -float(np.mean(deltas)) / math.log(acceptance)
+
+
+class CoolingSchedule:
+    """
+    Расписание температуры для AnnealingChain.anneal.
+
+    Отжиг идет эпохами по epochLength ходов; после каждой эпохи расписание получает долю
+    принятых в ней ходов и возвращает новую температуру. Общие для всех расписаний правила:
+    начальная температура temperature (None - подбирается по выборке ходов так, чтобы среднее
+    ухудшение принималось с вероятностью calibrationAcceptance); при замерзании
+    (T <= minTemperature) или застое (stagnationEpochs эпох без улучшения) выполняется
+    повторный нагрев до T0 * reheatFactor ** номер нагрева, а когда нагревы (reheats)
+    исчерпаны - отжиг останавливается.
+    """
+
+    def __init__(self, temperature=None, minTemperature=1e-3, epochLength=1, reheats=0, reheatFactor=0.5,
+                 stagnationEpochs=None, calibrationAcceptance=0.8):
+        """
+        :param temperature: Начальная температура (None - подбор по выборке ходов)
+        :param minTemperature: Температура замерзания
+        :param epochLength: Ходов в эпохе (None - по числу вершин графа)
+        :param reheats: Сколько раз можно нагреть повторно
+        :param reheatFactor: Доля начальной температуры при нагреве (степень - номер нагрева)
+        :param stagnationEpochs: Эпох без улучшения до нагрева или остановки (None - не следить)
+        :param calibrationAcceptance: Вероятность принять среднее ухудшение при подборе T0
+        """
+        self.initialTemperature = temperature
+        self.minTemperature = minTemperature
+        self.epochLength = epochLength
+        self.reheats = reheats
+        self.reheatFactor = reheatFactor
+        self.stagnationEpochs = stagnationEpochs
+        self.calibrationAcceptance = calibrationAcceptance
+        self.temperature = temperature
+
+    def next(self, acceptance):
+        """Температура следующей эпохи по доле принятых ходов acceptance в прошедшей."""
+        raise NotImplementedError
+
+    def start(self, temperature):
+        """Начинает (или после нагрева продолжает) охлаждение с температуры temperature."""
+        self.temperature = temperature
+        return temperature
+
+
+class AdaptiveSchedule(CoolingSchedule):
+    """
+    Охлаждение по доле принятых ходов: целевая доля убывает от targetAcceptance в
+    targetDecay раз за эпоху, а температура умножается на coolingRate ** (доля / цель),
+    то есть падает быстрее, пока принимается больше целевого, и почти стоит, когда меньше.
+    """
+
+    def __init__(self, temperature=None, coolingRate=0.95, targetAcceptance=0.5, targetDecay=0.97,
+                 minTemperature=1e-3, epochLength=None, reheats=2, reheatFactor=0.5, stagnationEpochs=30,
+                 calibrationAcceptance=0.8):
+        super().__init__(temperature, minTemperature, epochLength, reheats, reheatFactor, stagnationEpochs,
+                         calibrationAcceptance)
+        self.coolingRate = coolingRate
+        self.targetAcceptance = targetAcceptance
+        self.targetDecay = targetDecay
+        self.target = targetAcceptance
+
+    def next(self, acceptance):
+        self.target *= self.targetDecay
+        self.temperature *= self.coolingRate ** min(max(acceptance / self.target, 0.1), 10.0)
+        return self.temperature
+
+    def start(self, temperature):
+        self.target = self.targetAcceptance
+        return super().start(temperature)
+
+
+class BoltzmannSchedule(CoolingSchedule):
+    """Больцмановское охлаждение T = scale / ln(1 + k), k - номер эпохи."""
+
+    def __init__(self, temperature=1000, scale=3, minTemperature=1e-3, epochLength=1, reheats=0, reheatFactor=0.5,
+                 stagnationEpochs=None, calibrationAcceptance=0.8):
+        super().__init__(temperature, minTemperature, epochLength, reheats, reheatFactor, stagnationEpochs,
+                         calibrationAcceptance)
+        self.scale = scale
+        self.epoch = 0
+
+    def next(self, acceptance):
+        self.temperature = self.scale / math.log(2 + self.epoch)
+        self.epoch += 1
+        return self.temperature
+
+    def start(self, temperature):
+        # Продолжаем закон с номера эпохи, на котором он опускается ниже temperature
+        self.epoch = max(0, math.ceil(math.expm1(min(self.scale / temperature, 700))) - 1)
+        return super().start(temperature)
+
+
+class ExponentialSchedule(CoolingSchedule):
+    """Экспоненциальное охлаждение T *= coolingRate после каждой эпохи."""
+
+    def __init__(self, temperature=1000, coolingRate=0.999, minTemperature=1e-3, epochLength=1, reheats=0,
+                 reheatFactor=0.5, stagnationEpochs=None, calibrationAcceptance=0.8):
+        super().__init__(temperature, minTemperature, epochLength, reheats, reheatFactor, stagnationEpochs,
+                         calibrationAcceptance)
+        self.coolingRate = coolingRate
+
+    def next(self, acceptance):
+        self.temperature *= self.coolingRate
+        return self.temperature
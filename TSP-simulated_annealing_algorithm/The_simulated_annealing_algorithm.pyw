@@ -1,16 +1,40 @@
-import sys, time
+import os, sys, time
 import numpy as np
 import pandas as pd
-import random
-import math
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QPushButton, QLabel,
                              QVBoxLayout, QHBoxLayout, QWidget, QTextEdit, 
                              QTableWidget, QTableWidgetItem, QGraphicsScene, 
-                             QGraphicsView, QCheckBox, QFileDialog)
+                             QGraphicsView, QCheckBox, QFileDialog, QComboBox,
+                             QFormLayout, QLineEdit)
 from PyQt5.QtGui import QPen, QBrush, QPainter, QPolygonF, QIcon
 from PyQt5.QtCore import Qt, QPointF
 
+# Общие для приложений TSP модули лежат в tsp_common в корне репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Annealing import AnnealingChain, ParallelAnnealing
+from CoolingSchedules import AdaptiveSchedule, BoltzmannSchedule, ExponentialSchedule
+from tsp_common.LocalSearch import LocalSearch
+from tsp_common.TSPGraph import TSPGraph
+
 class TSPApp(QMainWindow):
+    moveKinds = {
+        "Обмен двух вершин": ('swap',),
+        "Разворот участка (2-opt)": ('reverse',),
+        "Перенос участка (or-opt)": ('orOpt',),
+        "Все виды (случайный выбор)": ('swap', 'reverse', 'orOpt'),
+    }
+    annealingModes = {
+        "Одна цепочка": None,
+        "Параллельный отжиг (обмен температурами)": 'tempering',
+        "Независимые перезапуски": 'restarts',
+    }
+    coolingSchedules = {
+        "Экспоненциальное": ExponentialSchedule,
+        "По Больцману (модификация)": BoltzmannSchedule,
+        "Адаптивное (по доле принятых ходов)": AdaptiveSchedule,
+    }
+
     def __init__(self):
         super().__init__()
         self.initUI()
@@ -28,7 +52,7 @@ class TSPApp(QMainWindow):
         rightLayout = QVBoxLayout()
 
         self.calculateButton = QPushButton("Рассчитать")
-        self.calculateButton.clicked.connect(lambda: self.solveTsp())
+        self.calculateButton.clicked.connect(self.handleSolveTsp)
 
         self.undoButton = QPushButton("Отмена")
         self.undoButton.clicked.connect(self.undoAction)
@@ -39,10 +63,38 @@ class TSPApp(QMainWindow):
         self.saveButton = QPushButton("Сохранить граф в Excel")
         self.saveButton.clicked.connect(self.saveGraphToExcel)
 
+        self.saveTraceButton = QPushButton("Сохранить ход отжига в Excel")
+        self.saveTraceButton.clicked.connect(self.saveTraceToExcel)
+
         self.clearButton = QPushButton("Очистить")
         self.clearButton.clicked.connect(self.clearGraph)
 
-        self.useModificationCheckBox = QCheckBox("Использовать модификацию")
+        self.scheduleComboBox = QComboBox()
+        self.scheduleComboBox.addItems(list(self.coolingSchedules))
+
+        self.calibrateCheckBox = QCheckBox("Подбирать начальную температуру по выборке ходов")
+        self.localSearchCheckBox = QCheckBox("Улучшить маршрут локальным поиском (2-opt, or-opt)")
+
+        self.moveKindComboBox = QComboBox()
+        self.moveKindComboBox.addItems(list(self.moveKinds))
+
+        self.modeComboBox = QComboBox()
+        self.modeComboBox.addItems(list(self.annealingModes))
+
+        paramsForm = QFormLayout()
+        self.iterationsInput = QLineEdit("10000")
+        self.epochLengthInput = QLineEdit("1")
+        self.reheatsInput = QLineEdit("0")
+        self.stagnationEpochsInput = QLineEdit("0")
+        self.replicaCountInput = QLineEdit("4")
+        self.exchangeIntervalInput = QLineEdit("1000")
+
+        paramsForm.addRow("Итерации (0 - без ограничения):", self.iterationsInput)
+        paramsForm.addRow("Ходов в эпохе (0 - по числу вершин):", self.epochLengthInput)
+        paramsForm.addRow("Повторных нагревов:", self.reheatsInput)
+        paramsForm.addRow("Эпох без улучшения до нагрева/остановки (0 - нет):", self.stagnationEpochsInput)
+        paramsForm.addRow("Реплик (процессов):", self.replicaCountInput)
+        paramsForm.addRow("Обмен температурами, ходов:", self.exchangeIntervalInput)
 
         self.resultText = QTextEdit()
         self.resultText.setReadOnly(True)
@@ -70,11 +122,20 @@ class TSPApp(QMainWindow):
         leftLayout.addWidget(self.table)
         leftLayout.addWidget(QLabel("Рассчитанный путь"))
         leftLayout.addWidget(self.resultText)
-        leftLayout.addWidget(self.useModificationCheckBox)
+        leftLayout.addWidget(QLabel("Охлаждение"))
+        leftLayout.addWidget(self.scheduleComboBox)
+        leftLayout.addWidget(self.calibrateCheckBox)
+        leftLayout.addWidget(self.localSearchCheckBox)
+        leftLayout.addWidget(QLabel("Вид хода"))
+        leftLayout.addWidget(self.moveKindComboBox)
+        leftLayout.addWidget(QLabel("Режим"))
+        leftLayout.addWidget(self.modeComboBox)
+        leftLayout.addLayout(paramsForm)
         leftLayout.addWidget(self.calculateButton)
         leftLayout.addWidget(self.undoButton)
         leftLayout.addWidget(self.loadButton)
         leftLayout.addWidget(self.saveButton)
+        leftLayout.addWidget(self.saveTraceButton)
         leftLayout.addWidget(self.clearButton)
 
         mainLayout.addLayout(leftLayout, 1)
@@ -84,9 +145,11 @@ class TSPApp(QMainWindow):
 
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selectedNode = None
         self.history = []
+        self.trace = []
 
     def addEdge(self, node1, node2):
         x1, y1 = self.nodePositions[node1]
@@ -94,12 +157,14 @@ class TSPApp(QMainWindow):
         dist = round(np.linalg.norm(np.array([x1, y1]) - np.array([x2, y2])), 2)
 
         self.edges.append([node1, node2, dist])
+        self.graph.addEdge(node1, node2, dist)
         self.history.append(("edge", node1, node2))
         self.redrawGraph()
 
     def addNode(self, pos):
         nodeId = len(self.nodes)
         self.nodes.append(nodeId)
+        self.graph.addNode(nodeId)
         self.nodePositions[nodeId] = (pos.x(), pos.y())
         self.history.append(("node", nodeId))
         self.redrawGraph()
@@ -128,6 +193,7 @@ class TSPApp(QMainWindow):
         self.table.setRowCount(0)
         self.nodes = []
         self.edges = []
+        self.graph = TSPGraph()
         self.nodePositions = {}
         self.selected_node = None
         self.history = []
@@ -184,6 +250,7 @@ class TSPApp(QMainWindow):
             for j in range(num_nodes):
                 if adjacency_matrix[i, j] > 0:
                     self.edges.append([i, j, adjacency_matrix[i, j]])
+        self.graph = TSPGraph.fromAdjacency(adjacency_matrix)
 
         df = pd.DataFrame(adjacency_matrix, columns=[f"V{j}" for j in range(num_nodes)], index=[f"V{i}" for i in range(num_nodes)])
         df.to_excel("adjacency_matrix.xlsx")
@@ -192,9 +259,34 @@ class TSPApp(QMainWindow):
         self.redrawGraph()
 
     def getDistance(self, i, j):
-        weights = [edge[2] for edge in self.edges if (edge[0] == i and edge[1] == j)]
-        return min(weights, default=float('inf'))
+        return self.graph.distance(i, j)
     
+    def handleSolveTsp(self):
+        try:
+            maxIterations = int(self.iterationsInput.text())
+            replicaCount = int(self.replicaCountInput.text())
+            exchangeInterval = int(self.exchangeIntervalInput.text())
+            epochLength = int(self.epochLengthInput.text())
+            reheats = int(self.reheatsInput.text())
+            stagnationEpochs = int(self.stagnationEpochsInput.text())
+
+            # Пока идет расчет, окно обрабатывает события (ход расчета): граф и кнопки блокируются,
+            # чтобы не запустить вложенный расчет и не изменить граф под ним
+            self.setControlsEnabled(False)
+            try:
+                self.solveTsp(
+                    maxIterations=maxIterations or None,
+                    replicaCount=replicaCount,
+                    exchangeInterval=exchangeInterval,
+                    epochLength=epochLength or None,
+                    reheats=reheats,
+                    stagnationEpochs=stagnationEpochs or None
+                )
+            finally:
+                self.setControlsEnabled(True)
+        except ValueError:
+            self.resultText.setText("Ошибка: Проверьте корректность введённых параметров.")
+
     def loadGraphFromExcel(self):
         filePath, _ = QFileDialog.getOpenFileName(self, "Выбрать файл Excel", "", "Excel Files (*.xlsx *.xls)")
         if not filePath:
@@ -217,6 +309,7 @@ class TSPApp(QMainWindow):
                 if df.iloc[i, j] > 0:
                     self.edges.append([i, j, df.iloc[i, j]])
                     self.history.append(("edge", i, j))
+        self.graph = TSPGraph.fromAdjacency(df.values)
 
         self.redrawGraph()
     
@@ -260,105 +353,77 @@ class TSPApp(QMainWindow):
             return
 
         num_nodes = len(self.nodes)
-        adjacency_matrix = np.zeros((num_nodes, num_nodes), dtype=int)
-
-        for node1, node2, weight in self.edges:
-            adjacency_matrix[node1, node2] = weight
+        adjacency_matrix = self.graph.toAdjacency().astype(int)
 
         df = pd.DataFrame(adjacency_matrix, columns=[f"V{j}" for j in range(num_nodes)], index=[f"V{i}" for i in range(num_nodes)])
         df.to_excel(filePath)
 
-    def solveTsp(self, maxIterations=10000):
+    def saveTraceToExcel(self):
+        if not self.trace:
+            return
+
+        filePath, _ = QFileDialog.getSaveFileName(self, "Сохранить ход отжига", "", "Excel Files (*.xlsx *.xls)")
+        if not filePath:
+            return
+
+        df = pd.DataFrame(self.trace)[['iteration', 'temperature', 'acceptance', 'length', 'bestDistance']]
+        df.columns = ["Ход", "Температура", "Доля принятых ходов", "Длина пути", "Лучшая длина"]
+        df.to_excel(filePath, index=False)
+
+    def setControlsEnabled(self, enabled):
+        """Включает или выключает кнопки, редактирование графа и таблицу ребер."""
+        widgets = (self.calculateButton, self.undoButton, self.loadButton, self.saveButton, self.saveTraceButton,
+                   self.clearButton, self.graphView, self.table)
+        for widget in widgets:
+            widget.setEnabled(enabled)
+
+    def showProgress(self, path, distance, done, maxIterations):
+        """Промежуточный результат параллельного расчета после очередного обмена."""
+        if path:
+            total = f" из {maxIterations}" if maxIterations else ""
+            self.resultText.setText(f"Ход {done}{total}, лучшая длина пути: {distance:.4f}")
+            self.drawSolution(path)
+        QApplication.processEvents()
+
+    def solveTsp(self, maxIterations=10000, replicaCount=4, exchangeInterval=1000, epochLength=1, reheats=0,
+                 stagnationEpochs=None):
         if not self.edges:
             return
 
-        def totalDistance(path):
-            return sum(self.getDistance(path[i], path[i + 1]) for i in range(len(path) - 1))
-
-        def isValidSwap(path, i, j):
-            newPath = path[:]
-            newPath[i], newPath[j] = newPath[j], newPath[i]
-
-            if (self.getDistance(newPath[i - 1], newPath[i]) < float("inf") and
-                self.getDistance(newPath[i], newPath[i + 1]) < float("inf") and
-                self.getDistance(newPath[j - 1], newPath[j]) < float("inf") and
-                self.getDistance(newPath[j], newPath[j + 1]) < float("inf")):
-                return newPath
-            return None
-
-        def depthInitialPath():
-            start = random.choice(self.nodes)
-            path = [start]
-            visited = {start}
-            stack = [(start, [edge[1] for edge in self.edges if edge[0] == start])]
-            
-            while stack:
-                node, neighbors = stack[-1]
-                
-                while neighbors:
-                    neighbor = neighbors.pop(0)
-                    if neighbor not in visited and self.getDistance(node, neighbor) < float("inf"):
-                        path.append(neighbor)
-                        visited.add(neighbor)
-                        stack.append((neighbor, [edge[1] for edge in self.edges if edge[0] == neighbor]))
-                        break
-                else:
-                    stack.pop()
-            
-            if len(path) == len(self.nodes) and self.getDistance(path[-1], start) < float("inf"):
-                path.append(start)
-                return path
-    
-            return self.nodes + [self.nodes[0]] 
+        kinds = self.moveKinds[self.moveKindComboBox.currentText()]
+        mode = self.annealingModes[self.modeComboBox.currentText()]
+        scheduleClass = self.coolingSchedules[self.scheduleComboBox.currentText()]
+        if maxIterations is None and stagnationEpochs is None and scheduleClass is BoltzmannSchedule:
+            # Логарифмическое охлаждение не доходит до минимальной температуры за разумное время
+            self.resultText.setText("Ошибка: Задайте число итераций или эпох без улучшения.")
+            return
 
-        currentPath = depthInitialPath()
-        currentDistance = totalDistance(currentPath)
-        firstDistance = currentDistance
+        options = dict(epochLength=epochLength, reheats=reheats, stagnationEpochs=stagnationEpochs)
+        if self.calibrateCheckBox.isChecked():
+            options.update(temperature=None)
+        schedule = scheduleClass(**options)
 
         startTime = time.perf_counter()
 
-        bestPath = currentPath[:]
-        bestDistance = currentDistance
-
-        temperature = 1000
-        coolingRate = 0.999
-        minTemperature = 1e-3
-        iterationsPerTemp = 1
-
-        iteration = 0
-        while temperature > minTemperature and iteration < maxIterations:
-            for _ in range(iterationsPerTemp):
-                while True:
-                    i, j = sorted(random.randint(1, len(currentPath) - 2) for _ in range(2))
-                    newPath = isValidSwap(currentPath, i, j)
-
-                    if newPath:
-                        break
-
-                newDistance = totalDistance(newPath)
-                delta = newDistance - currentDistance
-
-                if delta <= 0:
-                    currentPath = newPath
-                    currentDistance = newDistance
-
-                    bestPath = newPath
-                    bestDistance = newDistance
-                    # print(f"{iteration} New best distance: {bestDistance}")
-
-                elif random.random() < math.exp(-(delta) / temperature):
-                    currentPath = newPath
-                    currentDistance = newDistance
-                    # print(f"{iteration} New distance: {newDistance}")
-                
-            if self.useModificationCheckBox.isChecked() :
-                temperature = 3 / math.log(1 + (iteration + 1))
-            else:
-                temperature *= coolingRate
-            
-            iteration += 1
-        
-        print(f"Iteration and first distance: {iteration} {firstDistance}")
+        if mode is None:
+            # Ходы оцениваются по изменению длины на затронутых ребрах, маршрут меняется на месте
+            chain = AnnealingChain(self.graph.matrix, kinds)
+            chain.anneal(schedule, maxIterations)
+            bestPath, bestDistance = chain.bestPath, chain.bestDistance
+            replicaStats = []
+            self.trace = chain.trace
+        else:
+            annealing = ParallelAnnealing(self.graph.matrix, replicaCount, mode, kinds, exchangeInterval)
+            bestPath, bestDistance = annealing.run(
+                maxIterations, schedule=schedule,
+                callback=lambda path, distance, done: self.showProgress(path, distance, done, maxIterations)
+            )
+            replicaStats = annealing.replicaStats
+            self.trace = annealing.trace
+
+        if bestPath and self.localSearchCheckBox.isChecked():
+            initialDistance = bestDistance
+            bestPath, bestDistance = LocalSearch(self.graph.matrix).improve(bestPath)
 
         endTime = time.perf_counter()
         elapsedTime = endTime - startTime
@@ -367,6 +432,20 @@ class TSPApp(QMainWindow):
             self.resultText.setText(f"Лучший путь: {' -> '.join(map(str, bestPath))}")
             self.resultText.append(f"Длина пути: {bestDistance:.4f}")
             self.resultText.append(f"Время выполнения: {elapsedTime:.4f} сек")
+            if self.localSearchCheckBox.isChecked():
+                self.resultText.append(f"Длина до локального поиска: {initialDistance:.4f}")
+            if mode is None:
+                self.resultText.append(f"Начальная длина: {chain.firstDistance:.4f}, ходов: {chain.iterations}, "
+                                       f"повторных нагревов: {chain.reheats}, "
+                                       f"конечная температура: {chain.temperature:.4g}")
+            for stats in replicaStats:
+                line = (f"Реплика {stats['replica']}: начальная длина {stats['firstDistance']:.4f}, "
+                        f"лучшая {stats['bestDistance']:.4f}, принято ходов {stats['accepted']} из {stats['proposed']}")
+                if mode == 'restarts':
+                    line += f", ходов {stats['iterations']}, нагревов {stats['reheats']}"
+                else:
+                    line += f", T = {stats['temperature']:.4g}, обменов {stats['swaps']} из {stats['swapAttempts']}"
+                self.resultText.append(line)
             self.drawSolution(bestPath)
         else:
             self.resultText.setText("Невозможно найти путь, соединяющий все вершины.")
@@ -381,9 +460,11 @@ class TSPApp(QMainWindow):
             nodeId = lastAction[1]
             del self.nodePositions[nodeId]
             self.nodes.remove(nodeId)
+            self.graph.removeNode(nodeId)
         elif lastAction[0] == "edge":
             node1, node2 = lastAction[1], lastAction[2]
             self.edges = [edge for edge in self.edges if not (edge[0] == node1 and edge[1] == node2)]
+            self.graph.removeEdge(node1, node2)
 
         self.redrawGraph()
 
@@ -391,7 +472,12 @@ class TSPApp(QMainWindow):
         if col == 2:
             try:
                 newWeight = float(self.table.item(row, col).text())
+                node1, node2, oldWeight = self.edges[row]
                 self.edges[row][2] = newWeight
+                # При перерисовке таблицы длины не меняются - матрицу трогать не нужно
+                if newWeight != oldWeight:
+                    self.graph.setEdge(node1, node2, min(edge[2] for edge in self.edges
+                                                         if edge[0] == node1 and edge[1] == node2))
             except ValueError:
                 pass
 
@@ -0,0 +1,154 @@
+import math
+
+import numpy as np
+
+inf = float('inf')
+
+
+class TourMoves:
+    """
+    Замкнутый маршрут с оценкой ходов по изменению длины.
+
+    Маршрут хранится списком path (path[0] == path[-1], начальная вершина не двигается),
+    ходы задаются позициями 1..n-1. Изменение длины считается только по затронутым
+    ребрам: обмен двух вершин, разворот участка (2-opt) и перенос участка из 1-3 вершин
+    в другое место без разворота (or-opt). inf - ход дает несуществующее ребро, -inf -
+    ход убирает несуществующее ребро текущего маршрута. Для несимметричного графа
+    разворот меняет направление ребер внутри участка; их длины берутся из префиксных
+    сумм по маршруту, которые пересчитываются только после принятых ходов.
+    """
+
+    def __init__(self, distances, path):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param path: Замкнутый маршрут (первая вершина повторена в конце)
+        """
+        self.matrix = np.asarray(distances, dtype=float)
+        self.distances = self.matrix.tolist()
+        self.symmetric = bool(np.array_equal(self.matrix, self.matrix.T))
+        self.path = list(path)
+        self.length = self.tourLength()
+        self.prefixes = None
+
+    def apply(self, move, delta):
+        """Выполняет ход (вид, аргументы) на месте и обновляет длину маршрута."""
+        kind, args = move
+        if kind == 'swap':
+            self.applySwap(*args)
+        elif kind == 'reverse':
+            self.applyReverse(*args)
+        else:
+            self.applyOrOpt(*args)
+        self.prefixes = None
+        self.length = self.length + delta if math.isfinite(self.length) and math.isfinite(delta) else self.tourLength()
+
+    def applyOrOpt(self, i, e, k):
+        path = self.path
+        segment = path[i:e + 1]
+        if k > e:
+            path[i:k + 1] = path[e + 1:k + 1] + segment
+        else:
+            path[k + 1:e + 1] = segment + path[k + 1:i]
+
+    def applyReverse(self, i, j):
+        self.path[i:j + 1] = self.path[i:j + 1][::-1]
+
+    def applySwap(self, i, j):
+        path = self.path
+        path[i], path[j] = path[j], path[i]
+
+    @staticmethod
+    def change(old, new):
+        """Изменение длины по сумме убранных и добавленных ребер с учетом несуществующих."""
+        if new == inf:
+            return inf
+        if old == inf:
+            return -inf
+        return new - old
+
+    def delta(self, move):
+        kind, args = move
+        if kind == 'swap':
+            return self.swapDelta(*args)
+        if kind == 'reverse':
+            return self.reverseDelta(*args)
+        return self.orOptDelta(*args)
+
+    def orOptDelta(self, i, e, k):
+        """Перенос участка позиций i..e за позицию k (k < i - 1 или k > e)."""
+        d, path = self.distances, self.path
+        before, first, last, after = path[i - 1], path[i], path[e], path[e + 1]
+        left, right = path[k], path[k + 1]
+        old = d[before][first] + d[last][after] + d[left][right]
+        new = d[before][after] + d[left][first] + d[last][right]
+        return self.change(old, new)
+
+    def randomMove(self, kind, random):
+        """Случайный ход вида kind ('swap', 'reverse', 'orOpt'); random - модуль random или его экземпляр."""
+        n = len(self.path) - 1
+        uniform = random.random
+        if kind == 'swap':
+            i, j = 1 + int((n - 1) * uniform()), 1 + int((n - 1) * uniform())
+            return 'swap', (i, j) if i <= j else (j, i)
+        if kind == 'reverse':
+            i, j = 1 + int((n - 1) * uniform()), 1 + int((n - 2) * uniform())
+            if j >= i:
+                j += 1
+            return 'reverse', (i, j) if i < j else (j, i)
+
+        length = 1 + int(min(3, n - 2) * uniform())
+        i = 1 + int((n - length) * uniform())
+        e = i + length - 1
+        k = int((n - length - 1) * uniform())
+        if k >= i - 1:
+            k += length + 1
+        return 'orOpt', (i, e, k)
+
+    def reverseDelta(self, i, j):
+        """Разворот участка позиций i..j (1 <= i < j <= n - 1)."""
+        d, path = self.distances, self.path
+        before, first, last, after = path[i - 1], path[i], path[j], path[j + 1]
+        old = d[before][first] + d[last][after]
+        new = d[before][last] + d[first][after]
+        if self.symmetric:
+            return self.change(old, new)
+
+        if self.prefixes is None:
+            self.updatePrefixes()
+        forward, backward, missingForward, missingBackward = self.prefixes
+        if missingBackward[j] - missingBackward[i]:
+            return inf
+        if missingForward[j] - missingForward[i]:
+            old = inf
+        return self.change(old + (forward[j] - forward[i]), new + (backward[j] - backward[i]))
+
+    def swapDelta(self, i, j):
+        """Обмен вершин на позициях i < j (i == j - ход без изменений)."""
+        if i == j:
+            return 0.0
+        d, path = self.distances, self.path
+        a, b = path[i], path[j]
+        before, after = path[i - 1], path[j + 1]
+        if j == i + 1:
+            old = d[before][a] + d[a][b] + d[b][after]
+            new = d[before][b] + d[b][a] + d[a][after]
+        else:
+            afterA, beforeB = path[i + 1], path[j - 1]
+            old = d[before][a] + d[a][afterA] + d[beforeB][b] + d[b][after]
+            new = d[before][b] + d[b][afterA] + d[beforeB][a] + d[a][after]
+        return self.change(old, new)
+
+    def tourLength(self):
+        d, path = self.distances, self.path
+        return sum(d[path[t]][path[t + 1]] for t in range(len(path) - 1))
+
+    def updatePrefixes(self):
+        """Префиксные суммы длин ребер маршрута в прямом и обратном направлении (без несуществующих)."""
+        path = np.asarray(self.path)
+        forward, backward = self.matrix[path[:-1], path[1:]], self.matrix[path[1:], path[:-1]]
+        prefixes = []
+        for lengths in (forward, backward):
+            prefixes.append(np.concatenate(([0.0], np.cumsum(np.where(np.isfinite(lengths), lengths, 0.0)))).tolist())
+        for lengths in (forward, backward):
+            prefixes.append(np.concatenate(([0], np.cumsum(~np.isfinite(lengths)))).tolist())
+        self.prefixes = prefixes
@@ -1,22 +1,48 @@
+import os
+
 import numpy as np
 import pandas as pd
 
-T0_exp = 1000
-cooling_rate = 0.999
+from Annealing import AnnealingChain
+from CoolingSchedules import AdaptiveSchedule, BoltzmannSchedule, ExponentialSchedule
+
+
+def temperatures(schedule, temperature, count):
+    """Температуры расписания по эпохам (доля принятых ходов на них не влияет)."""
+    values = [schedule.start(temperature)]
+    for _ in range(count - 1):
+        values.append(schedule.next(0.5))
+    return np.array(values)
+
+
+if __name__ == "__main__":
+    iterations = np.arange(0, 10001, 1000)
+
+    T_exp = temperatures(ExponentialSchedule(), 1000, iterations[-1] + 1)[iterations]
+    # Строка k - как в исходной таблице: T = 3 / ln(k + 2), то есть k + 1 эпох после начальной T0
+    T_boltz = temperatures(BoltzmannSchedule(), 1000, iterations[-1] + 2)[iterations + 1]
 
-T0_boltz = 3
+    data = {
+        "Итерация": iterations,
+        "T (Эксп.)": T_exp,
+        "P (Эксп.)": np.exp(-1 / T_exp),
+        "T (Больцм.)": T_boltz,
+        "P (Больцм.)": np.exp(-1 / T_boltz)
+    }
 
-iterations = np.arange(0, 10001, 1000)
+    df = pd.DataFrame(data)
 
-data = {
-    "Итерация": iterations,
-    "T (Эксп.)": T0_exp * (cooling_rate ** iterations),
-    "P (Эксп.)": np.exp(-1 / (T0_exp * (cooling_rate ** iterations))),
-    "T (Больцм.)": T0_boltz / np.log(1 + iterations + 1),
-    "P (Больцм.)": np.exp(-1 / (T0_boltz / np.log(1 + (iterations + 1))))
-}
+    # Ход адаптивного отжига с подбором начальной температуры на тестовом графе
+    graphPath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "TestGraphs", "1-50.xlsx")
+    adjacency = pd.read_excel(graphPath, index_col=0).values.astype(float)
+    distances = np.where(adjacency > 0, adjacency, np.inf)
+    chain = AnnealingChain(distances, ('swap', 'reverse', 'orOpt'), seed=0)
+    chain.anneal(AdaptiveSchedule())
 
-df = pd.DataFrame(data)
+    trace = pd.DataFrame(chain.trace)[['iteration', 'temperature', 'acceptance', 'length', 'bestDistance']]
+    trace.columns = ["Ход", "Температура", "Доля принятых ходов", "Длина пути", "Лучшая длина"]
 
-file_path = "cooling.xlsx"
-df.to_excel(file_path, index=False)
+    file_path = "cooling.xlsx"
+    with pd.ExcelWriter(file_path) as writer:
+        df.to_excel(writer, sheet_name="Расписания", index=False)
+        trace.to_excel(writer, sheet_name="Адаптивное", index=False)
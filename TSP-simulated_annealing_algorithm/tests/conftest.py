@@ -0,0 +1,7 @@
+import os
+import sys
+
+# Модули приложения импортируются напрямую из его каталога, общие - как tsp_common.*
+appDirectory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(appDirectory))
+sys.path.insert(0, appDirectory)
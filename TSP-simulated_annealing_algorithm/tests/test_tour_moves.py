@@ -0,0 +1,56 @@
+import math
+import random
+
+import numpy as np
+import pytest
+
+from TourMoves import TourMoves
+
+
+def lengthParts(distances, path):
+    """Число несуществующих ребер маршрута и сумма длин остальных."""
+    lengths = [distances[path[t], path[t + 1]] for t in range(len(path) - 1)]
+    return sum(1 for length in lengths if length == math.inf), math.fsum(l for l in lengths if l != math.inf)
+
+
+def randomGraph(rng, n, symmetric, missing):
+    distances = rng.random((n, n)) * 100
+    if symmetric:
+        distances = np.triu(distances, 1) + np.triu(distances, 1).T
+    holes = rng.random((n, n)) < missing
+    distances[holes | (holes.T if symmetric else False)] = math.inf
+    np.fill_diagonal(distances, math.inf)
+    return distances
+
+
+@pytest.mark.parametrize('symmetric', [True, False])
+@pytest.mark.parametrize('missing', [0.0, 0.3])
+def test_delta_matches_full_tour_length(symmetric, missing):
+    rng = np.random.default_rng(int(symmetric) * 2 + int(missing > 0))
+    generator = random.Random(0)
+    for _ in range(20):
+        n = int(rng.integers(5, 30))
+        distances = randomGraph(rng, n, symmetric, missing)
+        path = [0] + (1 + rng.permutation(n - 1)).tolist() + [0]
+        moves = TourMoves(distances, path)
+
+        for _ in range(500):
+            move = moves.randomMove(generator.choice(('swap', 'reverse', 'orOpt')), generator)
+            delta = moves.delta(move)
+            missingBefore, lengthBefore = lengthParts(distances, moves.path)
+            moves.apply(move, delta)
+            missingAfter, lengthAfter = lengthParts(distances, moves.path)
+
+            assert moves.path[0] == moves.path[-1] == 0
+            assert sorted(moves.path[:-1]) == list(range(n))
+            if delta == math.inf:
+                assert missingAfter > 0
+            elif delta == -math.inf:
+                assert missingAfter < missingBefore
+            else:
+                assert missingAfter == missingBefore
+                assert delta == pytest.approx(lengthAfter - lengthBefore, abs=1e-9)
+            if missingAfter == 0:
+                assert moves.length == pytest.approx(lengthAfter, abs=1e-6)
+            else:
+                assert moves.length == math.inf
@@ -0,0 +1,299 @@
+from collections import deque
+
+import numpy as np
+
+inf = float('inf')
+epsilon = 1e-9
+
+
+class LocalSearch:
+    """
+    Локальное улучшение замкнутого маршрута для ориентированных и неполных графов.
+
+    Ходы: 2-opt (разворот участка), or-opt (перенос участка из 1-3 вершин) и
+    or-3opt (обмен местами двух соседних участков без разворота - единственный чистый
+    3-opt ход, сохраняющий направление ребер). Кандидаты берутся из списков ближайших
+    соседей, а вершины, возле которых улучшений не нашлось, не рассматриваются, пока
+    рядом не изменится маршрут (don't-look bits). Для несимметричного графа разворот
+    учитывает длины обращенных ребер участка по префиксным суммам. inf - ребра нет:
+    ходы, убирающие несуществующие ребра без добавления новых, всегда принимаются,
+    а ходы, добавляющие несуществующие ребра, - никогда.
+
+    Маршрут хранится массивом с индексом позиций вершин; принятый ход выполняется
+    разворотами на месте, и позиции обновляются только у переставленных вершин.
+    """
+
+    def __init__(self, distances, neighborCount=10, moves=('twoOpt', 'orOpt', 'orThreeOpt')):
+        """
+        :param distances: Матрица расстояний (inf - ребра нет)
+        :param neighborCount: Размер списков ближайших соседей
+        :param moves: Используемые ходы (методы twoOpt, orOpt, orThreeOpt)
+        """
+        self.matrix = np.asarray(distances, dtype=float)
+        self.distances = self.matrix.tolist()
+        self.symmetric = bool(np.array_equal(self.matrix, self.matrix.T))
+        self.moves = moves
+
+        self.outgoing = self.nearest(self.matrix, neighborCount)
+        self.incoming = self.outgoing if self.symmetric else self.nearest(self.matrix.T, neighborCount)
+
+        self.tour = []
+        self.position = []
+        self.prefixes = None
+        self.active = deque()
+        self.queued = []
+
+    def activate(self, *nodes):
+        """Снимает don't-look bit с вершин, возле которых изменился маршрут."""
+        for node in nodes:
+            if not self.queued[node]:
+                self.queued[node] = True
+                self.active.append(node)
+
+    def improve(self, path):
+        """
+        Улучшает замкнутый маршрут path (первая вершина повторена в конце).
+        Возвращает (маршрут, длина); маршрут начинается с той же вершины.
+        """
+        path = list(path)
+        if len(path) > 4:
+            self.setTour(path[:-1])
+            self.active = deque(self.tour)
+            self.queued = [False] * len(self.matrix)
+            for node in self.tour:
+                self.queued[node] = True
+
+            while self.active:
+                node = self.active.popleft()
+                self.queued[node] = False
+                for move in self.moves:
+                    if getattr(self, move)(node):
+                        break
+
+            start = self.position[path[0]]
+            path = self.tour[start:] + self.tour[:start] + [path[0]]
+
+        d = self.distances
+        return path, sum(d[path[t]][path[t + 1]] for t in range(len(path) - 1))
+
+    @staticmethod
+    def nearest(matrix, neighborCount):
+        """Для каждой строки - до neighborCount столбцов с наименьшими конечными значениями по возрастанию."""
+        lists = []
+        for row in matrix:
+            candidates = np.flatnonzero(np.isfinite(row))
+            if len(candidates) > neighborCount:
+                candidates = candidates[np.argpartition(row[candidates], neighborCount - 1)[:neighborCount]]
+            lists.append(candidates[np.argsort(row[candidates], kind='stable')].tolist())
+        return lists
+
+    def offset(self, origin, node):
+        """На сколько позиций node идет после origin по маршруту."""
+        return (self.position[node] - self.position[origin]) % len(self.tour)
+
+    def orOpt(self, a):
+        """Перенос участка из 1-3 вершин, начинающегося с a, в другое место маршрута."""
+        d, tour, position = self.distances, self.tour, self.position
+        n = len(tour)
+        p = tour[position[a] - 1]
+
+        for length in range(1, 4):
+            if n < length + 3:
+                break
+            last = tour[(position[a] + length - 1) % n]
+            after = tour[(position[a] + length) % n]
+            segment = {tour[(position[a] + t) % n] for t in range(length)}
+            gain = d[p][a] + d[last][after] - d[p][after]
+            if not gain > epsilon:
+                continue
+
+            # Вставка c -> a ... last -> e
+            for c in self.incoming[a]:
+                if not gain - d[c][a] > epsilon:
+                    break
+                if c in segment or c == p:
+                    continue
+                e = tour[(position[c] + 1) % n]
+                if gain - d[c][a] - d[last][e] + d[c][e] > epsilon:
+                    self.relocate(a, length, c, False)
+                    self.activate(a, last, p, after, c, e)
+                    return True
+
+            if not self.symmetric:
+                continue
+            # Вставка c -> last ... a -> e (участок развернут)
+            for c in self.incoming[last]:
+                if not gain - d[c][last] > epsilon:
+                    break
+                if c in segment or c == p:
+                    continue
+                e = tour[(position[c] + 1) % n]
+                if gain - d[c][last] - d[a][e] + d[c][e] > epsilon:
+                    self.relocate(a, length, c, True)
+                    self.activate(a, last, p, after, c, e)
+                    return True
+        return False
+
+    def orThreeOpt(self, a):
+        """
+        Обмен участков: a -> b ... c -> d ... e -> f превращается в a -> d ... e -> b ... c -> f.
+        """
+        d, tour, position = self.distances, self.tour, self.position
+        n = len(tour)
+        b = tour[(position[a] + 1) % n]
+
+        for first in self.outgoing[a]:
+            gainFirst = d[a][b] - d[a][first]
+            if not gainFirst > epsilon:
+                break
+            offsetFirst = self.offset(a, first)
+            if offsetFirst < 2:
+                continue
+            c = tour[position[first] - 1]
+
+            for f in self.outgoing[c]:
+                gainSecond = gainFirst + d[c][first] - d[c][f]
+                if not gainSecond > epsilon:
+                    break
+                offsetF = self.offset(a, f) or n
+                if offsetF <= offsetFirst:
+                    continue
+                e = tour[position[f] - 1]
+                if gainSecond + d[e][f] - d[e][b] > epsilon:
+                    self.swapBlocks(position[a] + 1, offsetFirst - 1, offsetF - offsetFirst)
+                    self.activate(a, b, c, first, e, f)
+                    return True
+        return False
+
+    def relocate(self, start, length, target, reverse):
+        """Переносит участок из length вершин, начинающийся со start, за вершину target."""
+        self.swapBlocks(self.position[start], length, self.offset(start, target) - length + 1)
+        if reverse:
+            self.reverse(self.position[start], length)
+
+    def reversalChange(self, start, count):
+        """
+        Изменение длины внутренних ребер участка маршрута при его развороте: count ребер,
+        начиная с позиции start. inf - в обратную сторону ребра нет, -inf - разворот
+        убирает несуществующее ребро.
+        """
+        if self.symmetric or count <= 0:
+            return 0.0
+        if self.prefixes is None:
+            self.updatePrefixes()
+        sums = []
+        for lengths, missing in zip(self.prefixes[:2], self.prefixes[2:]):
+            total = self.segmentSum(lengths, start, count)
+            sums.append(inf if self.segmentSum(missing, start, count) else total)
+        forward, backward = sums
+        if backward == inf:
+            return inf
+        if forward == inf:
+            return -inf
+        return backward - forward
+
+    def reverse(self, start, count):
+        """Разворачивает на месте count вершин маршрута, начиная с позиции start (по циклу)."""
+        tour, position = self.tour, self.position
+        n = len(tour)
+        i, j = start % n, (start + count - 1) % n
+        for _ in range(count // 2):
+            tour[i], tour[j] = tour[j], tour[i]
+            position[tour[i]] = i
+            position[tour[j]] = j
+            i = i + 1 if i + 1 < n else 0
+            j = j - 1 if j > 0 else n - 1
+        self.prefixes = None
+
+    def reverseSegment(self, start, count):
+        """
+        Разворот участка для 2-opt. В симметричном графе вместо длинного участка
+        разворачивается остальной маршрут: обход меняет направление, но длина та же.
+        """
+        n = len(self.tour)
+        if self.symmetric and 2 * count > n:
+            self.reverse(start + count, n - count)
+        else:
+            self.reverse(start, count)
+
+    def segmentSum(self, prefix, start, count):
+        n = len(self.tour)
+        end = start + count
+        if end <= n:
+            return prefix[end] - prefix[start]
+        return prefix[n] - prefix[start] + prefix[end - n]
+
+    def setTour(self, tour):
+        self.tour = tour
+        self.position = [0] * len(self.matrix)
+        for index, node in enumerate(tour):
+            self.position[node] = index
+        self.prefixes = None
+
+    def swapBlocks(self, start, first, second):
+        """
+        Меняет местами соседние участки маршрута из first и second вершин, начиная с позиции
+        start, тремя разворотами. По циклу обмен любых двух из трех участков (третий - остаток
+        маршрута) дает тот же маршрут, поэтому переставляются два самых коротких.
+        """
+        n = len(self.tour)
+        rest = n - first - second
+        _, start, first, second = min(
+            (first + second, start, first, second),
+            (second + rest, start + first, second, rest),
+            (rest + first, start + first + second, rest, first),
+        )
+        self.reverse(start, first)
+        self.reverse(start + first, second)
+        self.reverse(start, first + second)
+
+    def twoOpt(self, a):
+        """Разворот участка: новое ребро из a к одному из ближайших соседей."""
+        d, tour, position = self.distances, self.tour, self.position
+        n = len(tour)
+        b = tour[(position[a] + 1) % n]
+
+        # a -> b ... c -> g превращается в a -> c ... b -> g
+        for c in self.outgoing[a]:
+            gain = d[a][b] - d[a][c]
+            if not gain > epsilon:
+                break
+            offsetC = self.offset(a, c)
+            if offsetC < 2 or offsetC == n - 1:
+                continue
+            g = tour[(position[c] + 1) % n]
+            gain += d[c][g] - d[b][g] - self.reversalChange(position[b], offsetC - 1)
+            if gain > epsilon:
+                self.reverseSegment(position[b], offsetC)
+                self.activate(a, b, c, g)
+                return True
+
+        if not self.symmetric:
+            return False
+        # g -> c ... p -> a превращается в g -> p ... c -> a (для симметричного графа)
+        p = tour[position[a] - 1]
+        for c in self.outgoing[a]:
+            gain = d[p][a] - d[a][c]
+            if not gain > epsilon:
+                break
+            offsetC = self.offset(a, c)
+            if offsetC < 2 or c == p:
+                continue
+            g = tour[position[c] - 1]
+            if gain + d[g][c] - d[p][g] > epsilon:
+                self.reverseSegment(position[a], offsetC)
+                self.activate(a, p, c, g)
+                return True
+        return False
+
+    def updatePrefixes(self):
+        """Префиксные суммы длин ребер маршрута в прямом и обратном направлении (без несуществующих)."""
+        tour = np.asarray(self.tour)
+        following = np.roll(tour, -1)
+        forward, backward = self.matrix[tour, following], self.matrix[following, tour]
+        prefixes = []
+        for lengths in (forward, backward):
+            prefixes.append(np.concatenate(([0.0], np.cumsum(np.where(np.isfinite(lengths), lengths, 0.0)))).tolist())
+        for lengths in (forward, backward):
+            prefixes.append(np.concatenate(([0], np.cumsum(~np.isfinite(lengths)))).tolist())
+        self.prefixes = prefixes
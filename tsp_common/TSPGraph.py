@@ -0,0 +1,108 @@
+import numpy as np
+
+
+class TSPGraph:
+    """
+    Ориентированный граф задачи коммивояжера в виде плотной матрицы расстояний.
+
+    matrix[i, j] - длина ребра i -> j (для кратных ребер - наименьшая), inf - ребра нет.
+    Матрица строится один раз по списку ребер или таблице Excel и дальше обновляется
+    точечно при добавлении и удалении вершин и ребер, поэтому расстояние берется за O(1),
+    а строка расстояний из вершины - срезом без копирования.
+    """
+
+    def __init__(self, nodeCount=0):
+        self.size = nodeCount
+        self.data = np.full((max(nodeCount, 8),) * 2, np.inf)
+        self._lists = None
+
+    def addEdge(self, node1, node2, weight):
+        """Добавляет ребро node1 -> node2; из кратных ребер остается наименьшее."""
+        self.ensureNode(max(node1, node2))
+        self.setEdge(node1, node2, min(float(self.data[node1, node2]), float(weight)))
+
+    def addNode(self, node):
+        self.ensureNode(node)
+
+    def distance(self, node1, node2):
+        return self.lists[node1][node2]
+
+    def ensureNode(self, node):
+        """Увеличивает матрицу так, чтобы в ней была вершина node (емкость растет вдвое)."""
+        if node < self.size:
+            return
+        if node >= len(self.data):
+            capacity = max(2 * len(self.data), node + 1)
+            data = np.full((capacity, capacity), np.inf)
+            data[:self.size, :self.size] = self.matrix
+            self.data = data
+        self.size = node + 1
+        self._lists = None
+
+    @classmethod
+    def fromAdjacency(cls, adjacency):
+        """Строит граф по матрице смежности Excel: ребро есть, где значение больше нуля."""
+        adjacency = np.asarray(adjacency, dtype=float)
+        graph = cls(len(adjacency))
+        graph.matrix[...] = np.where(adjacency > 0, adjacency, np.inf)
+        return graph
+
+    @classmethod
+    def fromEdges(cls, nodeCount, edges):
+        """Строит граф по списку ребер [вершина 1, вершина 2, длина] одним векторным проходом."""
+        graph = cls(nodeCount)
+        if len(edges):
+            nodes1, nodes2, weights = zip(*edges)
+            graph.ensureNode(max(max(nodes1), max(nodes2)))
+            np.minimum.at(graph.data, (np.asarray(nodes1), np.asarray(nodes2)), np.asarray(weights, dtype=float))
+        return graph
+
+    @property
+    def lists(self):
+        """Матрица списками float для скалярных циклов (строится заново после изменений)."""
+        if self._lists is None:
+            self._lists = self.matrix.tolist()
+        return self._lists
+
+    @property
+    def matrix(self):
+        return self.data[:self.size, :self.size]
+
+    def neighbors(self, node):
+        """Вершины, в которые из node ведет ребро, по возрастанию номера."""
+        return np.flatnonzero(np.isfinite(self.data[node, :self.size]))
+
+    def pathLength(self, path):
+        """Длина пути по списку вершин (inf, если какого-то ребра нет)."""
+        path = np.asarray(path)
+        return float(self.data[path[:-1], path[1:]].sum())
+
+    def removeEdge(self, node1, node2):
+        self.setEdge(node1, node2, np.inf)
+
+    def removeNode(self, node):
+        """Удаляет вершину вместе с ее ребрами; последняя вершина уменьшает матрицу."""
+        self.data[node, :] = np.inf
+        self.data[:, node] = np.inf
+        if node == self.size - 1:
+            self.size -= 1
+        self._lists = None
+
+    def row(self, node):
+        """Расстояния из вершины node во все вершины (срез матрицы без копирования)."""
+        return self.data[node, :self.size]
+
+    def setEdge(self, node1, node2, weight):
+        """Задает длину ребра node1 -> node2 (inf - удалить ребро)."""
+        self.ensureNode(max(node1, node2))
+        weight = float(weight)
+        self.data[node1, node2] = weight
+        if self._lists is not None:
+            self._lists[node1][node2] = weight
+
+    def toAdjacency(self):
+        """Матрица смежности для Excel: 0 там, где ребра нет."""
+        return np.where(np.isfinite(self.matrix), self.matrix, 0.0)
+
+    def __len__(self):
+        return self.size
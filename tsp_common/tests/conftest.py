@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Общие модули импортируются как tsp_common.* из корня репозитория
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
@@ -0,0 +1,59 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from tsp_common.LocalSearch import LocalSearch
+
+
+def tourLength(distances, path):
+    return sum(distances[path[t], path[t + 1]] for t in range(len(path) - 1))
+
+
+def randomGraph(rng, n, kind):
+    points = rng.random((n, 2))
+    distances = np.hypot(*(points[:, None] - points[None]).transpose(2, 0, 1))
+    if kind == 'asymmetric':
+        distances += rng.random((n, n))
+    elif kind == 'incomplete':
+        distances[rng.random((n, n)) < 0.3] = np.inf
+    np.fill_diagonal(distances, np.inf)
+    return distances
+
+
+@pytest.mark.parametrize('kind', ['symmetric', 'asymmetric', 'incomplete'])
+def test_improve_returns_valid_tour_and_its_length(kind):
+    rng = np.random.default_rng(0)
+    for _ in range(100):
+        n = int(rng.integers(5, 60))
+        distances = randomGraph(rng, n, kind)
+        path = rng.permutation(n).tolist()
+        path.append(path[0])
+
+        search = LocalSearch(distances)
+        improved, length = search.improve(path)
+
+        assert improved[0] == improved[-1] == path[0]
+        assert sorted(improved[:-1]) == list(range(n))
+        assert all(search.position[node] == index for index, node in enumerate(search.tour))
+        assert length == tourLength(distances, improved)
+        assert length <= tourLength(distances, path)
+
+
+@pytest.mark.parametrize('kind', ['symmetric', 'asymmetric'])
+def test_small_graphs_against_brute_force(kind):
+    rng = np.random.default_rng(1)
+    gaps = []
+    for _ in range(30):
+        n = 7
+        distances = randomGraph(rng, n, kind)
+        optimum = min(tourLength(distances, (0,) + order + (0,)) for order in itertools.permutations(range(1, n)))
+
+        path = rng.permutation(n).tolist()
+        path.append(path[0])
+        _, length = LocalSearch(distances).improve(path)
+        assert length >= optimum - 1e-9
+        gaps.append(length / optimum - 1)
+
+    # На 7 вершинах локальный поиск находит оптимум или близкий к нему маршрут
+    assert np.mean(gaps) < 0.05